@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contas'
+
+    def ready(self):
+        # Instala o contador de consultas (connection_created) antes da primeira conexão
+        from . import metricas  # noqa: F401
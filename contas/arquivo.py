@@ -0,0 +1,282 @@
+"""
+Arquivo das transações antigas (model ArquivoTransacoes).
+
+- `arquivar` (comando arquivar_transacoes, agendado como o
+  gerar_recorrencias) tira da tabela Transacao as transações de anos
+  inteiros anteriores ao horizonte (ARQUIVO_HORIZONTE_MESES) que não são
+  alteradas há ARQUIVO_REPOUSO_DIAS, e grava um segmento comprimido por
+  usuário e ano. As linhas saem com apagar_transacoes (DELETE em SQL
+  explícito): sem signals, o
+  ResumoMensal continua com a contribuição delas (totais, estatísticas,
+  dashboard e séries mensais não mudam) e não há marca de exclusão (quem
+  sincroniza mantém a cópia local). O trigger do índice de busca tira as
+  linhas da busca, que só vê as transações não arquivadas.
+- `restaurar_periodo` (POST /api/transacoes/restaurar/ e pedido de
+  relatório) devolve para a tabela, inteiros e com os mesmos ids, os anos
+  arquivados do período, que ficam lá até passarem de novo pelo repouso.
+  As leituras de um período (listagem com ?inicio/?fim, exportação, série
+  por dia ou semana) não restauram: GET não escreve nem muda a
+  versao_dados. Elas conferem `anos_arquivados` (uma consulta pela chave
+  (user, ano)) e respondem 409 se o período tiver anos no arquivo.
+
+Segmento: {"versao", "campos", "linhas"} em JSON, comprimido com zstd. Os
+nomes dos campos vão junto, então um segmento antigo continua legível
+depois de uma migração que acrescente campos à Transacao.
+"""
+
+import json
+import secrets
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import zstandard
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    ArquivoTransacoes, Categoria, Recorrencia, Transacao, UserProfile, acumular_delta, apagar_transacoes, inicio_do_mes,
+)
+
+VERSAO_FORMATO = 1
+
+# Grava uma vez e lê raramente: vale um nível alto
+NIVEL_ZSTD = 12
+
+TAMANHO_LOTE = 500
+
+_CAMPOS = {campo.attname: campo for campo in Transacao._meta.concrete_fields}
+CAMPOS = list(_CAMPOS)
+
+
+# ============================================
+# SEGMENTOS
+# ============================================
+
+def _padrao(valor):
+    # date/datetime com isoformat completo (o DjangoJSONEncoder corta os microssegundos)
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError(f'{type(valor).__name__} não é serializável no arquivo')
+
+
+def compactar(transacoes):
+    """Dicionários {attname: valor} -> bytes do segmento."""
+    conteudo = {
+        'versao': VERSAO_FORMATO,
+        'campos': CAMPOS,
+        'linhas': [[transacao.get(campo) for campo in CAMPOS] for transacao in transacoes],
+    }
+    corpo = json.dumps(conteudo, default=_padrao, ensure_ascii=False, separators=(',', ':')).encode()
+    return zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(corpo)
+
+
+def descompactar(dados):
+    """Bytes do segmento -> dicionários {attname: valor} com os tipos do model."""
+    conteudo = json.loads(zstandard.ZstdDecompressor().decompress(dados))
+    # Campo que não existe mais na Transacao fica de fora
+    campos = [(indice, nome, _CAMPOS[nome]) for indice, nome in enumerate(conteudo['campos']) if nome in _CAMPOS]
+    return [
+        {nome: campo.to_python(linha[indice]) for indice, nome, campo in campos}
+        for linha in conteudo['linhas']
+    ]
+
+
+def ler_segmento(segmento):
+    if segmento.arquivo:
+        return (Path(settings.MEDIA_ROOT) / segmento.arquivo).read_bytes()
+    return bytes(segmento.dados)
+
+
+def _gravar_segmento(segmento, transacoes):
+    dados = compactar(transacoes)
+    anterior = segmento.arquivo
+    if settings.ARQUIVO_DESTINO == 'disco':
+        # Nome novo a cada gravação: se a transação do banco for desfeita, o
+        # segmento continua apontando para o arquivo anterior, intacto
+        relativo = Path('arquivo') / str(segmento.user_id) / f'{segmento.ano}-{secrets.token_hex(4)}.json.zst'
+        destino = Path(settings.MEDIA_ROOT) / relativo
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        destino.write_bytes(dados)
+        segmento.arquivo, segmento.dados = str(relativo), None
+    else:
+        segmento.arquivo, segmento.dados = '', dados
+    segmento.quantidade, segmento.tamanho = len(transacoes), len(dados)
+    segmento.save()
+    if anterior and anterior != segmento.arquivo:
+        caminho = Path(settings.MEDIA_ROOT) / anterior
+        transaction.on_commit(lambda: caminho.unlink(missing_ok=True))
+
+
+# ============================================
+# ARQUIVAMENTO
+# ============================================
+
+def inicio_do_horizonte(hoje=None, meses=None):
+    """1º de janeiro do ano em que cai hoje - meses: só anos inteiros vão para o arquivo."""
+    hoje = hoje or date.today()
+    meses = settings.ARQUIVO_HORIZONTE_MESES if meses is None else meses
+    return date((hoje.year * 12 + hoje.month - 1 - meses) // 12, 1, 1)
+
+
+def _arquivar_usuario(user_id, antes_de, alteradas_antes_de):
+    """Arquiva as transações do usuário com data < antes_de. Devolve (segmentos, transacoes)."""
+    with transaction.atomic():
+        elegiveis = Transacao.objects.filter(
+            user_id=user_id, data__lt=antes_de, atualizada_em__lt=alteradas_antes_de
+        )
+        # FOR UPDATE: uma edição concorrente espera, em vez de se perder no arquivo
+        transacoes = list(elegiveis.select_for_update().order_by('data', 'id').values(*CAMPOS))
+        if not transacoes:
+            return 0, 0
+
+        por_ano = {}
+        for transacao in transacoes:
+            por_ano.setdefault(transacao['data'].year, []).append(transacao)
+        existentes = {
+            segmento.ano: segmento
+            for segmento in ArquivoTransacoes.objects.select_for_update().filter(user_id=user_id, ano__in=por_ano)
+        }
+
+        for ano, novas in por_ano.items():
+            segmento = existentes.get(ano) or ArquivoTransacoes(user_id=user_id, ano=ano)
+            if segmento.pk:
+                # Ano já arquivado (transações alteradas depois): junta no mesmo segmento
+                novas = sorted(descompactar(ler_segmento(segmento)) + novas, key=lambda t: (t['data'], t['id']))
+            _gravar_segmento(segmento, novas)
+
+        # DELETE direto, sem signals: o resumo continua contando estas transações
+        apagar_transacoes(user_id, [transacao['id'] for transacao in transacoes])
+        UserProfile.incrementar_versao(user_id)
+    return len(por_ano), len(transacoes)
+
+
+def arquivar(hoje=None, meses=None, usuarios=None):
+    """
+    Arquiva as transações antigas de todos os usuários (ou dos ids em
+    `usuarios`), um usuário por transação do banco.
+    Devolve {'usuarios', 'segmentos', 'transacoes'}.
+    """
+    antes_de = inicio_do_horizonte(hoje, meses)
+    alteradas_antes_de = timezone.now() - timedelta(days=settings.ARQUIVO_REPOUSO_DIAS)
+    ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    if usuarios is not None:
+        ids = ids.filter(pk__in=usuarios)
+
+    total = {'usuarios': 0, 'segmentos': 0, 'transacoes': 0}
+    ultimo = 0
+    while True:
+        lote = list(ids.filter(pk__gt=ultimo)[:TAMANHO_LOTE])
+        if not lote:
+            return total
+        for user_id in lote:
+            segmentos, transacoes = _arquivar_usuario(user_id, antes_de, alteradas_antes_de)
+            if transacoes:
+                total['usuarios'] += 1
+                total['segmentos'] += segmentos
+                total['transacoes'] += transacoes
+        ultimo = lote[-1]
+
+
+# ============================================
+# RESTAURAÇÃO
+# ============================================
+
+def _sem_referencias_apagadas(transacoes, user_id):
+    """Categoria ou recorrência excluída enquanto a transação estava arquivada vira null (como no SET_NULL)."""
+    categorias = set(Categoria.objects.filter(user_id=user_id).values_list('pk', flat=True))
+    recorrencias = set(Recorrencia.objects.filter(user_id=user_id).values_list('pk', flat=True))
+    for transacao in transacoes:
+        if transacao.get('categoria_id') not in categorias:
+            transacao['categoria_id'] = None
+        if transacao.get('recorrencia_id') not in recorrencias:
+            transacao['recorrencia_id'] = None
+    return transacoes
+
+
+def _inserir(transacoes):
+    """
+    bulk_create com os ids originais. O auto_now_add troca o criada_em
+    pelo horário atual, então o original volta num bulk_update logo depois.
+    Sem signals: o ResumoMensal já conta estas transações.
+    """
+    objetos = [Transacao(**transacao) for transacao in transacoes]
+    Transacao.objects.bulk_create(objetos, batch_size=TAMANHO_LOTE)
+    for objeto, transacao in zip(objetos, transacoes):
+        objeto.criada_em = transacao['criada_em']
+    Transacao.objects.bulk_update(objetos, ['criada_em'], batch_size=TAMANHO_LOTE)
+
+
+def restaurar(user_id, anos=None):
+    """Devolve para a tabela os anos arquivados do usuário (todos, sem `anos`). Devolve quantas transações voltaram."""
+    with transaction.atomic():
+        segmentos = ArquivoTransacoes.objects.select_for_update().filter(user_id=user_id)
+        if anos is not None:
+            segmentos = segmentos.filter(ano__in=anos)
+        segmentos = list(segmentos)
+        if not segmentos:
+            # Outra requisição restaurou primeiro
+            return 0
+
+        transacoes = []
+        for segmento in segmentos:
+            transacoes.extend(descompactar(ler_segmento(segmento)))
+        agora = timezone.now()
+        for transacao in _sem_referencias_apagadas(transacoes, user_id):
+            # A sincronização manda as transações de novo
+            transacao['atualizada_em'] = agora
+        _inserir(transacoes)
+
+        for segmento in segmentos:
+            segmento.delete()
+        UserProfile.incrementar_versao(user_id)
+    return len(transacoes)
+
+
+def anos_arquivados(user, inicio=None, fim=None):
+    """Anos arquivados do usuário que cruzam [inicio, fim] (vazio = sem limite)."""
+    anos = ArquivoTransacoes.objects.filter(user=user)
+    if inicio:
+        anos = anos.filter(ano__gte=inicio.year)
+    if fim:
+        anos = anos.filter(ano__lte=fim.year)
+    return list(anos.order_by('ano').values_list('ano', flat=True))
+
+
+def restaurar_periodo(user, inicio=None, fim=None):
+    """Restaura os anos arquivados que cruzam [inicio, fim] (vazio = sem limite). Devolve quantas voltaram."""
+    anos = anos_arquivados(user, inicio, fim)
+    if not anos:
+        return 0
+    return restaurar(user.pk, anos)
+
+
+# ============================================
+# RESUMO DO QUE ESTÁ ARQUIVADO
+# ============================================
+
+def resumo_arquivado(user_id=None):
+    """
+    {(user_id, mes, categoria_id, tipo): [total, quantidade]} das
+    transações arquivadas, para o reconstruir_resumos somar às da tabela.
+    """
+    segmentos = ArquivoTransacoes.objects.order_by('user_id', 'ano')
+    if user_id is not None:
+        segmentos = segmentos.filter(user_id=user_id)
+
+    deltas = {}
+    categorias = {}
+    for segmento in segmentos.iterator(chunk_size=100):
+        if segmento.user_id not in categorias:
+            categorias[segmento.user_id] = set(
+                Categoria.objects.filter(user_id=segmento.user_id).values_list('pk', flat=True)
+            )
+        for transacao in descompactar(ler_segmento(segmento)):
+            categoria_id = transacao['categoria_id'] if transacao['categoria_id'] in categorias[segmento.user_id] else None
+            chave = (segmento.user_id, inicio_do_mes(transacao['data']), categoria_id, transacao['tipo'])
+            acumular_delta(deltas, chave, transacao['valor'], 1)
+    return deltas
@@ -0,0 +1,150 @@
+"""
+Autenticação JWT com cache dos usuários em memória (por processo).
+
+O JWTAuthentication padrão faz um SELECT em auth_user a cada requisição só
+para transformar o claim user_id em um User. O CachedJWTAuthentication
+guarda esses Users por id, com validade (TTL) e limite de tamanho (LRU).
+
+Invalidação: qualquer save/delete de User (o PUT de /api/users/me/ passa
+pelo UserSerializer.update, que chama user.save()) remove a entrada neste
+processo. Outros processos só percebem a mudança quando o TTL expira, por
+isso ele é curto. Alterações via QuerySet.update() também dependem do TTL.
+
+Configuração (settings.py): CACHE_USUARIOS_TAMANHO e CACHE_USUARIOS_TTL.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+# ============================================
+# CACHE LRU COM TTL
+# ============================================
+
+class CacheUsuarios:
+    """
+    Dicionário id -> User com validade e limite de itens, seguro entre
+    threads. Os contadores servem para dimensionar o cache.
+    """
+
+    def __init__(self, tamanho=1000, ttl=60):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.despejados = 0
+
+    def obter(self, pk):
+        """Devolve uma cópia do User guardado, ou None (falha/expirado)."""
+        # O simplejwt grava o user_id do token como texto; a chave é sempre str
+        pk = str(pk)
+        with self._trava:
+            item = self._itens.get(pk)
+            if item is not None and item[1] < time.monotonic():
+                del self._itens[pk]
+                self.expirados += 1
+                item = None
+            if item is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(pk)
+            self.acertos += 1
+            user = item[0]
+        # Cópia: a view pode alterar request.user (ex.: PUT /users/me/) ou
+        # preencher o cache de relações sem afetar as outras requisições
+        return copy.copy(user)
+
+    def guardar(self, pk, user):
+        if self.tamanho <= 0:
+            return
+        pk = str(pk)
+        with self._trava:
+            self._itens[pk] = (copy.copy(user), time.monotonic() + self.ttl)
+            self._itens.move_to_end(pk)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+                self.despejados += 1
+
+    def invalidar(self, pk):
+        with self._trava:
+            self._itens.pop(str(pk), None)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self.acertos = self.falhas = self.expirados = self.despejados = 0
+
+    def estatisticas(self):
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+                'expirados': self.expirados,
+                'despejados': self.despejados,
+                'itens': len(self._itens),
+                'tamanho': self.tamanho,
+                'ttl': self.ttl,
+            }
+
+
+cache_usuarios = CacheUsuarios(
+    tamanho=getattr(settings, 'CACHE_USUARIOS_TAMANHO', 1000),
+    ttl=getattr(settings, 'CACHE_USUARIOS_TTL', 60),
+)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario_em_cache(sender, instance, **kwargs):
+    cache_usuarios.invalidar(instance.pk)
+
+
+# ============================================
+# AUTENTICAÇÃO
+# ============================================
+
+def verificar_usuario(user, validated_token):
+    """As mesmas verificações do JWTAuthentication.get_user, para o User já carregado."""
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que consulta o cache_usuarios antes do banco."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = cache_usuarios.obter(user_id)
+        if user is None:
+            # Faz o SELECT e as verificações do simplejwt
+            user = super().get_user(validated_token)
+            cache_usuarios.guardar(user_id, user)
+            return user
+
+        verificar_usuario(user, validated_token)
+        return user
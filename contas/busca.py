@@ -0,0 +1,125 @@
+"""
+Busca textual nas transações (/api/transacoes/busca/?q=).
+
+Procura em descrição, observação e nome da categoria, sem diferenciar
+maiúsculas nem acentos ("farmacia" encontra "Farmácia"), e devolve as
+transações por relevância. O índice é do próprio banco e é mantido por
+triggers (migração 0007), então vale também para as escritas em massa
+(importação, lote) que não passam pelo save():
+
+- SQLite: tabela virtual FTS5 contas_transacao_busca (rowid = id da
+  transação, tokenizer unicode61 sem diacríticos). Cada termo vira uma
+  busca por prefixo e a ordem é a do bm25. A coluna usuario (token
+  'u<user_id>', migração 0012) entra no MATCH: o índice só percorre as
+  linhas do usuário.
+- PostgreSQL: índice GIN de trigramas (pg_trgm) sobre descrição +
+  observação normalizadas com unaccent; cada termo vira um LIKE '%termo%'
+  que o índice atende, e a ordem é a do word_similarity. As categorias do
+  usuário (poucas) são comparadas aqui mesmo.
+
+Em ambos o custo acompanha o número de transações que casam com os termos,
+não o tamanho do histórico.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+
+from .models import Categoria, Transacao
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 200
+
+MAXIMO_TERMOS = 8
+
+# Pesos do bm25 por coluna (descricao, observacao, categoria, usuario)
+PESOS_FTS = (10.0, 2.0, 5.0, 0.0)
+
+# Colunas onde os termos são procurados (a usuario só filtra o dono)
+COLUNAS_TEXTO_FTS = 'descricao observacao categoria'
+
+# Bônus de relevância no PostgreSQL quando o termo casa com a categoria
+PESO_CATEGORIA = 0.5
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, como o índice guarda."""
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def termos_da_busca(texto):
+    """Palavras da busca já normalizadas (sem operadores nem aspas)."""
+    return re.findall(r'\w+', normalizar(texto or ''))[:MAXIMO_TERMOS]
+
+
+# ============================================
+# SQLITE (FTS5)
+# ============================================
+
+def _buscar_sqlite(user, termos, limite):
+    # Todos os termos, cada um como prefixo: "farm" encontra "Farmácia"
+    textos = ' AND '.join(f'"{termo}"*' for termo in termos)
+    consulta = f'usuario:"u{user.pk}" AND {{{COLUNAS_TEXTO_FTS}}}: ({textos})'
+    sql = f"""
+        SELECT b.rowid
+        FROM contas_transacao_busca b
+        JOIN contas_transacao t ON t.id = b.rowid
+        WHERE contas_transacao_busca MATCH %s AND t.user_id = %s
+        ORDER BY bm25(contas_transacao_busca, {', '.join(map(str, PESOS_FTS))}), t.data DESC, t.id DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [consulta, user.pk, limite])
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+# ============================================
+# POSTGRESQL (PG_TRGM + UNACCENT)
+# ============================================
+
+# Mesma expressão do índice contas_transacao_busca_trgm (migração 0007)
+DOCUMENTO_PG = "contas_busca_normalizar(t.descricao || ' ' || coalesce(t.observacao, ''))"
+
+
+def _buscar_postgres(user, termos, limite):
+    categorias = [
+        (pk, normalizar(nome)) for pk, nome in Categoria.objects.filter(user=user).values_list('id', 'nome')
+    ]
+    condicoes, parametros = [], []
+    for termo in termos:
+        # O termo casa com o texto da transação ou com o nome da categoria
+        ids = [pk for pk, nome in categorias if termo in nome]
+        condicoes.append(f"({DOCUMENTO_PG} LIKE %s OR t.categoria_id = ANY(%s::bigint[]))")
+        parametros += ['%' + termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%', ids]
+
+    texto = ' '.join(termos)
+    ids_categoria = [pk for pk, nome in categorias if any(termo in nome for termo in termos)]
+    sql = f"""
+        SELECT t.id
+        FROM contas_transacao t
+        WHERE t.user_id = %s AND {' AND '.join(condicoes)}
+        ORDER BY word_similarity(%s, {DOCUMENTO_PG})
+                 + CASE WHEN t.categoria_id = ANY(%s::bigint[]) THEN {PESO_CATEGORIA} ELSE 0 END DESC,
+                 t.data DESC, t.id DESC
+        LIMIT %s
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk, *parametros, texto, ids_categoria, limite])
+        return [linha[0] for linha in cursor.fetchall()]
+
+
+# ============================================
+# BUSCA
+# ============================================
+
+def buscar_transacoes(user, texto, limite=LIMITE_PADRAO):
+    """Transações do usuário que casam com todos os termos, da mais relevante à menos."""
+    termos = termos_da_busca(texto)
+    if not termos:
+        return []
+    buscar = _buscar_postgres if connection.vendor == 'postgresql' else _buscar_sqlite
+    ids = buscar(user, termos, limite)
+    encontradas = Transacao.objects.select_related('categoria', 'user').in_bulk(ids)
+    return [encontradas[pk] for pk in ids if pk in encontradas]
@@ -0,0 +1,71 @@
+"""
+Cache das respostas agregadas (estatísticas e dashboard) no cache do Django.
+
+A chave junta usuário, endpoint, parâmetros da URL e UserProfile.versao_dados.
+Toda escrita em Categoria/Transacao/Meta sobe a versão, então a próxima
+leitura já procura outra chave: não há invalidação explícita, e as entradas
+antigas saem pelo limite de tamanho (MAX_ENTRIES/CULL_FREQUENCY) ou pelo
+TIMEOUT do cache 'respostas' em settings.py.
+
+Desligado com CACHE_RESPOSTAS_ATIVO = False (GA_CACHE_RESPOSTAS=desligado).
+"""
+
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import UserProfile
+
+ALIAS = 'respostas'
+
+
+def ativo():
+    return getattr(settings, 'CACHE_RESPOSTAS_ATIVO', False)
+
+
+def montar_chave(user_id, endpoint, parametros, versao):
+    consulta = urlencode(sorted(parametros.lists()), doseq=True)
+    resumo = hashlib.sha1(consulta.encode()).hexdigest()[:16]
+    return f'{endpoint}:{user_id}:{versao}:{resumo}'
+
+
+def _consulta_versao(user):
+    return UserProfile.objects.filter(user=user).values_list('versao_dados', flat=True)
+
+
+def em_cache(request, endpoint, calcular):
+    """Devolve os dados de `endpoint` do cache ou chama calcular() e guarda."""
+    if not ativo():
+        return calcular()
+
+    versao = _consulta_versao(request.user).first()
+    if versao is None:
+        return calcular()
+
+    cache = caches[ALIAS]
+    chave = montar_chave(request.user.pk, endpoint, request.GET, versao)
+    dados = cache.get(chave)
+    if dados is None:
+        dados = calcular()
+        cache.set(chave, dados)
+    return dados
+
+
+async def aem_cache(request, user, endpoint, calcular):
+    """Versão assíncrona de em_cache; calcular é uma corrotina."""
+    if not ativo():
+        return await calcular()
+
+    versao = await _consulta_versao(user).afirst()
+    if versao is None:
+        return await calcular()
+
+    cache = caches[ALIAS]
+    chave = montar_chave(user.pk, endpoint, request.GET, versao)
+    dados = await cache.aget(chave)
+    if dados is None:
+        dados = await calcular()
+        await cache.aset(chave, dados)
+    return dados
@@ -0,0 +1,177 @@
+"""
+Compressão das respostas negociada pelo Accept-Encoding (zstd ou gzip).
+
+O CompressaoMiddleware escolhe a codificação de maior peso (q) que o
+cliente aceita; no empate fica o zstd, que comprime mais e gasta menos CPU
+que o gzip. Só entram respostas de texto (JSON, NDJSON, CSV, HTML...) com
+pelo menos COMPRESSAO_MINIMO_BYTES: abaixo disso o ganho não paga a CPU
+(e as respostas de login/refresh, que trazem tokens, ficam de fora).
+
+Respostas em fluxo (exportação) são comprimidas pedaço a pedaço, sem
+juntar o corpo na memória. O gzip das respostas normais usa o
+compress_string do Django, com os bytes aleatórios contra o BREACH.
+Quem já define Content-Encoding (download do relatório, exportação com
+?compressao=zstd) passa direto.
+"""
+
+import gzip
+import threading
+import zlib
+
+import zstandard
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_string
+
+# Ordem de preferência no empate de pesos
+CODIFICACOES = ('zstd', 'gzip')
+
+NIVEL_ZSTD = 3
+NIVEL_GZIP = 6
+
+TIPOS_COMPRIMIVEIS = (
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml',
+    'text/', 'image/svg+xml',
+)
+
+
+def escolher_codificacao(accept_encoding):
+    """'gzip, zstd;q=0.9' -> 'gzip'. None se o cliente não aceita nenhuma das duas."""
+    pesos = {}
+    for item in accept_encoding.split(','):
+        nome, _, parametros = item.partition(';')
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        peso = 1.0
+        for parametro in parametros.split(';'):
+            chave, _, valor = parametro.partition('=')
+            if chave.strip().lower() == 'q':
+                try:
+                    peso = float(valor)
+                except ValueError:
+                    peso = 0.0
+        pesos[nome] = peso
+
+    escolhida, maior = None, 0.0
+    for codificacao in CODIFICACOES:
+        peso = pesos.get(codificacao, pesos.get('*', 0.0))
+        if peso > maior:
+            escolhida, maior = codificacao, peso
+    return escolhida
+
+
+# ============================================
+# COMPRESSÃO
+# ============================================
+
+_local = threading.local()
+
+
+def _zstd():
+    # Um compressor por thread: o ZstdCompressor não pode ser usado por duas ao mesmo tempo
+    compressor = getattr(_local, 'zstd', None)
+    if compressor is None:
+        compressor = _local.zstd = zstandard.ZstdCompressor(level=NIVEL_ZSTD)
+    return compressor
+
+
+def comprimir(dados, codificacao):
+    if codificacao == 'zstd':
+        return _zstd().compress(dados)
+    return compress_string(dados, max_random_bytes=100)
+
+
+def comprimir_estatico(dados, codificacao):
+    """
+    Para o que é comprimido uma vez e servido muitas (arquivos estáticos,
+    páginas HTML): nível máximo e saída determinística, sem os bytes
+    aleatórios (não há segredo nesses corpos).
+    """
+    if codificacao == 'zstd':
+        return zstandard.ZstdCompressor(level=19).compress(dados)
+    return gzip.compress(dados, compresslevel=9, mtime=0)
+
+
+def _compressor_de_fluxo(codificacao):
+    if codificacao == 'zstd':
+        return zstandard.ZstdCompressor(level=NIVEL_ZSTD).compressobj()
+    return zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # Cabeçalho gzip
+
+
+def comprimir_fluxo(pedacos, codificacao):
+    compressor = _compressor_de_fluxo(codificacao)
+    for pedaco in pedacos:
+        saida = compressor.compress(pedaco)
+        if saida:
+            yield saida
+    yield compressor.flush()
+
+
+async def acomprimir_fluxo(pedacos, codificacao):
+    compressor = _compressor_de_fluxo(codificacao)
+    async for pedaco in pedacos:
+        saida = compressor.compress(pedaco)
+        if saida:
+            yield saida
+    yield compressor.flush()
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+def _comprimivel(response):
+    tipo = response.get('Content-Type', '').lower()
+    return (
+        not response.has_header('Content-Encoding')
+        and 200 <= response.status_code < 300 and response.status_code != 204
+        and tipo.startswith(TIPOS_COMPRIMIVEIS)
+    )
+
+
+class CompressaoMiddleware(MiddlewareMixin):
+    """Logo depois do MetricasMiddleware: os outros middlewares veem o corpo original."""
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.ativo = getattr(settings, 'COMPRESSAO_ATIVA', True)
+        self.minimo = getattr(settings, 'COMPRESSAO_MINIMO_BYTES', 1024)
+
+    def process_response(self, request, response):
+        if not self.ativo or not _comprimivel(response):
+            return response
+        if response.streaming:
+            # Arquivo (FileResponse) com tamanho conhecido segue a mesma regra
+            tamanho = response.get('Content-Length')
+            if tamanho is not None and int(tamanho) < self.minimo:
+                return response
+        elif len(response.content) < self.minimo:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacao is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acomprimir_fluxo(response.streaming_content, codificacao)
+            else:
+                response.streaming_content = comprimir_fluxo(response.streaming_content, codificacao)
+            # O tamanho comprimido só se sabe no fim do fluxo
+            del response.headers['Content-Length']
+        else:
+            comprimido = comprimir(response.content, codificacao)
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response.headers['Content-Length'] = str(len(comprimido))
+
+        # Os bytes mudaram: ETag forte vira fraca (RFC 9110, 8.8.1)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = codificacao
+        return response
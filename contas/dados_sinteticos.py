@@ -0,0 +1,140 @@
+"""
+Dados sintéticos para desenvolvimento e benchmark (comando gerar_dados).
+
+Cada usuário recebe o onboarding normal (perfil, categorias e metas padrão
+do signal create_user_data), algumas categorias extras, o progresso das
+metas e M transações espalhadas pelos últimos `dias`: salário todo mês,
+contas fixas de moradia e despesas variáveis por categoria.
+
+Tudo sai de um random.Random(semente): a mesma semente gera as mesmas
+transações (as datas são relativas a `ate`). As transações são gravadas em
+lotes por importacao.gravar_lote, que já atualiza o ResumoMensal, e a
+versão dos dados sobe uma vez por usuário ao final.
+"""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from .importacao import TAMANHO_LOTE, gravar_lote
+from .models import Categoria, Meta, UserProfile
+
+SENHA_PADRAO = 'senha-sintetica-123'
+
+CENTAVO = Decimal('0.01')
+
+CATEGORIAS_EXTRAS = (
+    {'nome': 'Assinaturas', 'tipo': 'despesa', 'icone': 'bx-tv', 'cor': '#343a40'},
+    {'nome': 'Pets', 'tipo': 'despesa', 'icone': 'bx-bone', 'cor': '#795548'},
+    {'nome': 'Vendas', 'tipo': 'receita', 'icone': 'bx-store', 'cor': '#2e7d32'},
+)
+
+# Categoria -> (descrições, valor mínimo, valor máximo)
+PERFIS_DE_GASTO = {
+    'Alimentação': (('Supermercado', 'Padaria', 'Restaurante', 'iFood', 'Feira'), 12, 450),
+    'Moradia': (('Conta de luz', 'Conta de água', 'Internet', 'Condomínio', 'Gás'), 60, 600),
+    'Transporte': (('Uber', 'Combustível', 'Estacionamento', 'Ônibus', 'Pedágio'), 5, 300),
+    'Lazer': (('Cinema', 'Show', 'Bar', 'Viagem', 'Jogo'), 20, 900),
+    'Saúde': (('Farmácia', 'Consulta', 'Exame', 'Academia'), 25, 700),
+    'Educação': (('Curso online', 'Livros', 'Material escolar'), 30, 800),
+    'Assinaturas': (('Streaming', 'Música', 'Armazenamento na nuvem'), 10, 60),
+    'Pets': (('Ração', 'Veterinário', 'Banho e tosa'), 40, 400),
+    'Investimentos': (('Dividendos', 'Rendimento CDB', 'Juros'), 5, 800),
+    'Freelance': (('Projeto freelance', 'Consultoria', 'Design'), 200, 4000),
+    'Vendas': (('Venda usado', 'Venda online'), 30, 1500),
+}
+
+# Proporção aproximada de receitas entre as transações variáveis
+PROPORCAO_RECEITAS = 0.12
+
+
+def _valor(sorteio, minimo, maximo):
+    # Distribuição concentrada nos valores baixos, como num extrato real
+    return (Decimal(minimo) + Decimal(maximo - minimo) * Decimal(sorteio.random() ** 2)).quantize(CENTAVO)
+
+
+def gerar_transacoes(sorteio, user_id, categorias, quantidade, ate, dias):
+    """
+    Tuplas no formato de importacao.montar_transacao (user_id, descricao,
+    valor, tipo, categoria_id, data, observacao), em ordem de data.
+    """
+    inicio = ate - timedelta(days=dias - 1)
+    receitas = [nome for nome, c in categorias.items() if c.tipo == 'receita' and nome in PERFIS_DE_GASTO]
+    despesas = [nome for nome, c in categorias.items() if c.tipo == 'despesa' and nome in PERFIS_DE_GASTO]
+    salario = Decimal(sorteio.randrange(1800, 15000)).quantize(CENTAVO)
+
+    linhas = []
+    # Entradas fixas: salário no dia 5 e moradia no dia 10 de cada mês
+    mes = inicio.replace(day=1)
+    while mes <= ate and len(linhas) < quantidade:
+        for dia, nome, descricao, valor in (
+            (5, 'Salário', 'Salário', salario),
+            (10, 'Moradia', 'Aluguel', (salario * Decimal('0.3')).quantize(CENTAVO)),
+        ):
+            data = mes.replace(day=dia)
+            if inicio <= data <= ate and nome in categorias and len(linhas) < quantidade:
+                categoria = categorias[nome]
+                linhas.append((user_id, descricao, valor, categoria.tipo, categoria.id, data, None))
+        mes = (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    while len(linhas) < quantidade:
+        nome = sorteio.choice(receitas if sorteio.random() < PROPORCAO_RECEITAS else despesas)
+        descricoes, minimo, maximo = PERFIS_DE_GASTO[nome]
+        categoria = categorias[nome]
+        linhas.append((
+            user_id,
+            sorteio.choice(descricoes),
+            _valor(sorteio, minimo, maximo),
+            categoria.tipo,
+            # Uma parte das transações fica sem categoria, como no uso real
+            None if sorteio.random() < 0.03 else categoria.id,
+            inicio + timedelta(days=sorteio.randrange(dias)),
+            'Gerado automaticamente' if sorteio.random() < 0.1 else None,
+        ))
+
+    linhas.sort(key=lambda linha: linha[5])
+    return linhas
+
+
+def criar_usuario(username, transacoes, semente=0, ate=None, dias=730, senha=SENHA_PADRAO, senha_hash=None):
+    """Cria um usuário com dados sintéticos. Devolve o User."""
+    sorteio = random.Random(f'{semente}:{username}')
+    ate = ate or date.today()
+
+    with transaction.atomic():
+        # O signal create_user_data faz o onboarding (perfil, categorias, metas)
+        user = User.objects.create(
+            username=username,
+            email=f'{username}@example.com',
+            first_name=username.capitalize(),
+            password=senha_hash or make_password(senha),
+        )
+        Categoria.objects.bulk_create([Categoria(user=user, **c) for c in CATEGORIAS_EXTRAS])
+        categorias = {c.nome: c for c in Categoria.objects.filter(user=user)}
+
+        metas = list(Meta.objects.filter(user=user))
+        for meta in metas:
+            meta.valor_atual = (meta.valor_alvo * Decimal(sorteio.uniform(0, 1.1))).quantize(CENTAVO)
+        Meta.objects.bulk_update(metas, ['valor_atual'])
+
+        linhas = gerar_transacoes(sorteio, user.pk, categorias, transacoes, ate, dias)
+        for i in range(0, len(linhas), TAMANHO_LOTE):
+            gravar_lote(linhas[i:i + TAMANHO_LOTE])
+
+        # bulk_update e bulk_create não disparam signals
+        UserProfile.incrementar_versao(user.pk)
+    return user
+
+
+def gerar_usuarios(usuarios, transacoes, semente=0, prefixo='demo', ate=None, dias=730, senha=SENHA_PADRAO):
+    """Cria `usuarios` usuários ({prefixo}1, {prefixo}2, ...) com `transacoes` transações cada."""
+    # O hash da senha é o passo mais caro da criação; é o mesmo para todos
+    senha_hash = make_password(senha)
+    return [
+        criar_usuario(f'{prefixo}{i}', transacoes, semente=semente, ate=ate, dias=dias, senha_hash=senha_hash)
+        for i in range(1, usuarios + 1)
+    ]
@@ -0,0 +1,220 @@
+"""
+Arquivos estáticos e páginas HTML do front no modo de produção
+(GA_ESTATICOS=producao).
+
+- EstaticosComprimidos: o collectstatic grava os CSS/JS com o hash do
+  conteúdo no nome (dashboard.3f2a9c1b.css, manifesto em staticfiles.json)
+  e, ao lado de cada um, as versões .zst e .gz já comprimidas no nível
+  máximo. O {% static %} dos templates passa a apontar para os nomes com
+  hash.
+- servir_estatico: entrega os arquivos do STATIC_ROOT escolhendo a versão
+  comprimida pelo Accept-Encoding (sem comprimir nada na hora). Nome com
+  hash muda quando o conteúdo muda, então vai com cache imutável de um ano.
+  Quando o servidor na frente já serve /static/ (mapeamento do
+  PythonAnywhere, nginx), esta view nem é chamada.
+- PaginaView: as páginas não dependem do usuário (o front se autentica
+  pelo JWT no JavaScript), então cada uma é renderizada uma vez por
+  processo e guardada na memória com ETag e as versões comprimidas. A
+  visita repetida recebe um 304 sem corpo.
+
+Fora do modo de produção os arquivos saem com os nomes originais e as
+páginas são renderizadas a cada requisição (a edição do template aparece
+na hora), mas com ETag do mesmo jeito. Nesse modo a página não é
+comprimida no nível máximo a cada requisição: sai sem compressão e o
+CompressaoMiddleware a comprime no nível das respostas da API.
+"""
+
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.template.loader import render_to_string
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags
+from django.views import View
+from django.views.static import was_modified_since
+
+from .compressao import CODIFICACOES, comprimir_estatico, escolher_codificacao
+
+logger = logging.getLogger(__name__)
+
+EXTENSOES = {'zstd': '.zst', 'gzip': '.gz'}
+
+# Arquivos que vale comprimir (imagens e fontes já vêm comprimidas)
+COMPRIMIVEIS = ('.css', '.js', '.mjs', '.map', '.json', '.svg', '.html', '.txt', '.xml')
+
+CACHE_IMUTAVEL = 'public, max-age=31536000, immutable'
+# Sem hash no nome: o navegador confere a cada uso (If-Modified-Since / If-None-Match)
+CACHE_REVALIDAR = 'no-cache'
+
+
+# ============================================
+# COLLECTSTATIC: NOMES COM HASH + .zst/.gz
+# ============================================
+
+class EstaticosComprimidos(ManifestStaticFilesStorage):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._nao_encontrados = set()
+
+    def url(self, name, force=False):
+        # O Manifest volta aos nomes sem hash com DEBUG=True; aqui o modo de
+        # produção é o GA_ESTATICOS, que vale com qualquer DEBUG
+        return super().url(name, force=True)
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            if content is not None:
+                raise
+            # url() no CSS para arquivo que não existe (ex.: Background.png do
+            # style.css): a referência fica como está em vez de derrubar o collectstatic
+            if name not in self._nao_encontrados:
+                self._nao_encontrados.add(name)
+                logger.warning('Arquivo estático referenciado não encontrado: %s', name)
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Só os nomes finais (os intermediários das passadas do CSS não são usados)
+        for nome in sorted(set(self.hashed_files.values())):
+            if nome.lower().endswith(COMPRIMIVEIS):
+                self._gravar_comprimidos(nome)
+
+    def _gravar_comprimidos(self, nome):
+        with self.open(nome) as arquivo:
+            dados = arquivo.read()
+        for codificacao in CODIFICACOES:
+            comprimido = comprimir_estatico(dados, codificacao)
+            caminho = self.path(nome + EXTENSOES[codificacao])
+            if len(comprimido) >= len(dados):
+                # Ficou maior: sem versão comprimida (e remove a de uma coleta anterior)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+                continue
+            with open(caminho, 'wb') as destino:
+                destino.write(comprimido)
+
+
+# ============================================
+# ENTREGA DOS ARQUIVOS
+# ============================================
+
+def _nomes_com_hash():
+    return set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+
+def servir_estatico(request, caminho):
+    try:
+        original = staticfiles_storage.path(caminho)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(original):
+        raise Http404
+
+    estado = os.stat(original)
+    imutavel = caminho in _nomes_com_hash()
+    if not imutavel and not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), estado.st_mtime):
+        resposta = HttpResponseNotModified()
+        resposta.headers['Cache-Control'] = CACHE_REVALIDAR
+        return resposta
+
+    arquivo, codificacao = original, None
+    if caminho.lower().endswith(COMPRIMIVEIS):
+        preferida = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if preferida and os.path.isfile(original + EXTENSOES[preferida]):
+            arquivo, codificacao = original + EXTENSOES[preferida], preferida
+
+    tipo, _ = mimetypes.guess_type(caminho)
+    resposta = FileResponse(open(arquivo, 'rb'), content_type=tipo or 'application/octet-stream')
+    if codificacao:
+        resposta.headers['Content-Encoding'] = codificacao
+    if caminho.lower().endswith(COMPRIMIVEIS):
+        patch_vary_headers(resposta, ('Accept-Encoding',))
+    resposta.headers['Last-Modified'] = http_date(estado.st_mtime)
+    resposta.headers['Cache-Control'] = CACHE_IMUTAVEL if imutavel else CACHE_REVALIDAR
+    return resposta
+
+
+# ============================================
+# PÁGINAS HTML EM CACHE
+# ============================================
+
+@dataclass
+class Pagina:
+    conteudo: bytes
+    etag: str
+    comprimidas: dict = field(default_factory=dict)
+
+    @classmethod
+    def renderizar(cls, template_name, comprimir=True):
+        conteudo = render_to_string(template_name).encode()
+        pagina = cls(conteudo, '"%s"' % hashlib.sha256(conteudo).hexdigest()[:32])
+        if not comprimir:
+            return pagina
+        for codificacao in CODIFICACOES:
+            comprimido = comprimir_estatico(conteudo, codificacao)
+            if len(comprimido) < len(conteudo):
+                pagina.comprimidas[codificacao] = comprimido
+        return pagina
+
+    def etag_de(self, codificacao):
+        # Cada representação tem a sua ETag forte (RFC 9110, 8.8.3)
+        return self.etag if codificacao is None else '%s-%s"' % (self.etag[:-1], codificacao)
+
+
+_paginas = {}
+
+
+def pagina_em_cache(template_name):
+    if not settings.ESTATICOS_PRODUCAO:
+        # Renderizada a cada requisição: o nível máximo custaria mais que a própria página
+        return Pagina.renderizar(template_name, comprimir=False)
+    pagina = _paginas.get(template_name)
+    if pagina is None:
+        # Duas threads podem renderizar a mesma página na primeira vez; o resultado é igual
+        pagina = _paginas[template_name] = Pagina.renderizar(template_name)
+    return pagina
+
+
+def limpar_paginas():
+    _paginas.clear()
+
+
+class PaginaView(View):
+    """Substitui o TemplateView das páginas do front (ga_financas_backend/urls.py)."""
+
+    template_name = None
+    http_method_names = ['get', 'head']
+
+    def get(self, request, *args, **kwargs):
+        pagina = pagina_em_cache(self.template_name)
+        codificacao = escolher_codificacao(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacao not in pagina.comprimidas:
+            codificacao = None
+        etag = pagina.etag_de(codificacao)
+
+        # Comparação fraca: a ETag que o CompressaoMiddleware devolve vem com W/
+        recebidas = parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))
+        recebidas = {recebida.removeprefix('W/') for recebida in recebidas}
+        if etag in recebidas or '*' in recebidas:
+            resposta = HttpResponseNotModified()
+        else:
+            corpo = pagina.comprimidas[codificacao] if codificacao else pagina.conteudo
+            resposta = HttpResponse(corpo, content_type='text/html; charset=utf-8')
+            if codificacao:
+                resposta.headers['Content-Encoding'] = codificacao
+        resposta.headers['ETag'] = etag
+        resposta.headers['Cache-Control'] = CACHE_REVALIDAR
+        patch_vary_headers(resposta, ('Accept-Encoding',))
+        return resposta
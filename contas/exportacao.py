@@ -0,0 +1,122 @@
+"""
+Exportação das transações em fluxo (CSV ou NDJSON), opcionalmente
+comprimida com zstd.
+
+As linhas são lidas com .iterator() em blocos e escritas aos poucos na
+StreamingHttpResponse, então a memória usada é a mesma para 1 mil ou
+10 milhões de transações.
+
+Quando a requisição chega pelo ASGI, o corpo é um iterador assíncrono
+(blocos lidos com sync_to_async): um iterador síncrono ali seria juntado
+inteiro na memória pelo Django (sync_to_async(list)) antes do 1º byte.
+"""
+
+import csv
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .compressao import acomprimir_fluxo, comprimir_fluxo
+
+# Linhas lidas do banco por vez e linhas agrupadas em cada pedaço enviado
+TAMANHO_BLOCO = 2000
+LINHAS_POR_PEDACO = 500
+
+CAMPOS = ['id', 'data', 'descricao', 'valor', 'tipo', 'categoria__nome', 'observacao', 'criada_em']
+CABECALHO = ['id', 'data', 'descricao', 'valor', 'tipo', 'categoria', 'observacao', 'criada_em']
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+class _Eco:
+    """'Arquivo' que devolve o que recebe, para usar o csv.writer sem buffer."""
+
+    def write(self, valor):
+        return valor
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return str(valor)
+
+
+def linhas_csv(linhas, cabecalho=True):
+    escritor = csv.writer(_Eco())
+    if cabecalho:
+        yield escritor.writerow(CABECALHO)
+    for linha in linhas:
+        yield escritor.writerow([_texto(valor) for valor in linha])
+
+
+def linhas_ndjson(linhas, cabecalho=True):
+    for linha in linhas:
+        registro = dict(zip(CABECALHO, linha))
+        registro['data'] = _texto(registro['data'])
+        registro['valor'] = _texto(registro['valor'])
+        registro['criada_em'] = _texto(registro['criada_em'])
+        yield json.dumps(registro, ensure_ascii=False) + '\n'
+
+
+GERADORES = {'csv': linhas_csv, 'ndjson': linhas_ndjson}
+
+
+def _em_pedacos(textos):
+    """Junta várias linhas em cada pedaço enviado, em bytes."""
+    pedaco = []
+    for texto in textos:
+        pedaco.append(texto)
+        if len(pedaco) >= LINHAS_POR_PEDACO:
+            yield ''.join(pedaco).encode('utf-8')
+            pedaco = []
+    if pedaco:
+        yield ''.join(pedaco).encode('utf-8')
+
+
+def gerar_exportacao(queryset, formato, comprimir=False):
+    """
+    Gera os bytes da exportação do queryset de Transacao no formato pedido.
+    """
+    linhas = queryset.values_list(*CAMPOS).iterator(chunk_size=TAMANHO_BLOCO)
+    pedacos = _em_pedacos(GERADORES[formato](linhas))
+    if comprimir:
+        pedacos = comprimir_fluxo(pedacos, 'zstd')
+    return pedacos
+
+
+async def _aem_pedacos(queryset, formato):
+    """
+    Versão assíncrona do _em_pedacos. Cada bloco de linhas é lido numa
+    thread (sync_to_async): o aiterator() do Django 5.2 abre o cursor do
+    values_list() ainda no event loop e falha.
+    """
+    gerador = GERADORES[formato]
+    linhas = queryset.values_list(*CAMPOS).iterator(chunk_size=TAMANHO_BLOCO)
+    ler_bloco = sync_to_async(lambda: list(islice(linhas, TAMANHO_BLOCO)))
+    primeiro = True
+    while True:
+        bloco = await ler_bloco()
+        for inicio in range(0, len(bloco), LINHAS_POR_PEDACO):
+            yield ''.join(gerador(bloco[inicio:inicio + LINHAS_POR_PEDACO], cabecalho=primeiro)).encode('utf-8')
+            primeiro = False
+        if len(bloco) < TAMANHO_BLOCO:
+            break
+    if primeiro:
+        # Nenhuma linha: o CSV ainda leva o cabeçalho
+        texto = ''.join(gerador([], cabecalho=True))
+        if texto:
+            yield texto.encode('utf-8')
+
+
+def agerar_exportacao(queryset, formato, comprimir=False):
+    """Como o gerar_exportacao, mas devolve um iterador assíncrono (ASGI)."""
+    pedacos = _aem_pedacos(queryset, formato)
+    if comprimir:
+        pedacos = acomprimir_fluxo(pedacos, 'zstd')
+    return pedacos
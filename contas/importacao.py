@@ -0,0 +1,307 @@
+"""
+Importação em massa de extratos bancários (CSV e OFX) para Transacao.
+
+O arquivo é lido como fluxo, linha a linha, e as transações são gravadas
+em lotes de tamanho fixo (bulk_create) dentro de uma única transação do
+banco. Usado pela rota /api/transacoes/importar/ e pelo comando
+`python manage.py importar_extrato`.
+"""
+
+import csv
+import io
+import itertools
+import re
+import unicodedata
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Categoria, Transacao, ResumoMensal, UserProfile, acumular_delta, inicio_do_mes
+
+TAMANHO_LOTE = 1000
+
+# Linhas por INSERT do bulk_create (o SQLite limita os parâmetros por comando)
+LINHAS_POR_INSERT = 500
+
+# Só os primeiros erros são detalhados; o total continua sendo contado
+LIMITE_ERROS_DETALHADOS = 100
+
+FORMATOS = ('csv', 'ofx')
+
+CENTAVO = Decimal('0.01')
+VALOR_MAXIMO = Decimal('1e8')  # max_digits=10, decimal_places=2
+
+
+class ErroImportacao(ValueError):
+    """Linha do extrato que não pôde ser convertida em Transacao."""
+
+
+# ============================================
+# UTILITÁRIOS DE CONVERSÃO
+# ============================================
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, para comparar nomes de categoria e regras."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).strip().lower()
+
+
+_VALOR = re.compile(r'([+-]?)([\d.,]+)')
+
+
+def _sem_milhar(inteiro, separador, texto):
+    """'1.234.567' -> '1234567'; agrupamento fora do padrão de 3 dígitos é erro."""
+    grupos = inteiro.split(separador)
+    if len(grupos) > 1 and not (1 <= len(grupos[0]) <= 3 and all(len(grupo) == 3 for grupo in grupos[1:])):
+        raise ErroImportacao(f'Separadores ambíguos no valor: {texto!r}')
+    return ''.join(grupos)
+
+
+def converter_valor(texto):
+    """
+    Aceita '1234.56', '1.234,56', '1,234.56', '-50,00' e 'R$ 10,00'.
+
+    Com os dois separadores, o último é o decimal. Com um só, ele é decimal
+    se aparece uma vez e de milhar se aparece mais. Nada é arredondado:
+    mais de 2 casas decimais ('1.234' pode ser mil duzentos e trinta e
+    quatro) é erro, assim como NaN, Infinity e notação científica.
+    """
+    texto = (texto or '').replace('R$', '').replace(' ', '').strip()
+    encontrado = _VALOR.fullmatch(texto)
+    if not encontrado or not any(c.isdigit() for c in texto):
+        raise ErroImportacao(f'Valor inválido: {texto!r}')
+    sinal, numero = encontrado.groups()
+
+    separadores = [c for c in numero if c in '.,']
+    if len(set(separadores)) == 2:
+        decimal = separadores[-1]
+        if separadores.count(decimal) > 1:
+            raise ErroImportacao(f'Separadores ambíguos no valor: {texto!r}')
+    elif len(separadores) == 1:
+        decimal = separadores[0]
+    else:
+        decimal = None  # Nenhum separador, ou o mesmo repetido (milhar)
+
+    inteiro, fracao = numero.rsplit(decimal, 1) if decimal else (numero, '')
+    if len(fracao) > 2:
+        raise ErroImportacao(f'Mais de 2 casas decimais no valor: {texto!r}')
+    if decimal:
+        milhar = '.' if decimal == ',' else ','
+    else:
+        milhar = separadores[0] if separadores else ','
+    inteiro = _sem_milhar(inteiro, milhar, texto)
+    if not (inteiro + fracao).isdigit():
+        raise ErroImportacao(f'Separadores ambíguos no valor: {texto!r}')
+
+    try:
+        valor = Decimal(f'{sinal}{inteiro or 0}.{fracao or 0}')
+    except InvalidOperation:
+        raise ErroImportacao(f'Valor inválido: {texto!r}')
+    if not valor.is_finite():
+        raise ErroImportacao(f'Valor inválido: {texto!r}')
+    return valor
+
+
+def converter_data(texto):
+    """Aceita 'AAAA-MM-DD', 'DD/MM/AAAA' e o formato do OFX ('AAAAMMDD...')."""
+    texto = (texto or '').strip()
+    try:
+        if len(texto) >= 10 and texto[4] == '-':
+            return date(int(texto[:4]), int(texto[5:7]), int(texto[8:10]))
+        if len(texto) >= 10 and texto[2] == '/':
+            return date(int(texto[6:10]), int(texto[3:5]), int(texto[:2]))
+        if len(texto) >= 8 and texto[:8].isdigit():
+            return date(int(texto[:4]), int(texto[4:6]), int(texto[6:8]))
+    except ValueError:
+        pass
+    raise ErroImportacao(f'Data inválida: {texto!r}')
+
+
+# ============================================
+# LEITORES (CADA UM GERA (numero_da_linha, dict))
+# ============================================
+
+def ler_csv(texto):
+    """
+    Lê um CSV com cabeçalho. Colunas: data, descricao, valor e, opcionais,
+    tipo, categoria e observacao. O separador (';' ou ',') vem do cabeçalho.
+    """
+    cabecalho = next(texto, '')
+    separador = ';' if cabecalho.count(';') > cabecalho.count(',') else ','
+    leitor = csv.DictReader(itertools.chain([cabecalho], texto), delimiter=separador)
+    leitor.fieldnames = [normalizar(nome) for nome in leitor.fieldnames or []]
+
+    for linha in leitor:
+        yield leitor.line_num, linha
+
+
+_OFX_TAG = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def ler_ofx(texto):
+    """
+    Lê os blocos <STMTTRN> de um OFX (SGML 1.x ou XML 2.x) sem carregar o
+    arquivo inteiro: guarda apenas o bloco da transação atual.
+    """
+    bloco = None
+    inicio = 0
+    for numero, linha in enumerate(texto, start=1):
+        for tag, valor in _OFX_TAG.findall(linha):
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                bloco, inicio = {}, numero
+            elif bloco is not None:
+                bloco[tag] = valor.strip()
+        if bloco is not None and '</STMTTRN>' in linha.upper():
+            yield inicio, {
+                'data': bloco.get('DTPOSTED', ''),
+                'descricao': bloco.get('MEMO') or bloco.get('NAME', ''),
+                'valor': bloco.get('TRNAMT', ''),
+                'observacao': bloco.get('FITID', ''),
+            }
+            bloco = None
+
+
+LEITORES = {'csv': ler_csv, 'ofx': ler_ofx}
+
+
+# ============================================
+# IMPORTAÇÃO
+# ============================================
+
+class MapaCategorias:
+    """
+    Resolve a categoria de cada linha: primeiro pelo nome informado na
+    linha, depois pelas regras {trecho da descrição: nome da categoria}.
+    """
+
+    def __init__(self, user, regras=None):
+        self.por_nome = {normalizar(c.nome): c.id for c in Categoria.objects.filter(user=user)}
+        self.regras = []
+        for trecho, nome in (regras or {}).items():
+            categoria_id = self.por_nome.get(normalizar(nome))
+            if categoria_id is None:
+                raise ErroImportacao(f'Categoria da regra não encontrada: {nome!r}')
+            self.regras.append((normalizar(trecho), categoria_id))
+
+    def resolver(self, nome, descricao):
+        if nome:
+            categoria_id = self.por_nome.get(normalizar(nome))
+            if categoria_id is None:
+                raise ErroImportacao(f'Categoria não encontrada: {nome!r}')
+            return categoria_id
+        descricao = normalizar(descricao)
+        for trecho, categoria_id in self.regras:
+            if trecho in descricao:
+                return categoria_id
+        return None
+
+
+def montar_transacao(user_id, linha, categorias):
+    """Converte a linha do extrato na tupla (user_id, descricao, valor, tipo, categoria_id, data, observacao)."""
+    descricao = (linha.get('descricao') or '').strip()
+    if not descricao:
+        raise ErroImportacao('Descrição vazia.')
+
+    valor = converter_valor(linha.get('valor'))
+    tipo = normalizar(linha.get('tipo'))
+    if not tipo:
+        # Extratos costumam indicar a saída com valor negativo
+        tipo = 'despesa' if valor < 0 else 'receita'
+    elif tipo not in ('receita', 'despesa'):
+        raise ErroImportacao(f'Tipo inválido: {tipo!r}')
+
+    valor = abs(valor).quantize(CENTAVO)
+    if valor >= VALOR_MAXIMO:
+        raise ErroImportacao(f'Valor fora do limite: {valor}')
+
+    return (
+        user_id,
+        descricao[:200],
+        valor,
+        tipo,
+        categorias.resolver(linha.get('categoria'), descricao),
+        converter_data(linha.get('data')),
+        (linha.get('observacao') or '').strip() or None,
+    )
+
+
+def gravar_lote(lote):
+    """
+    Grava o lote (tuplas de montar_transacao) com bulk_create, em INSERTs
+    de até LINHAS_POR_INSERT linhas. Como nada passa pelo Transacao.save,
+    o ResumoMensal é atualizado em seguida.
+    Também usado pelo gerador de dados sintéticos (dados_sinteticos.py).
+    """
+    deltas = {}
+    transacoes = []
+    for user_id, descricao, valor, tipo, categoria_id, data, observacao in lote:
+        acumular_delta(deltas, (user_id, inicio_do_mes(data), categoria_id, tipo), valor, 1)
+        transacoes.append(Transacao(
+            user_id=user_id, descricao=descricao, valor=valor, tipo=tipo,
+            categoria_id=categoria_id, data=data, observacao=observacao,
+        ))
+
+    Transacao.objects.bulk_create(transacoes, batch_size=LINHAS_POR_INSERT)
+    ResumoMensal.aplicar_deltas(deltas)
+
+
+def importar_extrato(user, arquivo, formato, regras=None, codificacao='utf-8-sig', tamanho_lote=TAMANHO_LOTE):
+    """
+    Importa o arquivo (binário) para as transações do usuário.
+
+    Linhas inválidas são puladas e reportadas; as válidas são gravadas.
+    Retorna {'importadas', 'com_erro', 'erros': [{'linha', 'erro'}]}.
+    Bytes que não estão na `codificacao` recusam o arquivo inteiro
+    (ErroImportacao), em vez de entrarem trocados por '\ufffd'.
+    """
+    if formato not in LEITORES:
+        raise ErroImportacao(f'Formato não suportado: {formato!r}. Use csv ou ofx.')
+
+    categorias = MapaCategorias(user, regras)
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, errors='strict', newline='')
+    resultado = {'importadas': 0, 'com_erro': 0, 'erros': []}
+    lote = []
+    numero = 0
+
+    try:
+        with transaction.atomic():
+            try:
+                for numero, linha in LEITORES[formato](texto):
+                    try:
+                        lote.append(montar_transacao(user.pk, linha, categorias))
+                    except ErroImportacao as erro:
+                        resultado['com_erro'] += 1
+                        if len(resultado['erros']) < LIMITE_ERROS_DETALHADOS:
+                            resultado['erros'].append({'linha': numero, 'erro': str(erro)})
+                        continue
+
+                    if len(lote) >= tamanho_lote:
+                        gravar_lote(lote)
+                        resultado['importadas'] += len(lote)
+                        lote = []
+            except UnicodeDecodeError:
+                # O TextIOWrapper decodifica em blocos: a linha exata não se sabe
+                raise ErroImportacao(
+                    f'O arquivo não está em {codificacao}: byte inválido depois da linha {numero}. '
+                    'Informe a codificação (ex.: latin-1).'
+                )
+
+            if lote:
+                gravar_lote(lote)
+                resultado['importadas'] += len(lote)
+
+            if resultado['importadas']:
+                # O bulk_create não dispara signals: uma única mudança de versão
+                UserProfile.incrementar_versao(user.pk)
+    finally:
+        # Não deixa o TextIOWrapper fechar o arquivo de quem chamou
+        texto.detach()
+
+    return resultado
+
+
+def detectar_formato(nome_arquivo):
+    extensao = (nome_arquivo or '').rsplit('.', 1)[-1].lower()
+    return extensao if extensao in FORMATOS else None
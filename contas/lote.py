@@ -0,0 +1,216 @@
+"""
+Escrita em lote de transações (/api/transacoes/lote/).
+
+Recebe uma lista de operações (criar, atualizar, excluir), valida tudo
+junto e aplica numa única transação do banco, com bulk_create, bulk_update
+e um DELETE só. Tudo ou nada: se qualquer item for inválido, nada é gravado
+e a resposta traz o erro de cada item.
+
+As consultas não crescem com o tamanho do lote: uma para conferir as
+categorias, uma para carregar (e travar) as transações alteradas e os
+INSERT/UPDATE/DELETE em massa. Como nada passa pelo Transacao.save nem pelos signals, o
+ResumoMensal recebe os deltas, as exclusões ganham suas marcas (Exclusao)
+e a versão dos dados sobe uma vez ao final.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Categoria, Exclusao, ResumoMensal, Transacao, UserProfile, acumular_delta, apagar_transacoes
+from .serializers import TransacaoLoteSerializer
+
+MAXIMO_OPERACOES = 1000
+
+# Maior id de um BigAutoField: acima disso o banco recusaria o parâmetro
+MAIOR_ID = 2 ** 63 - 1
+
+ACOES = ('criar', 'atualizar', 'excluir')
+
+# Status de cada item na resposta
+STATUS_SUCESSO = {'criar': 201, 'atualizar': 200, 'excluir': 204}
+STATUS_INVALIDO = 400
+STATUS_NAO_ENCONTRADO = 404
+STATUS_NAO_APLICADO = 424  # Item válido, mas o lote foi recusado por outro item
+
+
+class ErroLote(ValueError):
+    """Lote recusado. `resultados` traz o status (e os erros) de cada item, se houver."""
+
+    def __init__(self, mensagem, resultados=None):
+        super().__init__(mensagem)
+        self.resultados = resultados
+
+
+def _erro(erros, indice, campo, mensagem):
+    erros[indice] = {campo: [mensagem]}
+
+
+def _conferir_estrutura(operacoes, erros):
+    """Separa os índices por ação e confere 'acao' e 'id' de cada item."""
+    por_acao = {acao: [] for acao in ACOES}
+    ids_vistos = set()
+    for indice, operacao in enumerate(operacoes):
+        if not isinstance(operacao, dict):
+            _erro(erros, indice, 'non_field_errors', 'Cada operação deve ser um objeto.')
+            continue
+
+        acao = operacao.get('acao')
+        if acao not in ACOES:
+            _erro(erros, indice, 'acao', 'Use criar, atualizar ou excluir.')
+            continue
+
+        if acao != 'criar':
+            pk = operacao.get('id')
+            if isinstance(pk, bool) or not isinstance(pk, int):
+                _erro(erros, indice, 'id', 'Informe o id (inteiro) da transação.')
+                continue
+            if not 0 < pk <= MAIOR_ID:
+                _erro(erros, indice, 'id', 'Id fora do intervalo válido.')
+                continue
+            if pk in ids_vistos:
+                _erro(erros, indice, 'id', 'Transação repetida no lote.')
+                continue
+            ids_vistos.add(pk)
+
+        if acao != 'excluir' and not isinstance(operacao.get('dados'), dict):
+            _erro(erros, indice, 'dados', 'Informe os campos da transação em "dados".')
+            continue
+
+        por_acao[acao].append(indice)
+    return por_acao
+
+
+def _validar_campos(operacoes, indices, erros, parcial):
+    """Valida os 'dados' dos itens com um único ListSerializer. Devolve {indice: dados validados}."""
+    if not indices:
+        return {}
+    serializer = TransacaoLoteSerializer(
+        data=[operacoes[i]['dados'] for i in indices], many=True, partial=parcial
+    )
+    if serializer.is_valid():
+        return dict(zip(indices, serializer.validated_data))
+
+    validos = {}
+    for indice, erro in zip(indices, serializer.errors):
+        if erro:
+            erros[indice] = erro
+        else:
+            # O ListSerializer não devolve validated_data quando algum item falha
+            validos[indice] = None
+    return validos
+
+
+def _conferir_categorias(user, validados, erros):
+    ids = {dados['categoria'] for dados in validados.values() if dados and dados.get('categoria')}
+    if not ids:
+        return
+    do_usuario = set(Categoria.objects.filter(user=user, id__in=ids).values_list('id', flat=True))
+    for indice, dados in validados.items():
+        categoria = dados and dados.get('categoria')
+        if categoria and categoria not in do_usuario:
+            _erro(erros, indice, 'categoria', f'Categoria {categoria} não encontrada.')
+
+
+def _resultados_com_erro(operacoes, erros, status_erro):
+    resultados = []
+    for indice, operacao in enumerate(operacoes):
+        resultado = {
+            'acao': operacao.get('acao') if isinstance(operacao, dict) else None,
+            'id': operacao.get('id') if isinstance(operacao, dict) else None,
+        }
+        if erros[indice]:
+            resultado['status'] = status_erro.get(indice, STATUS_INVALIDO)
+            resultado['erros'] = erros[indice]
+        else:
+            resultado['status'] = STATUS_NAO_APLICADO
+        resultados.append(resultado)
+    return resultados
+
+
+def aplicar_lote(user, operacoes):
+    """
+    Valida e aplica as operações do usuário. Devolve a lista de resultados
+    ({'acao', 'id', 'status'}) na ordem recebida; lança ErroLote se o lote
+    for recusado.
+    """
+    if not isinstance(operacoes, list) or not operacoes:
+        raise ErroLote('Envie "operacoes" com uma lista de operações.')
+    if len(operacoes) > MAXIMO_OPERACOES:
+        raise ErroLote(f'No máximo {MAXIMO_OPERACOES} operações por lote.')
+
+    erros = [None] * len(operacoes)
+    status_erro = {}
+    por_acao = _conferir_estrutura(operacoes, erros)
+
+    novos = _validar_campos(operacoes, por_acao['criar'], erros, parcial=False)
+    alterados = _validar_campos(operacoes, por_acao['atualizar'], erros, parcial=True)
+    _conferir_categorias(user, {**novos, **alterados}, erros)
+
+    with transaction.atomic():
+        # Leitura e deltas dentro da transação, com as linhas travadas: uma
+        # edição ou exclusão concorrente espera, em vez de desencontrar o resumo
+        alvos = por_acao['atualizar'] + por_acao['excluir']
+        existentes = Transacao.objects.select_for_update().filter(
+            user=user, pk__in=[operacoes[i]['id'] for i in alvos]
+        ).in_bulk()
+        for indice in alvos:
+            if operacoes[indice]['id'] not in existentes:
+                erros[indice] = {'id': ['Transação não encontrada.']}
+                status_erro[indice] = STATUS_NAO_ENCONTRADO
+
+        if any(erros):
+            resultados = _resultados_com_erro(operacoes, erros, status_erro)
+            raise ErroLote('Nenhuma operação foi aplicada: corrija os itens com erro.', resultados)
+
+        deltas = {}
+        criar = []
+        for indice in por_acao['criar']:
+            dados = dict(novos[indice])
+            transacao = Transacao(user=user, categoria_id=dados.pop('categoria', None), **dados)
+            acumular_delta(deltas, *transacao.chave_resumo(), 1)
+            criar.append((indice, transacao))
+
+        agora = timezone.now()
+        atualizar = []
+        # bulk_update não aplica o auto_now
+        campos = {'atualizada_em'}
+        for indice in por_acao['atualizar']:
+            transacao = existentes[operacoes[indice]['id']]
+            chave, valor = transacao.chave_resumo()
+            acumular_delta(deltas, chave, -valor, -1)
+            for campo, valor in alterados[indice].items():
+                setattr(transacao, 'categoria_id' if campo == 'categoria' else campo, valor)
+                campos.add(campo)
+            transacao.atualizada_em = agora
+            acumular_delta(deltas, *transacao.chave_resumo(), 1)
+            atualizar.append(transacao)
+
+        excluir = []
+        for indice in por_acao['excluir']:
+            transacao = existentes[operacoes[indice]['id']]
+            chave, valor = transacao.chave_resumo()
+            acumular_delta(deltas, chave, -valor, -1)
+            excluir.append(transacao.pk)
+
+        if criar:
+            Transacao.objects.bulk_create([t for _, t in criar])
+        if atualizar:
+            Transacao.objects.bulk_update(atualizar, sorted(campos))
+        if excluir:
+            # Sem os signals de cada linha: o resumo já está nos deltas e as marcas vão abaixo
+            apagar_transacoes(user.pk, excluir)
+            Exclusao.objects.bulk_create([
+                Exclusao(user=user, modelo='transacao', objeto_id=pk, excluida_em=agora) for pk in excluir
+            ])
+        ResumoMensal.aplicar_deltas(deltas)
+        UserProfile.incrementar_versao(user.pk)
+
+    ids_criados = {indice: t.pk for indice, t in criar}
+    return [
+        {
+            'acao': operacao['acao'],
+            'id': ids_criados.get(indice, operacao.get('id')),
+            'status': STATUS_SUCESSO[operacao['acao']],
+        }
+        for indice, operacao in enumerate(operacoes)
+    ]
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from contas.arquivo import arquivar, inicio_do_horizonte, restaurar
+from contas.models import ArquivoTransacoes
+
+
+class Command(BaseCommand):
+    help = (
+        'Guarda em segmentos comprimidos (um por usuário e ano) as transações mais antigas que '
+        'ARQUIVO_HORIZONTE_MESES. Os totais não mudam; pedir o período restaura o ano.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=settings.ARQUIVO_HORIZONTE_MESES,
+            help='Padrão: ARQUIVO_HORIZONTE_MESES.'
+        )
+        parser.add_argument('--usuario', type=int, help='Processa apenas o usuário com este id.')
+        parser.add_argument(
+            '--restaurar', action='store_true',
+            help='Faz o contrário: devolve para a tabela tudo o que está arquivado (do --usuario, se informado).'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        if options['restaurar']:
+            self.restaurar(options['usuario'])
+            return
+
+        usuarios = [options['usuario']] if options['usuario'] else None
+        total = arquivar(meses=options['meses'], usuarios=usuarios)
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['transacoes']} transações anteriores a {inicio_do_horizonte(meses=options['meses']):%d/%m/%Y} "
+            f"arquivadas de {total['usuarios']} usuários ({total['segmentos']} segmentos) em {duracao:.1f}s."
+        ))
+
+    def restaurar(self, usuario):
+        usuarios = ArquivoTransacoes.objects.order_by('user_id').values_list('user_id', flat=True).distinct()
+        if usuario:
+            usuarios = usuarios.filter(user_id=usuario)
+        restauradas = sum(restaurar(user_id) for user_id in list(usuarios))
+        self.stdout.write(self.style.SUCCESS(f'{restauradas} transações restauradas.'))
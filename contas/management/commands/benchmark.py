@@ -0,0 +1,419 @@
+import asyncio
+import importlib
+import json
+import math
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import clear_url_caches
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from rest_framework.renderers import JSONRenderer
+
+from contas import cache_respostas
+from contas.compressao import CODIFICACOES, comprimir
+from contas.dados_sinteticos import SENHA_PADRAO, criar_usuario
+from contas.models import Categoria
+from contas.renderers import JSONRapidoRenderer
+
+
+def percentil(ordenadas, p):
+    """Percentil pelo posto mais próximo (a lista já vem ordenada)."""
+    return ordenadas[max(0, math.ceil(p / 100 * len(ordenadas)) - 1)]
+
+
+def medir(funcao, repeticoes):
+    """
+    Executa funcao(i) repetidas vezes e devolve vazão, latência (média,
+    p50/p95/p99) e consultas por chamada. Se funcao devolve a resposta (a
+    lista de respostas ou o corpo já lido, em bytes), mede também o tamanho
+    médio dos corpos.
+    """
+    duracoes = []
+    consultas = 0
+    tamanhos = []
+    for i in range(repeticoes):
+        with CaptureQueriesContext(connection) as contexto:
+            inicio = time.perf_counter()
+            resposta = funcao(i)
+            duracoes.append(time.perf_counter() - inicio)
+        consultas += len(contexto.captured_queries)
+        if resposta is not None:
+            # Telas com várias chamadas devolvem a lista de respostas
+            respostas = resposta if isinstance(resposta, list) else [resposta]
+            tamanhos.append(sum(len(r) if isinstance(r, bytes) else len(r.content) for r in respostas))
+
+    total = sum(duracoes)
+    ordenadas = sorted(duracoes)
+    resultado = {
+        'repeticoes': repeticoes,
+        'req_por_segundo': round(repeticoes / total, 1),
+        'latencia_media_ms': round(total / repeticoes * 1000, 3),
+        'p50_ms': round(percentil(ordenadas, 50) * 1000, 3),
+        'p95_ms': round(percentil(ordenadas, 95) * 1000, 3),
+        'p99_ms': round(percentil(ordenadas, 99) * 1000, 3),
+        'consultas_por_req': round(consultas / repeticoes, 1),
+    }
+    if tamanhos:
+        resultado['bytes_por_resposta'] = round(sum(tamanhos) / len(tamanhos))
+    return resultado
+
+
+# ============================================
+# CENÁRIOS
+# ============================================
+
+def cenario_registro(opcoes):
+    """POST /api/register/ (cria usuário, perfil, categorias e metas padrão)."""
+    repeticoes = opcoes['repeticoes']
+    client = APIClient()
+
+    def registrar(i):
+        response = client.post('/api/register/', {'username': f'bench{i}', 'password': 'senha-bench-123'})
+        assert response.status_code == 201, response.content
+        return response
+
+    return medir(registrar, repeticoes)
+
+
+# Leituras feitas pelo front ao abrir as páginas (dashboard, receitas, perfil)
+ROTAS_LEITURA = [
+    '/api/transacoes/?paginacao=cursor&tipo=receita',
+    '/api/transacoes/estatisticas/',
+    '/api/categorias/',
+    '/api/metas/',
+    '/api/users/me/',
+]
+
+
+@contextmanager
+def _rotas(assincronas):
+    """Recarrega o urls.py com API_ASSINCRONA ligado ou desligado."""
+    modulo = importlib.import_module(settings.ROOT_URLCONF)
+    try:
+        with override_settings(API_ASSINCRONA=assincronas):
+            clear_url_caches()
+            importlib.reload(modulo)
+            yield
+    finally:
+        clear_url_caches()
+        importlib.reload(modulo)
+
+
+def _cabecalhos(user):
+    return {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+def _resumir(duracoes, total):
+    return {
+        'requisicoes': len(duracoes),
+        'req_por_segundo': round(len(duracoes) / total, 1),
+        'latencia_media_ms': round(sum(duracoes) / len(duracoes) * 1000, 3),
+    }
+
+
+def _wsgi(cabecalhos, clientes, cargas):
+    """Cada cliente é uma thread, como num servidor WSGI com `clientes` threads."""
+    def cliente(_):
+        client = Client(headers=cabecalhos)
+        duracoes = []
+        for _ in range(cargas):
+            for url in ROTAS_LEITURA:
+                inicio = time.perf_counter()
+                response = client.get(url)
+                duracoes.append(time.perf_counter() - inicio)
+                assert response.status_code == 200, response.content
+        return duracoes
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clientes) as executor:
+        duracoes = [d for lista in executor.map(cliente, range(clientes)) for d in lista]
+    return _resumir(duracoes, time.perf_counter() - inicio)
+
+
+def _asgi(cabecalhos, clientes, cargas):
+    """Todos os clientes concorrem no mesmo event loop, como num worker ASGI."""
+    async def cliente():
+        client = AsyncClient(headers=cabecalhos)
+        duracoes = []
+        for _ in range(cargas):
+            for url in ROTAS_LEITURA:
+                inicio = time.perf_counter()
+                response = await client.get(url, headers=cabecalhos)
+                duracoes.append(time.perf_counter() - inicio)
+                assert response.status_code == 200, response.content
+        return duracoes
+
+    async def todos():
+        return await asyncio.gather(*(cliente() for _ in range(clientes)))
+
+    inicio = time.perf_counter()
+    duracoes = [d for lista in asyncio.run(todos()) for d in lista]
+    return _resumir(duracoes, time.perf_counter() - inicio)
+
+
+def cenario_concorrencia(opcoes):
+    """
+    `clientes` usuários simultâneos abrindo as páginas do front (ROTAS_LEITURA),
+    `repeticoes` carregamentos no total. Compara WSGI (threads), ASGI com as
+    views síncronas do DRF e ASGI com as leituras de contas/views_async.py.
+    """
+    clientes = opcoes['clientes']
+    cargas = max(1, opcoes['repeticoes'] // clientes)
+    cabecalhos = _cabecalhos(criar_usuario('bench_concorrencia', 300, semente=opcoes['semente']))
+
+    resultado = {'clientes': clientes}
+    with _rotas(assincronas=False):
+        resultado['wsgi'] = _wsgi(cabecalhos, clientes, cargas)
+        resultado['asgi_sync'] = _asgi(cabecalhos, clientes, cargas)
+    with _rotas(assincronas=True):
+        resultado['asgi_async'] = _asgi(cabecalhos, clientes, cargas)
+    return resultado
+
+
+def _telas_do_front(user):
+    """Fluxo -> funcao(i) com as mesmas chamadas que static/JS faz em cada tela."""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=_cabecalhos(user)['Authorization'])
+    anonimo = APIClient()
+    categoria = Categoria.objects.filter(user=user, tipo='receita').first()
+    criadas = []
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        return response
+
+    def login(i):
+        response = anonimo.post('/api/login/', {'username': user.username, 'password': SENHA_PADRAO}, format='json')
+        assert response.status_code == 200, response.content
+        return response
+
+    def dashboard(i):
+        # dashboard.js
+        return [get('/api/transacoes/dashboard/'), get('/api/users/me/')]
+
+    def receitas(i):
+        # receitas.js ao abrir a página
+        return [
+            get('/api/transacoes/estatisticas/'),
+            get('/api/categorias/'),
+            get('/api/transacoes/?tipo=receita&paginacao=cursor'),
+        ]
+
+    def estatisticas(i):
+        return get('/api/transacoes/estatisticas/')
+
+    def criar(i):
+        response = client.post('/api/transacoes/', {
+            'descricao': f'Bench {i}', 'valor': '123.45', 'tipo': 'receita',
+            'categoria': categoria.id, 'data': date.today().isoformat(),
+        }, format='json')
+        assert response.status_code == 201, response.content
+        criadas.append(response.data['id'])
+        return response
+
+    def atualizar(i):
+        response = client.put(f'/api/transacoes/{criadas[i % len(criadas)]}/', {
+            'descricao': f'Bench {i} editada', 'valor': '99.90', 'tipo': 'receita',
+            'categoria': categoria.id, 'data': date.today().isoformat(),
+        }, format='json')
+        assert response.status_code == 200, response.content
+        return response
+
+    def excluir(i):
+        response = client.delete(f'/api/transacoes/{criadas.pop()}/')
+        assert response.status_code == 204, response.content
+        return response
+
+    # Ordem importa: atualizar e excluir usam as transações de criar
+    return {
+        'login': login,
+        'dashboard': dashboard,
+        'receitas': receitas,
+        'estatisticas': estatisticas,
+        'criar': criar,
+        'atualizar': atualizar,
+        'excluir': excluir,
+    }
+
+
+def cenario_frontend(opcoes):
+    """
+    As telas do front para usuários com cada quantidade de transações em
+    `tamanhos` (dados de dados_sinteticos, mesma semente). Em dashboard e
+    receitas cada repetição é a tela inteira (várias chamadas): latência,
+    consultas e bytes somam todas.
+    """
+    resultado = {}
+    for tamanho in opcoes['tamanhos']:
+        user = criar_usuario(f'bench_front_{tamanho}', tamanho, semente=opcoes['semente'])
+        resultado[str(tamanho)] = {
+            fluxo: medir(funcao, opcoes['repeticoes'])
+            for fluxo, funcao in _telas_do_front(user).items()
+        }
+    return resultado
+
+
+def _cronometrar(funcao, repeticoes):
+    """Milissegundos por chamada de funcao() (só CPU do processo, sem banco)."""
+    inicio = time.process_time()
+    for _ in range(repeticoes):
+        resultado = funcao()
+    return round((time.process_time() - inicio) / repeticoes * 1000, 3), resultado
+
+
+def cenario_compressao(opcoes):
+    """
+    JSON e compressão numa página de 100 transações e na exportação completa
+    (CSV) de um usuário com o maior dos `tamanhos`:
+    - renderizacao: CPU e bytes do JSONRenderer do DRF x JSONRapidoRenderer;
+    - compressao: CPU e bytes de cada codificação sobre o mesmo corpo;
+    - requisicao: a requisição inteira com cada Accept-Encoding.
+    """
+    repeticoes = opcoes['repeticoes']
+    user = criar_usuario('bench_compressao', max(opcoes['tamanhos']), semente=opcoes['semente'])
+    client = APIClient()
+    client.force_authenticate(user)
+
+    pagina = client.get('/api/transacoes/')
+    assert pagina.status_code == 200, pagina.content
+    resultado = {'renderizacao': {}}
+    for nome, renderer in (('drf', JSONRenderer()), ('orjson', JSONRapidoRenderer())):
+        ms, corpo = _cronometrar(lambda: renderer.render(pagina.data), repeticoes)
+        resultado['renderizacao'][nome] = {'ms_por_pagina': ms, 'bytes': len(corpo)}
+
+    corpos = {
+        'pagina_100': pagina.content,
+        'exportacao': b''.join(client.get('/api/transacoes/exportar/').streaming_content),
+    }
+    for nome, corpo in corpos.items():
+        medidas = {'identity': {'bytes': len(corpo), 'ms': 0.0}}
+        # A exportação inteira é grande: menos repetições
+        vezes = repeticoes if nome == 'pagina_100' else max(1, repeticoes // 20)
+        for codificacao in CODIFICACOES:
+            ms, comprimido = _cronometrar(lambda: comprimir(corpo, codificacao), vezes)
+            medidas[codificacao] = {
+                'bytes': len(comprimido), 'ms': ms, 'razao': round(len(corpo) / len(comprimido), 1),
+            }
+        resultado[f'compressao_{nome}'] = medidas
+
+    def requisicao(url, codificacao):
+        def funcao(i):
+            response = client.get(url, HTTP_ACCEPT_ENCODING=codificacao)
+            assert response.status_code == 200, response.status_code
+            return b''.join(response.streaming_content) if response.streaming else response
+        return funcao
+
+    for nome, url, vezes in (
+        ('pagina_100', '/api/transacoes/', repeticoes),
+        ('exportacao', '/api/transacoes/exportar/', max(1, repeticoes // 20)),
+    ):
+        resultado[f'requisicao_{nome}'] = {
+            codificacao: medir(requisicao(url, codificacao), vezes)
+            for codificacao in ('identity',) + CODIFICACOES
+        }
+    return resultado
+
+
+CENARIOS = {
+    'registro': cenario_registro,
+    'concorrencia': cenario_concorrencia,
+    'frontend': cenario_frontend,
+    'compressao': cenario_compressao,
+}
+
+
+def _versao_do_codigo():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _linhas(nome, resultado):
+    """Uma linha por medição; resultados aninhados (frontend) viram 'frontend 1000 login'."""
+    if resultado and all(isinstance(valor, dict) for valor in resultado.values()):
+        for chave, valor in resultado.items():
+            yield from _linhas(f'{nome} {chave}', valor)
+    else:
+        yield f'{nome}: {resultado}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede os endpoints em um banco de teste temporário (o banco configurado não é tocado). '
+        'Ex.: python manage.py benchmark frontend --tamanhos 100 10000 --saida bench.json'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cenarios', nargs='*', help=f"Padrão: todos ({', '.join(CENARIOS)}).")
+        parser.add_argument('--repeticoes', type=int, default=100)
+        parser.add_argument('--clientes', type=int, default=100, help='Clientes simultâneos (cenário concorrencia).')
+        parser.add_argument(
+            '--tamanhos', type=int, nargs='+', default=[100, 1000, 10000],
+            help='Transações por usuário em cada rodada (cenário frontend; o compressao usa o maior).'
+        )
+        parser.add_argument('--semente', type=int, default=0, help='Semente dos dados sintéticos.')
+        parser.add_argument(
+            '--saida',
+            help='Grava o resultado em JSON (chaves ordenadas, para comparar entre commits com diff).'
+        )
+        parser.add_argument(
+            '--hasher-real', action='store_true',
+            help='Mantém o hasher de senha configurado (PBKDF2 domina o tempo do registro e do login).'
+        )
+
+    def handle(self, *args, **options):
+        cenarios = options['cenarios'] or list(CENARIOS)
+        desconhecidos = set(cenarios) - set(CENARIOS)
+        if desconhecidos:
+            raise CommandError(f"Cenários desconhecidos: {', '.join(sorted(desconhecidos))}")
+        hashers = None if options['hasher_real'] else ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+        setup_test_environment()
+        nome_original = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+                resultados = {}
+                for nome in cenarios:
+                    resultados[nome] = CENARIOS[nome](options)
+                    for linha in _linhas(nome, resultados[nome]):
+                        self.stdout.write(linha)
+        finally:
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+        if options['saida']:
+            saida = {
+                'ambiente': {
+                    'commit': _versao_do_codigo(),
+                    'python': platform.python_version(),
+                    'django': django.get_version(),
+                    'banco': connection.vendor,
+                    'cache_respostas': cache_respostas.ativo(),
+                    'api_assincrona': settings.API_ASSINCRONA,
+                },
+                'opcoes': {
+                    chave: options[chave]
+                    for chave in ('repeticoes', 'clientes', 'tamanhos', 'semente', 'hasher_real')
+                },
+                'resultados': resultados,
+            }
+            with open(options['saida'], 'w', encoding='utf-8') as f:
+                json.dump(saida, f, indent=2, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
@@ -0,0 +1,47 @@
+import time
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from contas.dados_sinteticos import SENHA_PADRAO, gerar_usuarios
+
+
+class Command(BaseCommand):
+    help = (
+        'Cria usuários com categorias, metas e transações sintéticas (semente fixa). '
+        'Ex.: python manage.py gerar_dados --usuarios 10 --transacoes 5000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1)
+        parser.add_argument('--transacoes', type=int, default=1000, help='Transações por usuário.')
+        parser.add_argument('--semente', type=int, default=0, help='Mesma semente, mesmos dados.')
+        parser.add_argument('--prefixo', default='demo', help='Usernames gerados: {prefixo}1, {prefixo}2, ...')
+        parser.add_argument('--dias', type=int, default=730, help='Período coberto pelas transações.')
+        parser.add_argument('--ate', type=date.fromisoformat, help='Última data (AAAA-MM-DD). Padrão: hoje.')
+        parser.add_argument('--senha', default=SENHA_PADRAO)
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['transacoes'] < 0 or options['dias'] < 1:
+            raise CommandError('--usuarios e --dias devem ser positivos e --transacoes não pode ser negativo.')
+
+        prefixo = options['prefixo']
+        existentes = User.objects.filter(
+            username__in=[f'{prefixo}{i}' for i in range(1, options['usuarios'] + 1)]
+        ).values_list('username', flat=True)
+        if existentes:
+            raise CommandError(
+                f"Usuários já existem: {', '.join(sorted(existentes)[:5])}... Use outro --prefixo."
+            )
+
+        inicio = time.perf_counter()
+        usuarios = gerar_usuarios(
+            options['usuarios'], options['transacoes'], semente=options['semente'], prefixo=prefixo,
+            ate=options['ate'], dias=options['dias'], senha=options['senha']
+        )
+        duracao = time.perf_counter() - inicio
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usuarios)} usuários e {len(usuarios) * options['transacoes']} transações criados "
+            f"em {duracao:.1f}s (senha: {options['senha']!r})."
+        ))
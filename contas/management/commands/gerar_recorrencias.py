@@ -0,0 +1,23 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from contas.recorrencias import gerar_ocorrencias
+
+
+class Command(BaseCommand):
+    help = (
+        'Grava como transações as ocorrências vencidas das recorrências de todos os usuários. '
+        'Pode rodar várias vezes (ex.: cron diário): o que já foi gerado não se repete.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ate', type=date.fromisoformat, help='Gera até esta data (AAAA-MM-DD). Padrão: hoje.')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total = gerar_ocorrencias(hoje=options['ate'])
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{total['transacoes']} transações geradas de {total['recorrencias']} recorrências em {duracao:.1f}s."
+        ))
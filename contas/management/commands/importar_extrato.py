@@ -0,0 +1,44 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from contas.importacao import importar_extrato, detectar_formato, ErroImportacao, TAMANHO_LOTE
+
+
+class Command(BaseCommand):
+    help = 'Importa um extrato bancário (CSV ou OFX) para as transações de um usuário.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo CSV ou OFX.')
+        parser.add_argument('--usuario', required=True, help='Username do dono das transações.')
+        parser.add_argument('--formato', choices=['csv', 'ofx'], help='Padrão: pela extensão do arquivo.')
+        parser.add_argument('--codificacao', default='utf-8-sig', help='Ex.: latin-1 para extratos antigos.')
+        parser.add_argument('--regras', help='Arquivo JSON {"trecho da descrição": "Categoria"}.')
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Linhas gravadas por lote.')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['usuario'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['usuario']!r} não existe.")
+
+        formato = options['formato'] or detectar_formato(options['arquivo'])
+        regras = {}
+        if options['regras']:
+            with open(options['regras'], encoding='utf-8') as f:
+                regras = json.load(f)
+
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = importar_extrato(
+                    user, arquivo, formato, regras=regras,
+                    codificacao=options['codificacao'], tamanho_lote=options['lote']
+                )
+        except ErroImportacao as erro:
+            raise CommandError(str(erro))
+
+        for erro in resultado['erros']:
+            self.stderr.write(f"Linha {erro['linha']}: {erro['erro']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultado['importadas']} transações importadas, {resultado['com_erro']} linhas com erro."
+        ))
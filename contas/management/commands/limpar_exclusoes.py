@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from contas.models import Exclusao
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga as marcas de exclusão mais antigas que SINCRONIZACAO_RETENCAO_DIAS '
+        '(clientes com cursor mais antigo recebem a cópia completa).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.SINCRONIZACAO_RETENCAO_DIAS,
+            help='Padrão: SINCRONIZACAO_RETENCAO_DIAS.'
+        )
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - timedelta(days=options['dias'])
+        apagadas, _ = Exclusao.objects.filter(excluida_em__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f'{apagadas} marcas de exclusão apagadas.'))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from contas.models import RelatorioSnapshot
+from contas.relatorios import gerar_relatorio, retomar_travados
+
+
+class Command(BaseCommand):
+    help = 'Gera os relatórios pendentes (worker para quando RELATORIOS_EM_SEGUNDO_PLANO = False).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true', help='Continua rodando e verificando novos pedidos.')
+        parser.add_argument('--intervalo', type=float, default=2.0, help='Segundos entre verificações (com --continuo).')
+
+    def handle(self, *args, **options):
+        while True:
+            retomados = retomar_travados()
+            if retomados:
+                self.stdout.write(f'{retomados} relatório(s) travado(s) de volta à fila.')
+            pendentes = list(
+                RelatorioSnapshot.objects.filter(status='pendente').order_by('criado_em').values_list('pk', flat=True)
+            )
+            for pk in pendentes:
+                if gerar_relatorio(pk):
+                    self.stdout.write(f'Relatório {pk} gerado.')
+
+            if not options['continuo']:
+                break
+            time.sleep(options['intervalo'])
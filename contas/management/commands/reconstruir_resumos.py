@@ -0,0 +1,85 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum, Count
+from django.db.models.functions import TruncMonth
+from contas.arquivo import resumo_arquivado
+from contas.models import Transacao, ResumoMensal
+
+
+# O SQLite soma decimais em ponto flutuante; compara e grava sempre em centavos
+CENTAVO = Decimal('0.01')
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o ResumoMensal a partir das transações ou verifica se há divergências.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', type=int, help='Processa apenas o usuário com este id.')
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Apenas compara o resumo com as transações, sem alterar nada.'
+        )
+
+    def handle(self, *args, **options):
+        transacoes = Transacao.objects.all()
+        resumos = ResumoMensal.objects.all()
+        if options['usuario']:
+            transacoes = transacoes.filter(user_id=options['usuario'])
+            resumos = resumos.filter(user_id=options['usuario'])
+
+        esperado = {}
+        agregado = transacoes.annotate(mes=TruncMonth('data')).values(
+            'user_id', 'mes', 'categoria_id', 'tipo'
+        ).annotate(total=Sum('valor'), quantidade=Count('id')).order_by()
+        for r in agregado:
+            esperado[(r['user_id'], r['mes'], r['categoria_id'], r['tipo'])] = (
+                r['total'].quantize(CENTAVO), r['quantidade']
+            )
+
+        # Transações arquivadas continuam no resumo
+        for chave, (total, quantidade) in resumo_arquivado(options['usuario']).items():
+            total_atual, quantidade_atual = esperado.get(chave, (0, 0))
+            esperado[chave] = ((total_atual + total).quantize(CENTAVO), quantidade_atual + quantidade)
+
+        if options['verificar']:
+            self.verificar(esperado, resumos)
+            return
+
+        with transaction.atomic():
+            resumos.delete()
+            ResumoMensal.objects.bulk_create([
+                ResumoMensal(
+                    user_id=user_id, mes=mes, categoria_id=categoria_id, tipo=tipo,
+                    total=total, quantidade=quantidade
+                )
+                for (user_id, mes, categoria_id, tipo), (total, quantidade) in esperado.items()
+            ], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f'{len(esperado)} linhas de resumo reconstruídas.'))
+
+    def verificar(self, esperado, resumos):
+        atual = {}
+        for r in resumos.values('user_id', 'mes', 'categoria_id', 'tipo').annotate(
+            total=Sum('total'), quantidade=Sum('quantidade')
+        ).order_by():
+            atual[(r['user_id'], r['mes'], r['categoria_id'], r['tipo'])] = (
+                r['total'].quantize(CENTAVO), r['quantidade']
+            )
+
+        divergencias = 0
+        for chave in sorted(set(esperado) | set(atual), key=str):
+            valores_esperados = esperado.get(chave, (0, 0))
+            valores_atuais = atual.get(chave, (0, 0))
+            if valores_esperados != valores_atuais:
+                divergencias += 1
+                self.stdout.write(
+                    f'Divergência em {chave}: esperado {valores_esperados}, resumo {valores_atuais}'
+                )
+
+        if divergencias:
+            raise CommandError(
+                f'{divergencias} divergências encontradas. Rode sem --verificar para reconstruir.'
+            )
+        self.stdout.write(self.style.SUCCESS('Resumo mensal consistente com as transações.'))
@@ -0,0 +1,276 @@
+"""
+Métricas por rota da API (latência, consultas ao banco e tamanho da resposta).
+
+O MetricasMiddleware mede cada requisição e acumula histogramas por rota
+resolvida (url_name: 'transacao-list', 'transacao-estatisticas', 'login', ...)
+e método. As consultas são contadas por um execute_wrapper instalado em
+toda conexão nova (signal connection_created); a requisição em andamento
+fica numa ContextVar, que o sync_to_async leva junto para a thread das
+views assíncronas.
+
+O custo é o de alguns bisect e de uma trava por requisição (~microssegundos),
+então o middleware fica sempre ligado (desligue com METRICAS_ATIVAS = False).
+Os números são deste processo; com vários workers, cada um expõe os seus.
+
+Exposição: /api/metricas/ (somente admin), no formato texto do Prometheus.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .authentication import cache_usuarios
+
+# Limites superiores dos buckets (o +Inf é implícito)
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+ROTA_NAO_RESOLVIDA = 'nao_resolvida'
+
+
+# ============================================
+# HISTOGRAMAS POR ROTA
+# ============================================
+
+class Histograma:
+    """Contagem por bucket, soma e total, no modelo do histograma do Prometheus."""
+
+    __slots__ = ('limites', 'contagens', 'soma', 'total')
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def acumulados(self):
+        """[(le, contagem acumulada)] incluindo o +Inf."""
+        acumulado = 0
+        linhas = []
+        for limite, contagem in zip(self.limites + ('+Inf',), self.contagens):
+            acumulado += contagem
+            linhas.append((limite, acumulado))
+        return linhas
+
+
+class SerieDaRota:
+    __slots__ = ('latencia', 'consultas', 'tempo_consultas', 'bytes', 'status')
+
+    def __init__(self):
+        self.latencia = Histograma(BUCKETS_LATENCIA)
+        self.consultas = Histograma(BUCKETS_CONSULTAS)
+        self.tempo_consultas = 0.0
+        self.bytes = Histograma(BUCKETS_BYTES)
+        self.status = {}
+
+
+class RegistroMetricas:
+    """Séries por (rota, método), seguras entre threads."""
+
+    def __init__(self):
+        self._series = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, rota, metodo, status, duracao, consultas, tempo_consultas, tamanho):
+        with self._trava:
+            serie = self._series.get((rota, metodo))
+            if serie is None:
+                serie = self._series[(rota, metodo)] = SerieDaRota()
+            serie.latencia.observar(duracao)
+            serie.consultas.observar(consultas)
+            serie.tempo_consultas += tempo_consultas
+            if tamanho is not None:
+                serie.bytes.observar(tamanho)
+            serie.status[status] = serie.status.get(status, 0) + 1
+
+    def limpar(self):
+        with self._trava:
+            self._series.clear()
+
+    def copiar(self):
+        """Cópia das séries para formatar fora da trava."""
+        with self._trava:
+            copia = {}
+            for chave, serie in self._series.items():
+                nova = SerieDaRota()
+                for nome in ('latencia', 'consultas', 'bytes'):
+                    original, destino = getattr(serie, nome), getattr(nova, nome)
+                    destino.contagens = list(original.contagens)
+                    destino.soma, destino.total = original.soma, original.total
+                nova.tempo_consultas = serie.tempo_consultas
+                nova.status = dict(serie.status)
+                copia[chave] = nova
+            return copia
+
+
+registro = RegistroMetricas()
+
+
+# ============================================
+# CONTAGEM DE CONSULTAS
+# ============================================
+
+class _Medicao:
+    __slots__ = ('consultas', 'tempo')
+
+    def __init__(self):
+        self.consultas = 0
+        self.tempo = 0.0
+
+
+_medicao_atual = ContextVar('medicao_atual', default=None)
+
+
+def contar_consulta(execute, sql, params, many, context):
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.tempo += time.perf_counter() - inicio
+        medicao.consultas += 1
+
+
+@receiver(connection_created)
+def instalar_contador(sender, connection, **kwargs):
+    if contar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(contar_consulta)
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+def _tamanho(response):
+    if response.streaming:
+        # Exportações e downloads: só quando o tamanho é conhecido
+        tamanho = response.get('Content-Length')
+        return int(tamanho) if tamanho else None
+    return len(response.content)
+
+
+class MetricasMiddleware:
+    """Primeiro da lista MIDDLEWARE, para medir também os outros middlewares."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.ativo = getattr(settings, 'METRICAS_ATIVAS', True)
+        self.assincrono = iscoroutinefunction(get_response)
+        if self.assincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.assincrono:
+            return self.__acall__(request)
+        if not self.ativo:
+            return self.get_response(request)
+
+        medicao = _Medicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        self.registrar(request, response, time.perf_counter() - inicio, medicao)
+        return response
+
+    async def __acall__(self, request):
+        if not self.ativo:
+            return await self.get_response(request)
+
+        medicao = _Medicao()
+        token = _medicao_atual.set(medicao)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicao_atual.reset(token)
+        self.registrar(request, response, time.perf_counter() - inicio, medicao)
+        return response
+
+    def registrar(self, request, response, duracao, medicao):
+        match = request.resolver_match
+        rota = (match.url_name or match.route) if match else ROTA_NAO_RESOLVIDA
+        registro.registrar(
+            rota, request.method, response.status_code, duracao,
+            medicao.consultas, medicao.tempo, _tamanho(response)
+        )
+
+
+# ============================================
+# FORMATO PROMETHEUS
+# ============================================
+
+def _rotulos(**rotulos):
+    texto = ','.join(
+        '{}="{}"'.format(nome, str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for nome, valor in rotulos.items()
+    )
+    return '{' + texto + '}'
+
+
+def _histograma(linhas, nome, ajuda, series, campo):
+    linhas.append(f'# HELP {nome} {ajuda}')
+    linhas.append(f'# TYPE {nome} histogram')
+    for (rota, metodo), serie in series:
+        histograma = getattr(serie, campo)
+        for limite, acumulado in histograma.acumulados():
+            linhas.append(f'{nome}_bucket{_rotulos(rota=rota, metodo=metodo, le=limite)} {acumulado}')
+        linhas.append(f'{nome}_sum{_rotulos(rota=rota, metodo=metodo)} {histograma.soma}')
+        linhas.append(f'{nome}_count{_rotulos(rota=rota, metodo=metodo)} {histograma.total}')
+
+
+def formatar_prometheus():
+    series = sorted(registro.copiar().items())
+    linhas = []
+
+    linhas.append('# HELP ga_requisicoes_total Requisições atendidas por rota, método e status.')
+    linhas.append('# TYPE ga_requisicoes_total counter')
+    for (rota, metodo), serie in series:
+        for status, total in sorted(serie.status.items()):
+            linhas.append(f'ga_requisicoes_total{_rotulos(rota=rota, metodo=metodo, status=status)} {total}')
+
+    _histograma(linhas, 'ga_requisicao_duracao_segundos', 'Latência da requisição (todo o middleware).',
+                series, 'latencia')
+    _histograma(linhas, 'ga_requisicao_consultas', 'Consultas ao banco por requisição.', series, 'consultas')
+
+    linhas.append('# HELP ga_consultas_segundos_total Tempo gasto no banco por rota.')
+    linhas.append('# TYPE ga_consultas_segundos_total counter')
+    for (rota, metodo), serie in series:
+        linhas.append(f'ga_consultas_segundos_total{_rotulos(rota=rota, metodo=metodo)} {serie.tempo_consultas}')
+
+    _histograma(linhas, 'ga_resposta_bytes', 'Tamanho do corpo enviado (já comprimido, se o cliente aceita).',
+               series, 'bytes')
+
+    cache = cache_usuarios.estatisticas()
+    for nome, tipo, ajuda in (
+        ('acertos', 'counter', 'Autenticações atendidas pelo cache de usuários.'),
+        ('falhas', 'counter', 'Autenticações que foram ao banco.'),
+        ('expirados', 'counter', 'Entradas descartadas pelo TTL.'),
+        ('despejados', 'counter', 'Entradas descartadas pelo limite de tamanho.'),
+        ('itens', 'gauge', 'Usuários no cache agora.'),
+    ):
+        metrica = f'ga_cache_usuarios_{nome}' + ('_total' if tipo == 'counter' else '')
+        linhas.append(f'# HELP {metrica} {ajuda}')
+        linhas.append(f'# TYPE {metrica} {tipo}')
+        linhas.append(f'{metrica} {cache[nome]}')
+
+    return '\n'.join(linhas) + '\n'
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Categoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100)),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa')], max_length=10)),
+                ('icone', models.CharField(default='bx-folder', max_length=50)),
+                ('cor', models.CharField(default='#3c91e6', max_length=7)),
+                ('descricao', models.TextField(blank=True, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categorias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-criada_em'],
+                'unique_together': {('user', 'nome')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Meta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100)),
+                ('tipo', models.CharField(max_length=50)),
+                ('valor_alvo', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('valor_atual', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('data_limite', models.DateField()),
+                ('descricao', models.TextField(blank=True, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-criada_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Transacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descricao', models.CharField(max_length=200)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa')], max_length=10)),
+                ('data', models.DateField()),
+                ('observacao', models.TextField(blank=True, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='contas.categoria')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-data', '-criada_em'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bio', models.TextField(blank=True, null=True)),
+                ('avatar', models.CharField(blank=True, max_length=500, null=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa')], max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='contas.categoria')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_mensais', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-mes'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'mes', 'categoria', 'tipo'), name='resumo_mensal_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0002_resumo_mensal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transacao',
+            options={'ordering': ['-data', '-criada_em', '-id']},
+        ),
+        migrations.AlterField(
+            model_name='transacao',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='transacoes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['user', '-criada_em'], name='categoria_user_criada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meta',
+            index=models.Index(fields=['user', '-criada_em'], name='meta_user_criada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumomensal',
+            index=models.Index(fields=['user', 'tipo', 'categoria'], name='resumo_user_tipo_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['user', '-data', '-criada_em', '-id'], name='transacao_user_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['user', 'tipo', '-data', '-criada_em', '-id'], name='transacao_user_tipo_data_idx'),
+        ),
+    ]
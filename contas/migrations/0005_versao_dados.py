@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0004_relatorio_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='versao_dados',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
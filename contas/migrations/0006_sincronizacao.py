@@ -0,0 +1,72 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copiar_criada_em(apps, schema_editor):
+    """As linhas existentes recebem a data de criação (o AddField gravaria o horário da migração)."""
+    for nome in ('Categoria', 'Transacao', 'Meta'):
+        apps.get_model('contas', nome).objects.update(atualizada_em=models.F('criada_em'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0005_versao_dados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Exclusao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('categoria', 'Categoria'), ('transacao', 'Transação'), ('meta', 'Meta')], max_length=10)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('excluida_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['excluida_em', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='categoria',
+            name='atualizada_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='meta',
+            name='atualizada_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='atualizada_em',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(copiar_criada_em, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='categoria',
+            index=models.Index(fields=['user', 'atualizada_em', 'id'], name='categoria_user_atualizada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meta',
+            index=models.Index(fields=['user', 'atualizada_em', 'id'], name='meta_user_atualizada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['user', 'atualizada_em', 'id'], name='transacao_user_atualizada_idx'),
+        ),
+        migrations.AddField(
+            model_name='exclusao',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='exclusoes', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='exclusao',
+            index=models.Index(fields=['user', 'excluida_em', 'id'], name='exclusao_user_excluida_idx'),
+        ),
+    ]
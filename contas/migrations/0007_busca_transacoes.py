@@ -0,0 +1,101 @@
+"""
+Índice de busca textual das transações (contas/busca.py), mantido por
+triggers do banco para valer também nas escritas em massa.
+"""
+
+from django.db import migrations
+
+SQLITE = [
+    # rowid = id da transação; o nome da categoria é copiado para a busca
+    """
+    CREATE VIRTUAL TABLE contas_transacao_busca USING fts5(
+        descricao, observacao, categoria,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER contas_transacao_busca_ai AFTER INSERT ON contas_transacao BEGIN
+        INSERT INTO contas_transacao_busca (rowid, descricao, observacao, categoria)
+        VALUES (new.id, new.descricao, new.observacao,
+                (SELECT nome FROM contas_categoria WHERE id = new.categoria_id));
+    END
+    """,
+    """
+    CREATE TRIGGER contas_transacao_busca_au
+    AFTER UPDATE OF descricao, observacao, categoria_id ON contas_transacao BEGIN
+        UPDATE contas_transacao_busca
+        SET descricao = new.descricao,
+            observacao = new.observacao,
+            categoria = (SELECT nome FROM contas_categoria WHERE id = new.categoria_id)
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER contas_transacao_busca_ad AFTER DELETE ON contas_transacao BEGIN
+        DELETE FROM contas_transacao_busca WHERE rowid = old.id;
+    END
+    """,
+    # Renomear a categoria atualiza as transações dela
+    """
+    CREATE TRIGGER contas_categoria_busca_au AFTER UPDATE OF nome ON contas_categoria BEGIN
+        UPDATE contas_transacao_busca SET categoria = new.nome
+        WHERE rowid IN (SELECT id FROM contas_transacao WHERE categoria_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO contas_transacao_busca (rowid, descricao, observacao, categoria)
+    SELECT t.id, t.descricao, t.observacao, c.nome
+    FROM contas_transacao t LEFT JOIN contas_categoria c ON c.id = t.categoria_id
+    """,
+]
+
+SQLITE_REVERSO = [
+    'DROP TRIGGER IF EXISTS contas_categoria_busca_au',
+    'DROP TRIGGER IF EXISTS contas_transacao_busca_ad',
+    'DROP TRIGGER IF EXISTS contas_transacao_busca_au',
+    'DROP TRIGGER IF EXISTS contas_transacao_busca_ai',
+    'DROP TABLE IF EXISTS contas_transacao_busca',
+]
+
+POSTGRES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS unaccent',
+    # unaccent() não é IMMUTABLE (depende do search_path); o índice precisa de uma função que seja
+    """
+    CREATE OR REPLACE FUNCTION contas_busca_normalizar(texto text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$
+    """,
+    """
+    CREATE INDEX contas_transacao_busca_trgm ON contas_transacao
+    USING gin (contas_busca_normalizar(descricao || ' ' || coalesce(observacao, '')) gin_trgm_ops)
+    """,
+]
+
+POSTGRES_REVERSO = [
+    'DROP INDEX IF EXISTS contas_transacao_busca_trgm',
+    'DROP FUNCTION IF EXISTS contas_busca_normalizar(text)',
+]
+
+
+def criar_indice(apps, schema_editor):
+    comandos = {'sqlite': SQLITE, 'postgresql': POSTGRES}.get(schema_editor.connection.vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+def remover_indice(apps, schema_editor):
+    comandos = {'sqlite': SQLITE_REVERSO, 'postgresql': POSTGRES_REVERSO}.get(schema_editor.connection.vendor, [])
+    for sql in comandos:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0006_sincronizacao'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_indice, remover_indice),
+    ]
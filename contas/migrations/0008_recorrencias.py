@@ -0,0 +1,61 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0007_busca_transacoes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exclusao',
+            name='modelo',
+            field=models.CharField(choices=[('categoria', 'Categoria'), ('transacao', 'Transação'), ('meta', 'Meta'), ('recorrencia', 'Recorrência')], max_length=12),
+        ),
+        migrations.CreateModel(
+            name='Recorrencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('descricao', models.CharField(max_length=200)),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa')], max_length=10)),
+                ('observacao', models.TextField(blank=True, null=True)),
+                ('frequencia', models.CharField(choices=[('semanal', 'Semanal'), ('mensal', 'Mensal'), ('anual', 'Anual')], default='mensal', max_length=10)),
+                ('intervalo', models.PositiveSmallIntegerField(default=1)),
+                ('inicio', models.DateField()),
+                ('fim', models.DateField(blank=True, null=True)),
+                ('ativa', models.BooleanField(default=True)),
+                ('gerada_ate', models.DateField(blank=True, null=True)),
+                ('criada_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizada_em', models.DateTimeField(auto_now=True)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recorrencias', to='contas.categoria')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='recorrencias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['inicio', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transacao',
+            name='recorrencia',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transacoes', to='contas.recorrencia'),
+        ),
+        migrations.AddConstraint(
+            model_name='transacao',
+            constraint=models.UniqueConstraint(condition=models.Q(('recorrencia__isnull', False)), fields=('recorrencia', 'data'), name='transacao_recorrencia_data_unica'),
+        ),
+        migrations.AddIndex(
+            model_name='recorrencia',
+            index=models.Index(fields=['user', 'atualizada_em', 'id'], name='recorrencia_user_atual_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recorrencia',
+            index=models.Index(fields=['ativa', 'gerada_ate'], name='recorrencia_ativa_gerada_idx'),
+        ),
+    ]
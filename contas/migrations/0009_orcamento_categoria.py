@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0008_recorrencias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='orcamento_mensal',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+    ]
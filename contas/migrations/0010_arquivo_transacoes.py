@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0009_orcamento_categoria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArquivoTransacoes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('dados', models.BinaryField(blank=True, null=True)),
+                ('arquivo', models.CharField(blank=True, max_length=255)),
+                ('tamanho', models.PositiveIntegerField(default=0)),
+                ('arquivado_em', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='arquivos_transacoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['ano'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'ano'), name='arquivo_user_ano_unico')],
+            },
+        ),
+    ]
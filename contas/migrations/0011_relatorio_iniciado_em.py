@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0010_arquivo_transacoes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='relatoriosnapshot',
+            name='iniciado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
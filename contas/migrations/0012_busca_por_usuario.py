@@ -0,0 +1,86 @@
+"""
+Índice de busca do SQLite com o dono da transação: a coluna usuario guarda
+o token 'u<user_id>', que entra no MATCH (contas/busca.py). Assim o FTS5
+só percorre as linhas do próprio usuário, em vez de casar os termos com as
+transações de todos e filtrar depois no JOIN.
+
+No PostgreSQL nada muda: o filtro por user_id já vai na mesma consulta.
+"""
+
+from importlib import import_module
+
+from django.db import migrations
+
+anterior = import_module('contas.migrations.0007_busca_transacoes')
+
+USUARIO = "'u' || new.user_id"
+
+SQLITE = [
+    *anterior.SQLITE_REVERSO,
+    """
+    CREATE VIRTUAL TABLE contas_transacao_busca USING fts5(
+        descricao, observacao, categoria, usuario,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER contas_transacao_busca_ai AFTER INSERT ON contas_transacao BEGIN
+        INSERT INTO contas_transacao_busca (rowid, descricao, observacao, categoria, usuario)
+        VALUES (new.id, new.descricao, new.observacao,
+                (SELECT nome FROM contas_categoria WHERE id = new.categoria_id), {USUARIO});
+    END
+    """,
+    f"""
+    CREATE TRIGGER contas_transacao_busca_au
+    AFTER UPDATE OF descricao, observacao, categoria_id, user_id ON contas_transacao BEGIN
+        UPDATE contas_transacao_busca
+        SET descricao = new.descricao,
+            observacao = new.observacao,
+            categoria = (SELECT nome FROM contas_categoria WHERE id = new.categoria_id),
+            usuario = {USUARIO}
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER contas_transacao_busca_ad AFTER DELETE ON contas_transacao BEGIN
+        DELETE FROM contas_transacao_busca WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER contas_categoria_busca_au AFTER UPDATE OF nome ON contas_categoria BEGIN
+        UPDATE contas_transacao_busca SET categoria = new.nome
+        WHERE rowid IN (SELECT id FROM contas_transacao WHERE categoria_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO contas_transacao_busca (rowid, descricao, observacao, categoria, usuario)
+    SELECT t.id, t.descricao, t.observacao, c.nome, 'u' || t.user_id
+    FROM contas_transacao t LEFT JOIN contas_categoria c ON c.id = t.categoria_id
+    """,
+]
+
+# Volta ao índice da 0007 (sem a coluna usuario)
+SQLITE_REVERSO = anterior.SQLITE_REVERSO + anterior.SQLITE
+
+
+def recriar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE:
+            schema_editor.execute(sql)
+
+
+def voltar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_REVERSO:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0011_relatorio_iniciado_em'),
+    ]
+
+    operations = [
+        migrations.RunPython(recriar_indice, voltar_indice),
+    ]
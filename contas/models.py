@@ -1,7 +1,13 @@
-from django.db import models
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, models, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.query import QuerySet
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from datetime import date, timedelta # Importação nova para calcular datas
 
 # ============================================
@@ -12,10 +18,26 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(blank=True, null=True)
     avatar = models.CharField(max_length=500, blank=True, null=True)
+    # Sobe a cada escrita em Categoria, Transacao, Meta ou Recorrencia do usuário
+    # (ETag das listagens e impressão digital dos relatórios)
+    versao_dados = models.PositiveBigIntegerField(default=0)
     
     def __str__(self):
         return f"Perfil de {self.user.username}"
 
+    @classmethod
+    def incrementar_versao(cls, user_id):
+        """
+        Um UPDATE atômico, sem ler o perfil antes. Caminhos em massa (que não
+        disparam signals) chamam isto uma vez ao final.
+        """
+        cls.objects.filter(user_id=user_id).update(versao_dados=F('versao_dados') + 1)
+
+    @classmethod
+    def incrementar_versoes(cls, user_ids):
+        """O mesmo para vários usuários num UPDATE só (geração de recorrências)."""
+        cls.objects.filter(user_id__in=user_ids).update(versao_dados=F('versao_dados') + 1)
+
 # ============================================
 # 2. CATEGORIA
 # ============================================
@@ -32,11 +54,19 @@ class Categoria(models.Model):
     icone = models.CharField(max_length=50, default='bx-folder')
     cor = models.CharField(max_length=7, default='#3c91e6')
     descricao = models.TextField(blank=True, null=True)
+    # Limite de gastos por mês (vazio = sem orçamento); ver contas/orcamentos.py
+    orcamento_mensal = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     criada_em = models.DateTimeField(auto_now_add=True)
+    # Sincronização incremental (/api/sincronizar/)
+    atualizada_em = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-criada_em']
         unique_together = ('user', 'nome')
+        indexes = [
+            models.Index(fields=['user', '-criada_em'], name='categoria_user_criada_idx'),
+            models.Index(fields=['user', 'atualizada_em', 'id'], name='categoria_user_atualizada_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nome} ({self.tipo})"
@@ -51,7 +81,8 @@ class Transacao(models.Model):
         ('despesa', 'Despesa'),
     ]
     
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transacoes')
+    # db_index=False: os índices compostos abaixo já começam por user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transacoes', db_index=False)
     descricao = models.CharField(max_length=200)
     valor = models.DecimalField(max_digits=10, decimal_places=2)
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES)
@@ -59,13 +90,171 @@ class Transacao(models.Model):
     data = models.DateField()
     observacao = models.TextField(blank=True, null=True)
     criada_em = models.DateTimeField(auto_now_add=True)
+    # bulk_update e QuerySet.update() não aplicam o auto_now: incluir o campo
+    atualizada_em = models.DateTimeField(auto_now=True)
+    # Ocorrência gerada por uma Recorrencia (contas/recorrencias.py).
+    # db_index=False: a restrição única abaixo já começa por recorrencia
+    recorrencia = models.ForeignKey(
+        'Recorrencia', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='transacoes', db_index=False
+    )
     
     class Meta:
-        ordering = ['-data', '-criada_em']
+        ordering = ['-data', '-criada_em', '-id']
+        constraints = [
+            # Uma ocorrência por data: a geração pode rodar de novo sem duplicar
+            models.UniqueConstraint(
+                fields=['recorrencia', 'data'], condition=models.Q(recorrencia__isnull=False),
+                name='transacao_recorrencia_data_unica'
+            ),
+        ]
+        indexes = [
+            # Listagem (filtrada por usuário e opcionalmente por tipo) na ordem padrão
+            models.Index(fields=['user', '-data', '-criada_em', '-id'], name='transacao_user_data_idx'),
+            models.Index(fields=['user', 'tipo', '-data', '-criada_em', '-id'], name='transacao_user_tipo_data_idx'),
+            # Alterações desde o cursor da sincronização
+            models.Index(fields=['user', 'atualizada_em', 'id'], name='transacao_user_atualizada_idx'),
+        ]
     
     def __str__(self):
         return f"{self.descricao} - {self.valor} ({self.tipo})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda os valores originais para calcular a diferença no ResumoMensal ao salvar
+        if CAMPOS_RESUMO.issubset(field_names):
+            instance._resumo_original = instance.chave_resumo()
+        return instance
+
+    def chave_resumo(self):
+        """Retorna ((user_id, mes, categoria_id, tipo), valor) desta transação."""
+        # to_python aceita valores ainda em texto (ex.: Transacao(valor='10.00'))
+        data = self._meta.get_field('data').to_python(self.data)
+        valor = self._meta.get_field('valor').to_python(self.valor)
+        return (
+            (self.user_id, inicio_do_mes(data), self.categoria_id, self.tipo),
+            valor
+        )
+
+    def save(self, *args, **kwargs):
+        """
+        Salva a transação e atualiza o ResumoMensal na mesma transação do banco.
+        """
+        with transaction.atomic():
+            original = getattr(self, '_resumo_original', None)
+            if original is None and self.pk and not kwargs.get('force_insert'):
+                # Instância não veio do banco por completo: busca os valores atuais
+                antigo = Transacao.objects.filter(pk=self.pk).only(*CAMPOS_RESUMO).first()
+                original = antigo.chave_resumo() if antigo else None
+
+            super().save(*args, **kwargs)
+
+            atual = self.chave_resumo()
+            deltas = {}
+            if original is not None:
+                acumular_delta(deltas, original[0], -original[1], -1)
+            acumular_delta(deltas, atual[0], atual[1], 1)
+            ResumoMensal.aplicar_deltas(deltas)
+            self._resumo_original = atual
+
+# ============================================
+# 3.1 RESUMO MENSAL (AGREGADOS DE TRANSACAO)
+# ============================================
+
+# Campos da Transacao que definem em qual linha do resumo ela entra
+CAMPOS_RESUMO = {'user_id', 'data', 'categoria_id', 'tipo', 'valor'}
+
+
+def inicio_do_mes(data):
+    return data.replace(day=1)
+
+
+def acumular_delta(deltas, chave, valor, quantidade):
+    """Soma valor e quantidade em deltas[chave] (chave = user_id, mes, categoria_id, tipo)."""
+    atual = deltas.setdefault(chave, [0, 0])
+    atual[0] += valor
+    atual[1] += quantidade
+
+
+# Ids por DELETE (abaixo do limite de parâmetros do SQLite)
+LOTE_EXCLUSAO = 500
+
+
+def apagar_transacoes(user_id, ids):
+    """
+    DELETE em SQL explícito das transações do usuário, sem o Collector nem
+    os signals de cada linha. Para os caminhos em massa (lote, arquivo) que
+    cuidam eles mesmos do ResumoMensal e das marcas de exclusão; nenhuma
+    tabela referencia Transacao por FK. O índice de busca sai pelo trigger.
+    """
+    ids = list(ids)
+    tabela = connection.ops.quote_name(Transacao._meta.db_table)
+    with connection.cursor() as cursor:
+        for inicio in range(0, len(ids), LOTE_EXCLUSAO):
+            parte = ids[inicio:inicio + LOTE_EXCLUSAO]
+            cursor.execute(
+                f'DELETE FROM {tabela} WHERE user_id = %s AND id IN ({", ".join(["%s"] * len(parte))})',
+                [user_id, *parte],
+            )
+
+
+class ResumoMensal(models.Model):
+    """
+    Soma e quantidade de transações por (usuário, mês, categoria, tipo).
+
+    Mantido incrementalmente pelo save/delete da Transacao, para que as
+    estatísticas leiam meses x categorias em vez do histórico inteiro.
+    Operações em massa (bulk_create, update) precisam chamar aplicar_deltas.
+    Comando de manutenção: python manage.py reconstruir_resumos [--verificar]
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='resumos_mensais')
+    mes = models.DateField()  # Sempre o dia 1 do mês
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, null=True, blank=True)
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-mes']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'mes', 'categoria', 'tipo'], name='resumo_mensal_unico'),
+        ]
+        indexes = [
+            # Agrupamento das estatísticas por (tipo, categoria) sem ordenação temporária
+            models.Index(fields=['user', 'tipo', 'categoria'], name='resumo_user_tipo_cat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%m/%Y} - {self.tipo} - {self.total}"
+
+    @classmethod
+    def aplicar_deltas(cls, deltas):
+        """
+        Aplica {(user_id, mes, categoria_id, tipo): [valor, quantidade]} ao resumo.
+        Deve ser chamado dentro da mesma transação que alterou as Transacoes.
+        """
+        for (user_id, mes, categoria_id, tipo), (valor, quantidade) in deltas.items():
+            if not valor and not quantidade:
+                continue
+            filtros = {'user_id': user_id, 'mes': mes, 'categoria_id': categoria_id, 'tipo': tipo}
+            atualizados = cls.objects.filter(**filtros).update(
+                total=F('total') + valor,
+                quantidade=F('quantidade') + quantidade
+            )
+            if not atualizados:
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(total=valor, quantidade=quantidade, **filtros)
+                except IntegrityError:
+                    # Outra requisição criou a linha ao mesmo tempo
+                    cls.objects.filter(**filtros).update(
+                        total=F('total') + valor,
+                        quantidade=F('quantidade') + quantidade
+                    )
+            if quantidade < 0:
+                cls.objects.filter(quantidade__lte=0, **filtros).delete()
+
 # ============================================
 # 4. META
 # ============================================
@@ -79,9 +268,14 @@ class Meta(models.Model):
     data_limite = models.DateField()
     descricao = models.TextField(blank=True, null=True)
     criada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-criada_em']
+        indexes = [
+            models.Index(fields=['user', '-criada_em'], name='meta_user_criada_idx'),
+            models.Index(fields=['user', 'atualizada_em', 'id'], name='meta_user_atualizada_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nome} - {self.tipo}"
@@ -93,81 +287,339 @@ class Meta(models.Model):
         return (self.valor_atual / self.valor_alvo) * 100
 
 # ============================================
-# 5. SIGNALS (AUTOMAÇÃO AO CRIAR USUÁRIO)
+# 4.1 RELATÓRIO (SNAPSHOT GERADO EM SEGUNDO PLANO)
 # ============================================
 
-@receiver(post_save, sender=User)
-def create_user_data(sender, instance, created, **kwargs):
+class RelatorioSnapshot(models.Model):
     """
-    Quando um usuário é criado, cria automaticamente:
-    1. O Perfil
-    2. As Categorias Padrão
-    3. As Metas Padrão
+    Relatório completo de um período, gerado fora da requisição e guardado
+    em disco (HTML comprimido com gzip) em MEDIA_ROOT/relatorios/.
+
+    impressao_digital resume o estado dos dados do período; enquanto ela
+    não muda, novos pedidos reaproveitam o arquivo já gerado. Pendente ou
+    processando por mais de RELATORIOS_TIMEOUT_MINUTOS (worker que caiu,
+    servidor reiniciado) conta como travado: ver relatorios.expirar_travados.
     """
-    if created:
-        # 1. Cria o Perfil
-        UserProfile.objects.create(user=instance)
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('pronto', 'Pronto'),
+        ('erro', 'Erro'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='relatorios')
+    inicio = models.DateField(blank=True, null=True)  # Vazio = desde o início
+    fim = models.DateField(blank=True, null=True)  # Vazio = até hoje
+    impressao_digital = models.CharField(max_length=64)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pendente')
+    arquivo = models.CharField(max_length=255, blank=True)
+    tamanho = models.PositiveIntegerField(default=0)
+    erro = models.TextField(blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(blank=True, null=True)  # Quando um worker assumiu
+    concluido_em = models.DateTimeField(blank=True, null=True)
 
-        # 2. Cria Categorias Padrão
-        categorias_padrao = [
-            # RECEITAS
-            {'nome': 'Salário', 'tipo': 'receita', 'icone': 'bx-money', 'cor': '#28a745'},
-            {'nome': 'Investimentos', 'tipo': 'receita', 'icone': 'bx-line-chart', 'cor': '#17a2b8'},
-            {'nome': 'Freelance', 'tipo': 'receita', 'icone': 'bx-laptop', 'cor': '#ffc107'},
-            # DESPESAS
-            {'nome': 'Alimentação', 'tipo': 'despesa', 'icone': 'bx-restaurant', 'cor': '#dc3545'},
-            {'nome': 'Moradia', 'tipo': 'despesa', 'icone': 'bx-home', 'cor': '#fd7e14'},
-            {'nome': 'Transporte', 'tipo': 'despesa', 'icone': 'bx-car', 'cor': '#6c757d'},
-            {'nome': 'Lazer', 'tipo': 'despesa', 'icone': 'bx-joystick', 'cor': '#6f42c1'},
-            {'nome': 'Saúde', 'tipo': 'despesa', 'icone': 'bx-pulse', 'cor': '#e83e8c'},
-            {'nome': 'Educação', 'tipo': 'despesa', 'icone': 'bx-book', 'cor': '#20c997'},
+    class Meta:
+        ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['user', 'impressao_digital'], name='relatorio_user_digital_idx'),
+            models.Index(fields=['status', 'criado_em'], name='relatorio_status_idx'),
         ]
 
-        for cat in categorias_padrao:
-            Categoria.objects.create(
-                user=instance, 
-                nome=cat['nome'], 
-                tipo=cat['tipo'], 
-                icone=cat['icone'], 
-                cor=cat['cor']
-            )
+    def __str__(self):
+        return f"Relatório de {self.user.username} ({self.status})"
+
+# ============================================
+# 4.2 EXCLUSÕES (SINCRONIZAÇÃO INCREMENTAL)
+# ============================================
+
+class Exclusao(models.Model):
+    """
+    Marca (tombstone) de uma Categoria, Transacao, Meta ou Recorrencia
+    excluída, para que /api/sincronizar/ avise os clientes que guardam uma
+    cópia local.
+
+    Gravada pelo post_delete de cada model e pelos caminhos em massa. A
+    remoção do próprio User não gera marcas. Marcas mais antigas que
+    SINCRONIZACAO_RETENCAO_DIAS são apagadas por `limpar_exclusoes`; um
+    cursor mais antigo que isso recebe a cópia completa de novo.
+    """
+    MODELO_CHOICES = [
+        ('categoria', 'Categoria'),
+        ('transacao', 'Transação'),
+        ('meta', 'Meta'),
+        ('recorrencia', 'Recorrência'),
+    ]
+
+    # db_index=False: o índice composto abaixo já começa por user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='exclusoes', db_index=False)
+    modelo = models.CharField(max_length=12, choices=MODELO_CHOICES)
+    objeto_id = models.PositiveBigIntegerField()
+    excluida_em = models.DateTimeField(default=timezone.now)
 
-        # 3. Cria Metas Padrão (NOVO)
-        hoje = date.today()
-        metas_padrao = [
-            {
-                'nome': 'Reserva de Emergência',
-                'tipo': 'Economia',
-                'valor_alvo': 5000.00,
-                'data_limite': hoje + timedelta(days=365), # Daqui a 1 ano
-                'descricao': 'Guardar dinheiro para imprevistos.'
-            },
-            {
-                'nome': 'Viagem de Férias',
-                'tipo': 'Lazer',
-                'valor_alvo': 3000.00,
-                'data_limite': hoje + timedelta(days=180), # Daqui a 6 meses
-                'descricao': 'Juntar dinheiro para a viagem de fim de ano.'
-            },
-            {
-                'nome': 'Trocar de Celular',
-                'tipo': 'Bens Materiais',
-                'valor_alvo': 2500.00,
-                'data_limite': hoje + timedelta(days=90), # Daqui a 3 meses
-                'descricao': 'Economia para o novo modelo.'
-            }
+    class Meta:
+        ordering = ['excluida_em', 'id']
+        indexes = [
+            models.Index(fields=['user', 'excluida_em', 'id'], name='exclusao_user_excluida_idx'),
         ]
 
-        for m in metas_padrao:
-            Meta.objects.create(
+    def __str__(self):
+        return f"{self.modelo} {self.objeto_id} excluída em {self.excluida_em:%d/%m/%Y %H:%M}"
+
+# ============================================
+# 4.3 RECORRÊNCIAS (TRANSAÇÕES QUE SE REPETEM)
+# ============================================
+
+class Recorrencia(models.Model):
+    """
+    Regra de uma transação que se repete (salário, aluguel, assinaturas).
+
+    As ocorrências vencidas viram Transacao pelo comando gerar_recorrencias
+    (contas/recorrencias.py), uma vez só: `gerada_ate` marca até onde a
+    regra já foi gerada, então uma ocorrência que o usuário excluiu não
+    volta. As futuras não são gravadas; /api/recorrencias/projecao/ as
+    calcula na hora. Alterar a regra vale para as próximas ocorrências.
+    """
+    FREQUENCIA_CHOICES = [
+        ('semanal', 'Semanal'),
+        ('mensal', 'Mensal'),
+        ('anual', 'Anual'),
+    ]
+
+    # db_index=False: o índice composto abaixo já começa por user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recorrencias', db_index=False)
+    descricao = models.CharField(max_length=200)
+    valor = models.DecimalField(max_digits=10, decimal_places=2)
+    tipo = models.CharField(max_length=10, choices=Transacao.TIPO_CHOICES)
+    categoria = models.ForeignKey(
+        Categoria, on_delete=models.SET_NULL, null=True, blank=True, related_name='recorrencias'
+    )
+    observacao = models.TextField(blank=True, null=True)
+    frequencia = models.CharField(max_length=10, choices=FREQUENCIA_CHOICES, default='mensal')
+    # A cada quantas semanas/meses/anos (2 + mensal = bimestral)
+    intervalo = models.PositiveSmallIntegerField(default=1)
+    # A primeira ocorrência; o dia (da semana, do mês) vem daqui. Dia 31 cai
+    # no último dia dos meses mais curtos.
+    inicio = models.DateField()
+    fim = models.DateField(blank=True, null=True)
+    ativa = models.BooleanField(default=True)
+    gerada_ate = models.DateField(blank=True, null=True)
+    criada_em = models.DateTimeField(auto_now_add=True)
+    atualizada_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['inicio', 'id']
+        indexes = [
+            models.Index(fields=['user', 'atualizada_em', 'id'], name='recorrencia_user_atual_idx'),
+            # Regras com ocorrências vencidas (geração em lote)
+            models.Index(fields=['ativa', 'gerada_ate'], name='recorrencia_ativa_gerada_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.descricao} - {self.valor} ({self.get_frequencia_display()})"
+
+# ============================================
+# 4.4 ARQUIVO (TRANSAÇÕES ANTIGAS)
+# ============================================
+
+class ArquivoTransacoes(models.Model):
+    """
+    Transações antigas de um usuário em um ano, tiradas da tabela
+    Transacao e guardadas num segmento comprimido (JSON + zstd), no próprio
+    banco (`dados`) ou em MEDIA_ROOT/arquivo/ (`arquivo`). Ver contas/arquivo.py.
+
+    O ResumoMensal continua com a contribuição delas, então totais,
+    estatísticas e séries mensais não mudam. Pedir um período antigo (ou
+    exportar) restaura o ano inteiro para a tabela, com os mesmos ids.
+    """
+    # db_index=False: a restrição única abaixo já começa por user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='arquivos_transacoes', db_index=False)
+    ano = models.PositiveSmallIntegerField()
+    quantidade = models.PositiveIntegerField(default=0)
+    dados = models.BinaryField(blank=True, null=True)
+    arquivo = models.CharField(max_length=255, blank=True)
+    tamanho = models.PositiveIntegerField(default=0)  # Bytes do segmento comprimido
+    arquivado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['ano']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'ano'], name='arquivo_user_ano_unico'),
+        ]
+
+    def __str__(self):
+        return f"Arquivo {self.ano} de {self.user_id} ({self.quantidade} transações)"
+
+# ============================================
+# 5. SIGNALS (AUTOMAÇÃO AO CRIAR USUÁRIO)
+# ============================================
+
+# Modelos do onboarding: cada usuário novo recebe uma cópia destes registros.
+CATEGORIAS_PADRAO = (
+    # RECEITAS
+    {'nome': 'Salário', 'tipo': 'receita', 'icone': 'bx-money', 'cor': '#28a745'},
+    {'nome': 'Investimentos', 'tipo': 'receita', 'icone': 'bx-line-chart', 'cor': '#17a2b8'},
+    {'nome': 'Freelance', 'tipo': 'receita', 'icone': 'bx-laptop', 'cor': '#ffc107'},
+    # DESPESAS
+    {'nome': 'Alimentação', 'tipo': 'despesa', 'icone': 'bx-restaurant', 'cor': '#dc3545'},
+    {'nome': 'Moradia', 'tipo': 'despesa', 'icone': 'bx-home', 'cor': '#fd7e14'},
+    {'nome': 'Transporte', 'tipo': 'despesa', 'icone': 'bx-car', 'cor': '#6c757d'},
+    {'nome': 'Lazer', 'tipo': 'despesa', 'icone': 'bx-joystick', 'cor': '#6f42c1'},
+    {'nome': 'Saúde', 'tipo': 'despesa', 'icone': 'bx-pulse', 'cor': '#e83e8c'},
+    {'nome': 'Educação', 'tipo': 'despesa', 'icone': 'bx-book', 'cor': '#20c997'},
+)
+
+# 'prazo_dias' é contado a partir da data do cadastro
+METAS_PADRAO = (
+    {
+        'nome': 'Reserva de Emergência',
+        'tipo': 'Economia',
+        'valor_alvo': '5000.00',
+        'prazo_dias': 365,  # Daqui a 1 ano
+        'descricao': 'Guardar dinheiro para imprevistos.'
+    },
+    {
+        'nome': 'Viagem de Férias',
+        'tipo': 'Lazer',
+        'valor_alvo': '3000.00',
+        'prazo_dias': 180,  # Daqui a 6 meses
+        'descricao': 'Juntar dinheiro para a viagem de fim de ano.'
+    },
+    {
+        'nome': 'Trocar de Celular',
+        'tipo': 'Bens Materiais',
+        'valor_alvo': '2500.00',
+        'prazo_dias': 90,  # Daqui a 3 meses
+        'descricao': 'Economia para o novo modelo.'
+    },
+)
+
+
+@receiver(post_save, sender=User)
+def create_user_data(sender, instance, created, **kwargs):
+    """
+    Quando um usuário é criado, cria automaticamente:
+    1. O Perfil
+    2. As Categorias Padrão (CATEGORIAS_PADRAO)
+    3. As Metas Padrão (METAS_PADRAO)
+
+    São 3 INSERTs (um por tabela) em vez de um por registro. O atomic não
+    abre savepoint: dentro do atomic do register_view tudo vira uma só
+    transação; fora dele, o onboarding continua sendo tudo ou nada.
+    """
+    if not created:
+        return
+
+    hoje = date.today()
+    with transaction.atomic(savepoint=False):
+        UserProfile.objects.create(user=instance)
+        Categoria.objects.bulk_create([
+            Categoria(user=instance, **cat) for cat in CATEGORIAS_PADRAO
+        ])
+        Meta.objects.bulk_create([
+            Meta(
                 user=instance,
                 nome=m['nome'],
                 tipo=m['tipo'],
                 valor_alvo=m['valor_alvo'],
-                data_limite=m['data_limite'],
+                data_limite=hoje + timedelta(days=m['prazo_dias']),
                 descricao=m['descricao']
             )
+            for m in METAS_PADRAO
+        ])
+
+
+def _exclusao_do_usuario(origin):
+    """True quando a exclusão veio em cascata da remoção do próprio User."""
+    modelo = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return modelo is User
+
+
+@receiver(post_delete, sender=Transacao)
+def remover_do_resumo(sender, instance, origin=None, **kwargs):
+    if _exclusao_do_usuario(origin):
+        return
+    chave, valor = instance.chave_resumo()
+    ResumoMensal.aplicar_deltas({chave: [-valor, -1]})
+
+
+@receiver(pre_delete, sender=Categoria)
+def mover_resumo_para_sem_categoria(sender, instance, origin=None, **kwargs):
+    """
+    O on_delete=SET_NULL da Transacao não dispara signals, então as linhas
+    do resumo desta categoria são somadas no grupo "sem categoria" aqui.
+    As linhas antigas são removidas pelo CASCADE do próprio ResumoMensal.
+    """
+    if _exclusao_do_usuario(origin):
+        return
+    deltas = {}
+    for r in ResumoMensal.objects.filter(categoria=instance).values('user_id', 'mes', 'tipo', 'total', 'quantidade'):
+        acumular_delta(deltas, (r['user_id'], r['mes'], None, r['tipo']), r['total'], r['quantidade'])
+    ResumoMensal.aplicar_deltas(deltas)
+
+
+@receiver(pre_delete, sender=Categoria)
+def marcar_transacoes_sem_categoria(sender, instance, origin=None, **kwargs):
+    """O SET_NULL não passa pelo auto_now: as transações da categoria contam como alteradas."""
+    if _exclusao_do_usuario(origin):
+        return
+    agora = timezone.now()
+    Transacao.objects.filter(categoria=instance).update(atualizada_em=agora)
+    Recorrencia.objects.filter(categoria=instance).update(atualizada_em=agora)
+
+
+@receiver(pre_delete, sender=Recorrencia)
+def marcar_transacoes_sem_recorrencia(sender, instance, origin=None, **kwargs):
+    """Idem para as ocorrências de uma recorrência excluída (o campo 'recorrencia' vira null)."""
+    if _exclusao_do_usuario(origin):
+        return
+    Transacao.objects.filter(recorrencia=instance).update(atualizada_em=timezone.now())
+
+
+@receiver(post_delete, sender=ArquivoTransacoes)
+def remover_arquivo_do_segmento(sender, instance, **kwargs):
+    """Segmento em disco: o arquivo sai junto (inclusive na remoção do User)."""
+    if instance.arquivo:
+        caminho = Path(settings.MEDIA_ROOT) / instance.arquivo
+        transaction.on_commit(lambda: caminho.unlink(missing_ok=True))
+
+
+# Nome usado nas marcas de exclusão e na resposta de /api/sincronizar/
+MODELOS_SINCRONIZADOS = {Categoria: 'categoria', Transacao: 'transacao', Meta: 'meta', Recorrencia: 'recorrencia'}
+
+
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Transacao)
+@receiver(post_delete, sender=Meta)
+@receiver(post_delete, sender=Recorrencia)
+def registrar_exclusao(sender, instance, origin=None, **kwargs):
+    if _exclusao_do_usuario(origin):
+        return
+    Exclusao.objects.create(user_id=instance.user_id, modelo=MODELOS_SINCRONIZADOS[sender], objeto_id=instance.pk)
+
+
+# Qualquer escrita nos dados do usuário muda a versão (ETag das listagens)
+@receiver(post_save, sender=Categoria)
+@receiver(post_save, sender=Transacao)
+@receiver(post_save, sender=Meta)
+@receiver(post_save, sender=Recorrencia)
+def incrementar_versao_ao_salvar(sender, instance, **kwargs):
+    UserProfile.incrementar_versao(instance.user_id)
+
+
+@receiver(post_delete, sender=Categoria)
+@receiver(post_delete, sender=Transacao)
+@receiver(post_delete, sender=Meta)
+@receiver(post_delete, sender=Recorrencia)
+def incrementar_versao_ao_excluir(sender, instance, origin=None, **kwargs):
+    if _exclusao_do_usuario(origin):
+        return
+    UserProfile.incrementar_versao(instance.user_id)
+
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+def incrementar_versao_do_usuario(sender, instance, created, update_fields=None, **kwargs):
+    """O username aparece nas listagens (campo 'user'); o login só grava last_login."""
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    UserProfile.incrementar_versao(instance.pk)
@@ -0,0 +1,77 @@
+"""
+Orçamento mensal por categoria (Categoria.orcamento_mensal).
+
+O realizado de cada categoria no mês já está no ResumoMensal, que o
+save/delete da Transacao (e os caminhos em massa) mantêm atualizado a cada
+escrita. Então:
+
+- /api/categorias/orcamento/?mes=AAAA-MM lê todas as categorias com o
+  realizado do mês numa consulta só (LEFT JOIN no resumo daquele mês);
+- a resposta do POST de /api/transacoes/ informa se a categoria passou do
+  orçamento lendo uma única linha do resumo pela chave única, sem somar
+  as transações do mês.
+
+O realizado é o total do mês no mesmo tipo da categoria (despesas de uma
+categoria de despesa, receitas de uma de receita).
+"""
+
+from decimal import Decimal
+
+from django.db.models import DecimalField, F, FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Categoria, ResumoMensal, inicio_do_mes
+
+ZERO = Decimal('0.00')
+
+
+def _situacao(orcamento, realizado):
+    if orcamento is None:
+        return {'orcamento_mensal': None, 'realizado': realizado, 'restante': None, 'percentual': None,
+                'estourado': False}
+    return {
+        'orcamento_mensal': orcamento,
+        'realizado': realizado,
+        'restante': orcamento - realizado,
+        'percentual': round(realizado * 100 / orcamento, 1) if orcamento else None,
+        'estourado': realizado > orcamento,
+    }
+
+
+def orcamento_do_mes(user, mes):
+    """Orçamento x realizado de todas as categorias do usuário no mês (dia 1)."""
+    categorias = Categoria.objects.filter(user=user).annotate(
+        resumo_do_mes=FilteredRelation('resumomensal', condition=Q(resumomensal__mes=mes)),
+    ).annotate(
+        realizado=Coalesce(
+            Sum('resumo_do_mes__total', filter=Q(resumo_do_mes__tipo=F('tipo'))),
+            Value(ZERO), output_field=DecimalField(max_digits=14, decimal_places=2)
+        ),
+    ).values('id', 'nome', 'tipo', 'cor', 'icone', 'orcamento_mensal', 'realizado').order_by('tipo', 'nome')
+
+    linhas = [{**categoria, **_situacao(categoria['orcamento_mensal'], categoria['realizado'])}
+              for categoria in categorias]
+    com_orcamento = [linha for linha in linhas if linha['orcamento_mensal'] is not None]
+    return {
+        'mes': mes,
+        'categorias': linhas,
+        'total_orcado': sum((linha['orcamento_mensal'] for linha in com_orcamento), ZERO),
+        'total_realizado': sum((linha['realizado'] for linha in com_orcamento), ZERO),
+        'estourados': sum(1 for linha in com_orcamento if linha['estourado']),
+    }
+
+
+def situacao_da_transacao(transacao):
+    """
+    Situação do orçamento da categoria no mês da transação, ou None se a
+    categoria não tem orçamento. Uma consulta (linha do ResumoMensal pela
+    chave única); nenhuma se não há orçamento.
+    """
+    categoria = transacao.categoria
+    if categoria is None or categoria.orcamento_mensal is None or transacao.tipo != categoria.tipo:
+        return None
+    mes = inicio_do_mes(transacao.data)
+    realizado = ResumoMensal.objects.filter(
+        user_id=transacao.user_id, mes=mes, categoria=categoria, tipo=transacao.tipo
+    ).values_list('total', flat=True).first()
+    return {'categoria': categoria.pk, 'mes': mes, **_situacao(categoria.orcamento_mensal, realizado or ZERO)}
@@ -0,0 +1,114 @@
+import base64
+from datetime import date
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+# ============================================
+# PAGINAÇÃO POR CHAVE (KEYSET) DAS TRANSAÇÕES
+# ============================================
+
+class TransacaoKeysetPagination(BasePagination):
+    """
+    Paginação por cursor na ordem (-data, -criada_em, -id).
+
+    Em vez de OFFSET + COUNT(*), cada página continua a partir da última
+    linha da anterior, usando o índice transacao_user_data_idx. O custo por
+    página não depende da profundidade e inserções concorrentes não fazem
+    linhas repetirem ou sumirem entre as páginas.
+
+    Ativada em /api/transacoes/?paginacao=cursor. A resposta traz apenas
+    'next' e 'results' (sem 'count'). Cursor malformado responde 400.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    ordering = ('-data', '-criada_em', '-id')
+
+    # Maior id de um BigAutoField: acima disso o PostgreSQL recusaria o parâmetro
+    MAIOR_ID = 2 ** 63 - 1
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.fechar_pagina(list(self.montar_consulta(queryset, request)))
+
+    def montar_consulta(self, queryset, request):
+        """
+        Queryset (ainda não executado) da página pedida, com uma linha a mais
+        para saber se existe próxima. Separado de fechar_pagina para que a
+        leitura assíncrona (contas/views_async.py) possa iterar com async for.
+        """
+        self.request = request
+        posicao = self.decode_cursor(request)
+
+        if posicao is not None:
+            data, criada_em, pk = posicao
+            # "data <= X" na frente deixa o banco usar o índice como intervalo
+            queryset = queryset.filter(data__lte=data).filter(
+                Q(data__lt=data) |
+                Q(data=data, criada_em__lt=criada_em) |
+                Q(data=data, criada_em=criada_em, id__lt=pk)
+            )
+
+        return queryset.order_by(*self.ordering)[:self.page_size + 1]
+
+    def fechar_pagina(self, linhas):
+        self.has_next = len(linhas) > self.page_size
+        linhas = linhas[:self.page_size]
+        self.ultima = linhas[-1] if linhas else None
+        return linhas
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.ultima is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.ultima))
+
+    # ----- Cursor -----
+
+    @staticmethod
+    def _valor(linha, campo):
+        # Aceita tanto instâncias do model quanto dicionários vindos de .values()
+        return linha[campo] if isinstance(linha, dict) else getattr(linha, campo)
+
+    def encode_cursor(self, linha):
+        texto = '|'.join([
+            self._valor(linha, 'data').isoformat(),
+            self._valor(linha, 'criada_em').isoformat(),
+            str(self._valor(linha, 'id')),
+        ])
+        return base64.urlsafe_b64encode(texto.encode()).decode()
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            texto = base64.urlsafe_b64decode(cursor.encode()).decode()
+            data, criada_em, pk = texto.split('|')
+            criada_em, pk = parse_datetime(criada_em), int(pk)
+            if criada_em is None or not 0 < pk <= self.MAIOR_ID:
+                raise ValueError
+            return date.fromisoformat(data), criada_em, pk
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise ValidationError({self.cursor_query_param: 'Cursor inválido.'})
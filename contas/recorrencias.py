@@ -0,0 +1,183 @@
+"""
+Transações recorrentes (model Recorrencia).
+
+- `ocorrencias` calcula as datas de uma regra num intervalo, sob demanda.
+- `gerar_ocorrencias` grava como Transacao as ocorrências já vencidas de
+  todos os usuários numa passada em lotes (comando gerar_recorrencias,
+  agendado uma vez por dia). Por lote: uma consulta para as regras, uma
+  para conferir as ocorrências existentes, os INSERTs em massa, o UPDATE
+  de `gerada_ate` e o ResumoMensal por deltas. Rodar de novo não duplica
+  nada: `gerada_ate` avança junto com os INSERTs (na mesma transação) e a
+  restrição única (recorrencia, data) segura o resto.
+- `projetar` lista as ocorrências futuras sem gravá-las, então horizontes
+  longos não ocupam espaço no banco.
+"""
+
+import heapq
+from calendar import monthrange
+from datetime import date, timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Recorrencia, ResumoMensal, Transacao, UserProfile, acumular_delta
+
+TAMANHO_LOTE = 500
+
+MAXIMO_PROJECAO = 1000
+
+
+# ============================================
+# DATAS DAS OCORRÊNCIAS
+# ============================================
+
+def _somar_meses(data, meses, dia):
+    indice = data.year * 12 + data.month - 1 + meses
+    ano, mes = divmod(indice, 12)
+    mes += 1
+    return date(ano, mes, min(dia, monthrange(ano, mes)[1]))
+
+
+def _ocorrencia(recorrencia, indice):
+    """Data da ocorrência `indice` (0 = inicio), sempre calculada a partir do início."""
+    passo = indice * recorrencia.intervalo
+    if recorrencia.frequencia == 'semanal':
+        return recorrencia.inicio + timedelta(weeks=passo)
+    if recorrencia.frequencia == 'anual':
+        passo *= 12
+    # Calculado do início (e não da ocorrência anterior): 31/01 -> 28/02 -> 31/03
+    return _somar_meses(recorrencia.inicio, passo, recorrencia.inicio.day)
+
+
+def _primeiro_indice(recorrencia, desde):
+    """Um índice que não passa da primeira ocorrência >= desde."""
+    if desde <= recorrencia.inicio:
+        return 0
+    if recorrencia.frequencia == 'semanal':
+        return (desde - recorrencia.inicio).days // (7 * recorrencia.intervalo)
+    meses = (desde.year - recorrencia.inicio.year) * 12 + desde.month - recorrencia.inicio.month
+    passo = recorrencia.intervalo * (12 if recorrencia.frequencia == 'anual' else 1)
+    return max(meses // passo - 1, 0)
+
+
+def ocorrencias(recorrencia, desde, ate):
+    """Datas da regra em [desde, ate], respeitando inicio e fim, em ordem."""
+    if recorrencia.fim is not None:
+        ate = min(ate, recorrencia.fim)
+    indice = _primeiro_indice(recorrencia, desde)
+    while True:
+        data = _ocorrencia(recorrencia, indice)
+        if data > ate:
+            return
+        if data >= desde:
+            yield data
+        indice += 1
+
+
+def _pendentes_desde(recorrencia):
+    """Primeira data ainda não gerada da regra."""
+    if recorrencia.gerada_ate is None:
+        return recorrencia.inicio
+    return max(recorrencia.inicio, recorrencia.gerada_ate + timedelta(days=1))
+
+
+# ============================================
+# GERAÇÃO DAS OCORRÊNCIAS VENCIDAS
+# ============================================
+
+def recorrencias_vencidas(hoje):
+    """Regras ativas com ocorrências até `hoje` ainda não geradas."""
+    return Recorrencia.objects.filter(ativa=True, inicio__lte=hoje).filter(
+        Q(gerada_ate__isnull=True) | Q(gerada_ate__lt=hoje)
+    ).exclude(fim__isnull=False, gerada_ate__gte=F('fim'))
+
+
+def _gerar_lote(regras, hoje):
+    """Grava as ocorrências vencidas de `regras` (já travadas). Devolve o número de transações criadas."""
+    pendentes = {regra.pk: _pendentes_desde(regra) for regra in regras}
+    existentes = set(
+        Transacao.objects.filter(recorrencia_id__in=pendentes, data__gte=min(pendentes.values()))
+        .values_list('recorrencia_id', 'data')
+    )
+
+    novas, deltas, usuarios = [], {}, set()
+    for regra in regras:
+        for data in ocorrencias(regra, pendentes[regra.pk], hoje):
+            if (regra.pk, data) in existentes:
+                continue
+            transacao = Transacao(
+                user_id=regra.user_id, descricao=regra.descricao, valor=regra.valor, tipo=regra.tipo,
+                categoria_id=regra.categoria_id, observacao=regra.observacao, data=data, recorrencia=regra
+            )
+            acumular_delta(deltas, *transacao.chave_resumo(), 1)
+            novas.append(transacao)
+            usuarios.add(regra.user_id)
+        # Até onde a regra foi gerada; com fim no passado, para no fim
+        regra.gerada_ate = min(hoje, regra.fim) if regra.fim else hoje
+
+    # bulk_create e bulk_update não disparam signals: resumo e versão aqui
+    Transacao.objects.bulk_create(novas, batch_size=TAMANHO_LOTE)
+    Recorrencia.objects.bulk_update(regras, ['gerada_ate'])
+    ResumoMensal.aplicar_deltas(deltas)
+    UserProfile.incrementar_versoes(usuarios)
+    return len(novas)
+
+
+def gerar_ocorrencias(hoje=None, regras=None):
+    """
+    Gera as transações vencidas até `hoje` (padrão: hoje) das regras
+    (padrão: de todos os usuários). Devolve {'recorrencias', 'transacoes'}.
+
+    Cada lote roda na sua transação e trava as regras que processa
+    (SKIP LOCKED no PostgreSQL; no SQLite a escrita já é exclusiva), então
+    duas execuções ao mesmo tempo não geram a mesma ocorrência.
+    """
+    hoje = hoje or date.today()
+    vencidas = recorrencias_vencidas(hoje)
+    if regras is not None:
+        vencidas = vencidas.filter(pk__in=regras)
+
+    total = {'recorrencias': 0, 'transacoes': 0}
+    ultimo = 0
+    while True:
+        with transaction.atomic():
+            lote = list(
+                vencidas.filter(pk__gt=ultimo).order_by('pk').select_for_update(skip_locked=True)[:TAMANHO_LOTE]
+            )
+            if not lote:
+                return total
+            total['transacoes'] += _gerar_lote(lote, hoje)
+        total['recorrencias'] += len(lote)
+        ultimo = lote[-1].pk
+
+
+# ============================================
+# PROJEÇÃO (SEM GRAVAR)
+# ============================================
+
+def _fluxo(regra, desde, ate):
+    for data in ocorrencias(regra, max(desde, _pendentes_desde(regra)), ate):
+        yield data, regra.pk, regra
+
+
+def projetar(user, desde, ate, limite=MAXIMO_PROJECAO):
+    """
+    Ocorrências das regras ativas do usuário em [desde, ate] que ainda não
+    viraram transação, em ordem de data. Devolve (ocorrências, truncado).
+    """
+    regras = Recorrencia.objects.filter(user=user, ativa=True, inicio__lte=ate).exclude(fim__lt=desde)
+    fluxos = [_fluxo(regra, desde, ate) for regra in regras.select_related('categoria')]
+    itens = list(islice(heapq.merge(*fluxos, key=lambda item: item[:2]), limite + 1))
+    return [
+        {
+            'recorrencia': regra.pk,
+            'descricao': regra.descricao,
+            'valor': regra.valor,
+            'tipo': regra.tipo,
+            'categoria': regra.categoria_id,
+            'categoria_nome': regra.categoria.nome if regra.categoria else None,
+            'data': data,
+        }
+        for data, _, regra in itens[:limite]
+    ], len(itens) > limite
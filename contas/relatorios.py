@@ -0,0 +1,294 @@
+"""
+Relatórios detalhados gerados fora da requisição (RelatorioSnapshot).
+
+O pedido só grava o snapshot como 'pendente'; um worker em segundo plano
+(thread do próprio processo ou `python manage.py processar_relatorios`)
+calcula o relatório completo do período, renderiza o HTML e o guarda
+comprimido em disco. Pedidos repetidos com os mesmos dados reaproveitam
+o arquivo pronto.
+
+Um snapshot pendente ou processando há mais de RELATORIOS_TIMEOUT_MINUTOS
+está travado (a thread morreu com o processo, o worker caiu): o pedido
+seguinte o marca como erro e enfileira outro, e o processar_relatorios
+devolve os que estavam processando para a fila.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+
+from .arquivo import restaurar_periodo
+from .models import Meta, RelatorioSnapshot, Transacao, UserProfile
+
+logger = logging.getLogger(__name__)
+
+# Muda quando o layout do relatório muda, para invalidar os arquivos antigos
+VERSAO_LAYOUT = '1'
+
+MARCADORES = {
+    'receita': '<!--TRANSACOES_RECEITA-->',
+    'despesa': '<!--TRANSACOES_DESPESA-->',
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# ============================================
+# PEDIDO E IMPRESSÃO DIGITAL
+# ============================================
+
+def transacoes_do_periodo(user, inicio=None, fim=None):
+    queryset = Transacao.objects.filter(user=user)
+    if inicio:
+        queryset = queryset.filter(data__gte=inicio)
+    if fim:
+        queryset = queryset.filter(data__lte=fim)
+    return queryset
+
+
+def calcular_impressao_digital(user, inicio=None, fim=None):
+    """
+    Resume o estado dos dados usados no relatório em um hash, a partir da
+    versao_dados do perfil: qualquer escrita em transações, metas ou
+    categorias (ou no nome do usuário) muda o resultado. É uma leitura pela
+    chave primária, no lugar das agregações sobre o histórico.
+    """
+    versao = UserProfile.objects.filter(user=user).values_list('versao_dados', flat=True).first()
+    partes = [VERSAO_LAYOUT, str(inicio), str(fim), user.pk, versao]
+    return hashlib.sha256(repr(partes).encode()).hexdigest()
+
+
+def solicitar_relatorio(user, inicio=None, fim=None):
+    """
+    Retorna (snapshot, criado). Se já existe um snapshot com a mesma
+    impressão digital, ele é reaproveitado; senão um novo é enfileirado.
+    Anos arquivados do período voltam para a tabela antes da impressão digital.
+    """
+    restaurar_periodo(user, inicio, fim)
+    expirar_travados(RelatorioSnapshot.objects.filter(user=user, inicio=inicio, fim=fim))
+    digital = calcular_impressao_digital(user, inicio, fim)
+    existente = RelatorioSnapshot.objects.filter(
+        user=user, inicio=inicio, fim=fim, impressao_digital=digital
+    ).exclude(status='erro').first()
+    if existente:
+        return existente, False
+
+    snapshot = RelatorioSnapshot.objects.create(user=user, inicio=inicio, fim=fim, impressao_digital=digital)
+    transaction.on_commit(lambda: enfileirar(snapshot.pk))
+    return snapshot, True
+
+
+# ============================================
+# SNAPSHOTS TRAVADOS
+# ============================================
+
+def travados(queryset=None):
+    """Pendentes desde antes do limite, ou processando desde antes dele."""
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'RELATORIOS_TIMEOUT_MINUTOS', 15))
+    queryset = RelatorioSnapshot.objects.all() if queryset is None else queryset
+    return queryset.filter(
+        Q(status='pendente', criado_em__lt=limite)
+        | Q(status='processando', iniciado_em__lt=limite)
+        # Assumido antes de existir o iniciado_em
+        | Q(status='processando', iniciado_em__isnull=True, criado_em__lt=limite)
+    )
+
+
+def expirar_travados(queryset=None):
+    """Marca os travados como erro: o próximo pedido do período cria outro snapshot. Retorna quantos."""
+    return travados(queryset).update(status='erro', erro='Tempo esgotado na geração do relatório.')
+
+
+def retomar_travados():
+    """Devolve para 'pendente' os que ficaram processando além do limite. Retorna quantos."""
+    return travados().filter(status='processando').update(status='pendente', iniciado_em=None)
+
+
+# ============================================
+# WORKER
+# ============================================
+
+def enfileirar(snapshot_id):
+    """
+    Envia o snapshot para a thread de geração. Com RELATORIOS_EM_SEGUNDO_PLANO
+    desligado, ele fica pendente para o comando processar_relatorios.
+    """
+    global _executor
+    if not getattr(settings, 'RELATORIOS_EM_SEGUNDO_PLANO', True):
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'RELATORIOS_WORKERS', 1),
+                thread_name_prefix='relatorios'
+            )
+    _executor.submit(_executar_em_thread, snapshot_id)
+
+
+def _executar_em_thread(snapshot_id):
+    try:
+        gerar_relatorio(snapshot_id)
+    finally:
+        # A conexão é por thread; fecha para não acumular conexões abertas
+        connection.close()
+
+
+def caminho_arquivo(snapshot):
+    return Path(settings.MEDIA_ROOT) / snapshot.arquivo
+
+
+def gerar_relatorio(snapshot_id):
+    """
+    Gera o arquivo de um snapshot pendente. Retorna False se outro worker já o pegou.
+
+    O iniciado_em gravado ao assumir serve de ficha: o status final só é
+    gravado se o snapshot ainda estiver 'processando' com a mesma ficha.
+    Um worker dado como travado (retomado ou expirado enquanto escrevia)
+    não sobrescreve o resultado de quem o assumiu depois.
+    """
+    iniciado_em = timezone.now()
+    assumidos = RelatorioSnapshot.objects.filter(pk=snapshot_id, status='pendente').update(
+        status='processando', iniciado_em=iniciado_em
+    )
+    if not assumidos:
+        return False
+    meu = RelatorioSnapshot.objects.filter(pk=snapshot_id, status='processando', iniciado_em=iniciado_em)
+
+    snapshot = RelatorioSnapshot.objects.select_related('user').get(pk=snapshot_id)
+    relativo = Path('relatorios') / str(snapshot.user_id) / f'{snapshot.pk}.html.gz'
+    destino = Path(settings.MEDIA_ROOT) / relativo
+    # Um worker dado como travado pode ainda estar escrevendo: cada um no seu temporário
+    temporario = destino.with_name(f'{destino.name}.{os.getpid()}-{threading.get_ident()}.tmp')
+
+    try:
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(temporario, 'wt', encoding='utf-8', compresslevel=6) as arquivo:
+            escrever_relatorio(arquivo, snapshot)
+        os.replace(temporario, destino)
+    except Exception as erro:
+        logger.exception('Falha ao gerar o relatório %s', snapshot_id)
+        temporario.unlink(missing_ok=True)
+        meu.update(status='erro', erro=str(erro))
+        return False
+
+    concluidos = meu.update(
+        status='pronto', arquivo=str(relativo), tamanho=destino.stat().st_size,
+        concluido_em=timezone.now()
+    )
+    if not concluidos:
+        logger.warning('Relatório %s retomado por outro worker durante a geração', snapshot_id)
+        return False
+    _remover_versoes_antigas(snapshot)
+    return True
+
+
+def _remover_versoes_antigas(snapshot):
+    """Apaga snapshots do mesmo período com dados desatualizados (e seus arquivos)."""
+    antigos = RelatorioSnapshot.objects.filter(
+        user_id=snapshot.user_id, inicio=snapshot.inicio, fim=snapshot.fim
+    ).exclude(pk=snapshot.pk).exclude(status__in=['pendente', 'processando'])
+    for antigo in antigos:
+        if antigo.arquivo:
+            caminho_arquivo(antigo).unlink(missing_ok=True)
+    antigos.delete()
+
+
+# ============================================
+# CONTEÚDO DO RELATÓRIO
+# ============================================
+
+def formatar_moeda(valor):
+    texto = f'{Decimal(valor or 0):,.2f}'.replace(',', '_').replace('.', ',').replace('_', '.')
+    return f'R$ {texto}'
+
+
+def montar_contexto(snapshot):
+    user = snapshot.user
+    transacoes = transacoes_do_periodo(user, snapshot.inicio, snapshot.fim)
+
+    totais = {'receita': Decimal(0), 'despesa': Decimal(0)}
+    categorias = {'receita': [], 'despesa': []}
+    agrupado = transacoes.values('tipo', 'categoria__nome').annotate(
+        total=Sum('valor'), quantidade=Count('id')
+    ).order_by('tipo', '-total')
+    for item in agrupado:
+        totais[item['tipo']] += item['total']
+        categorias[item['tipo']].append({
+            'nome': item['categoria__nome'] or 'Sem Categoria',
+            'total': formatar_moeda(item['total']),
+            'quantidade': item['quantidade'],
+        })
+
+    metas = []
+    for meta in Meta.objects.filter(user=user).order_by('-criada_em'):
+        percentual = meta.percentual
+        metas.append({
+            'nome': meta.nome,
+            'atual': formatar_moeda(meta.valor_atual),
+            'alvo': formatar_moeda(meta.valor_alvo),
+            'percentual': round(percentual),
+            'barra': min(round(percentual), 100),
+        })
+
+    saldo = totais['receita'] - totais['despesa']
+    return {
+        'usuario': user.get_full_name() or user.username,
+        'inicio': snapshot.inicio,
+        'fim': snapshot.fim,
+        'gerado_em': timezone.localtime(),
+        'total_receitas': formatar_moeda(totais['receita']),
+        'total_despesas': formatar_moeda(totais['despesa']),
+        'saldo': formatar_moeda(saldo),
+        'saldo_negativo': saldo < 0,
+        'categorias_receita': categorias['receita'],
+        'categorias_despesa': categorias['despesa'],
+        'metas': metas,
+        'marcador_receitas': MARCADORES['receita'],
+        'marcador_despesas': MARCADORES['despesa'],
+    }
+
+
+def _linhas_transacoes(snapshot, tipo):
+    """Linhas <tr> das transações do tipo, lidas do banco em blocos."""
+    linhas = transacoes_do_periodo(snapshot.user, snapshot.inicio, snapshot.fim).filter(tipo=tipo).order_by(
+        'data', 'id'
+    ).values_list('data', 'descricao', 'categoria__nome', 'valor').iterator(chunk_size=2000)
+
+    vazio = True
+    for data, descricao, categoria, valor in linhas:
+        vazio = False
+        yield (
+            f'<tr><td>{data:%d/%m/%Y}</td><td>{escape(descricao)}</td>'
+            f'<td>{escape(categoria or "Geral")}</td><td>{formatar_moeda(valor)}</td></tr>\n'
+        )
+    if vazio:
+        yield '<tr><td colspan="4" class="vazio">Nenhuma transação no período.</td></tr>\n'
+
+
+def escrever_relatorio(arquivo, snapshot):
+    """
+    Renderiza o template e escreve as tabelas de transações no lugar dos
+    marcadores, linha a linha, sem montar a lista inteira em memória.
+    """
+    html = render_to_string('contas/relatorio.html', montar_contexto(snapshot))
+    restante = html
+    for tipo, marcador in MARCADORES.items():
+        antes, restante = restante.split(marcador, 1)
+        arquivo.write(antes)
+        for linha in _linhas_transacoes(snapshot, tipo):
+            arquivo.write(linha)
+    arquivo.write(restante)
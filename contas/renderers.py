@@ -0,0 +1,43 @@
+"""
+Renderer JSON da API com orjson.
+
+Gera os mesmos bytes que o JSONRenderer do DRF (compacto, UTF-8, datas e
+Decimal no formato do encoder do DRF), mas o orjson serializa dicionários,
+listas, strings e números em C. Os tipos que ele não conhece (Decimal,
+datetime, date, time, UUID, textos traduzíveis...) vão para o default do
+encoder do DRF, então o formato não muda.
+
+Sem o orjson instalado, ou com indentação pedida (?format=json com
+'; indent=4' no Accept), cai no JSONRenderer do DRF.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datas passam pelo encoder do DRF (milissegundos e 'Z', como no JSONRenderer)
+_OPCOES = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_padrao = encoders.JSONEncoder().default
+
+
+class JSONRapidoRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            resultado = orjson.dumps(data, default=_padrao, option=_OPCOES)
+        except TypeError:
+            # JSONEncodeError: inteiros acima de 64 bits, aninhamento muito fundo
+            return super().render(data, accepted_media_type, renderer_context)
+        # Como o DRF: U+2028/U+2029 são válidos em JSON, mas não em JavaScript
+        if b'\xe2\x80\xa8' in resultado or b'\xe2\x80\xa9' in resultado:
+            resultado = resultado.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return resultado
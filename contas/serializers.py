@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Categoria, Transacao, Meta
+from .models import Categoria, Transacao, Meta, Recorrencia, RelatorioSnapshot
 
 # ============================================
 # USER SERIALIZER (ATUALIZADO)
@@ -56,8 +56,16 @@ class CategoriaSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Categoria
-        fields = ['id', 'nome', 'tipo', 'icone', 'cor', 'descricao', 'user', 'criada_em']
-        read_only_fields = ['id', 'user', 'criada_em']
+        fields = [
+            'id', 'nome', 'tipo', 'icone', 'cor', 'descricao', 'orcamento_mensal',
+            'user', 'criada_em', 'atualizada_em'
+        ]
+        read_only_fields = ['id', 'user', 'criada_em', 'atualizada_em']
+
+    def validate_orcamento_mensal(self, valor):
+        if valor is not None and valor < 0:
+            raise serializers.ValidationError('O orçamento não pode ser negativo.')
+        return valor
 
 # ============================================
 # TRANSACAO SERIALIZER
@@ -71,15 +79,66 @@ class TransacaoSerializer(serializers.ModelSerializer):
         model = Transacao
         fields = [
             'id', 'descricao', 'valor', 'tipo', 'categoria', 
-            'categoria_nome', 'data', 'observacao', 'user', 'criada_em'
+            'categoria_nome', 'data', 'observacao', 'user', 'criada_em', 'atualizada_em', 'recorrencia'
         ]
-        read_only_fields = ['id', 'user', 'criada_em']
+        read_only_fields = ['id', 'user', 'criada_em', 'atualizada_em', 'recorrencia']
     
     def get_categoria_nome(self, obj):
         if obj.categoria:
             return obj.categoria.nome
         return None
 
+    def validate_categoria(self, categoria):
+        # Categoria de outro usuário não entra (nem no orçamento devolvido na criação)
+        request = self.context.get('request')
+        if categoria is not None and request is not None and categoria.user_id != request.user.id:
+            raise serializers.ValidationError('Categoria não encontrada.')
+        return categoria
+
+# ============================================
+# TRANSACAO - ESCRITA EM LOTE (/api/transacoes/lote/)
+# ============================================
+
+class TransacaoLoteSerializer(serializers.ModelSerializer):
+    """
+    Campos de uma operação do lote. A categoria chega como id simples: a
+    posse é conferida de uma vez para o lote inteiro (contas/lote.py), em vez
+    de uma consulta por item como no PrimaryKeyRelatedField.
+    """
+    categoria = serializers.IntegerField(allow_null=True, required=False)
+
+    class Meta:
+        model = Transacao
+        fields = ['descricao', 'valor', 'tipo', 'categoria', 'data', 'observacao']
+
+# ============================================
+# TRANSACAO - LEITURA LEVE (?leve=1)
+# ============================================
+
+class TransacaoLeituraSerializer(serializers.Serializer):
+    """
+    Mesmo formato do TransacaoSerializer, mas lê dicionários vindos de
+    .values(*CAMPOS), sem instanciar o model nem acessar as relações.
+    Usado na listagem de /api/transacoes/ quando pedida com ?leve=1.
+    """
+    CAMPOS = [
+        'id', 'descricao', 'valor', 'tipo', 'categoria_id', 'categoria__nome',
+        'data', 'observacao', 'user__username', 'criada_em', 'atualizada_em', 'recorrencia_id'
+    ]
+
+    id = serializers.IntegerField(read_only=True)
+    descricao = serializers.CharField(read_only=True)
+    valor = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    tipo = serializers.CharField(read_only=True)
+    categoria = serializers.IntegerField(source='categoria_id', read_only=True)
+    categoria_nome = serializers.CharField(source='categoria__nome', read_only=True)
+    data = serializers.DateField(read_only=True)
+    observacao = serializers.CharField(read_only=True)
+    user = serializers.CharField(source='user__username', read_only=True)
+    criada_em = serializers.DateTimeField(read_only=True)
+    atualizada_em = serializers.DateTimeField(read_only=True)
+    recorrencia = serializers.IntegerField(source='recorrencia_id', read_only=True)
+
 # ============================================
 # META SERIALIZER
 # ============================================
@@ -91,6 +150,55 @@ class MetaSerializer(serializers.ModelSerializer):
         model = Meta
         fields = [
             'id', 'nome', 'tipo', 'valor_alvo', 'valor_atual', 
-            'data_limite', 'descricao', 'user', 'criada_em'
+            'data_limite', 'descricao', 'user', 'criada_em', 'atualizada_em'
         ]
-        read_only_fields = ['id', 'user', 'criada_em']
\ No newline at end of file
+        read_only_fields = ['id', 'user', 'criada_em', 'atualizada_em']
+
+# ============================================
+# RECORRÊNCIA SERIALIZER
+# ============================================
+
+class RecorrenciaSerializer(serializers.ModelSerializer):
+    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True, default=None)
+
+    class Meta:
+        model = Recorrencia
+        fields = [
+            'id', 'descricao', 'valor', 'tipo', 'categoria', 'categoria_nome', 'observacao',
+            'frequencia', 'intervalo', 'inicio', 'fim', 'ativa', 'gerada_ate', 'criada_em', 'atualizada_em'
+        ]
+        read_only_fields = ['id', 'gerada_ate', 'criada_em', 'atualizada_em']
+
+    def validate_intervalo(self, valor):
+        if valor < 1:
+            raise serializers.ValidationError('O intervalo deve ser de pelo menos 1.')
+        return valor
+
+    def validate_categoria(self, categoria):
+        request = self.context.get('request')
+        if categoria is not None and request is not None and categoria.user_id != request.user.id:
+            raise serializers.ValidationError('Categoria não encontrada.')
+        return categoria
+
+    def validate(self, attrs):
+        inicio = attrs.get('inicio', getattr(self.instance, 'inicio', None))
+        fim = attrs.get('fim', getattr(self.instance, 'fim', None))
+        if inicio and fim and inicio > fim:
+            raise serializers.ValidationError('A data de início deve ser anterior ao fim.')
+        return attrs
+
+# ============================================
+# RELATÓRIO (SNAPSHOT)
+# ============================================
+
+class RelatorioSnapshotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RelatorioSnapshot
+        fields = ['id', 'inicio', 'fim', 'status', 'tamanho', 'erro', 'criado_em', 'concluido_em']
+        read_only_fields = ['id', 'status', 'tamanho', 'erro', 'criado_em', 'concluido_em']
+
+    def validate(self, attrs):
+        inicio, fim = attrs.get('inicio'), attrs.get('fim')
+        if inicio and fim and inicio > fim:
+            raise serializers.ValidationError('A data de início deve ser anterior ao fim.')
+        return attrs
@@ -0,0 +1,240 @@
+"""
+Série temporal do fluxo de caixa (/api/transacoes/serie/).
+
+As somas de cada período saem de um GROUP BY no banco (Trunc na data) e o
+saldo acumulado de uma window function sobre esse agrupamento. Períodos
+sem movimento são preenchidos aqui, então o front recebe a série pronta
+para o gráfico.
+
+Com granularidade mensal ou anual e o intervalo em meses inteiros, a soma
+vem do ResumoMensal (uma linha por mês x categoria x tipo) em vez das
+transações: um gráfico de 5 anos lê algumas centenas de linhas.
+"""
+
+import calendar
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Case, Count, DateField, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Trunc
+
+from .models import ResumoMensal, Transacao, inicio_do_mes
+
+GRANULARIDADES = {'dia': 'day', 'semana': 'week', 'mes': 'month', 'ano': 'year'}
+
+# Quantos períodos mostrar quando 'inicio' não é informado
+PONTOS_PADRAO = {'dia': 30, 'semana': 12, 'mes': 12, 'ano': 5}
+MAXIMO_PONTOS = 2000
+
+# Datas aceitas em inicio/fim: com um ano de folga em cada ponta, o período
+# seguinte e o anterior nunca saem do intervalo do datetime.date
+DATA_MINIMA = date(2, 1, 1)
+DATA_MAXIMA = date(9998, 12, 31)
+
+CENTAVO = Decimal('0.01')
+_DECIMAL = DecimalField(max_digits=14, decimal_places=2)
+
+
+# ============================================
+# PERÍODOS
+# ============================================
+
+def inicio_do_periodo(data, granularidade):
+    if granularidade == 'semana':
+        return data - timedelta(days=data.weekday())  # Segunda-feira, como o TruncWeek
+    if granularidade == 'mes':
+        return data.replace(day=1)
+    if granularidade == 'ano':
+        return data.replace(month=1, day=1)
+    return data
+
+
+def proximo_periodo(data, granularidade):
+    if granularidade == 'dia':
+        return data + timedelta(days=1)
+    if granularidade == 'semana':
+        return data + timedelta(days=7)
+    if granularidade == 'mes':
+        return (data.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return data.replace(year=data.year + 1, month=1, day=1)
+
+
+def periodo_anterior(data, granularidade):
+    return inicio_do_periodo(inicio_do_periodo(data, granularidade) - timedelta(days=1), granularidade)
+
+
+def contar_periodos(inicio, fim, granularidade):
+    """Quantos períodos listar_periodos devolveria, sem montar a lista."""
+    if granularidade == 'dia':
+        return (fim - inicio).days + 1
+    if granularidade == 'semana':
+        return (inicio_do_periodo(fim, 'semana') - inicio_do_periodo(inicio, 'semana')).days // 7 + 1
+    if granularidade == 'mes':
+        return (fim.year - inicio.year) * 12 + fim.month - inicio.month + 1
+    return fim.year - inicio.year + 1
+
+
+def listar_periodos(inicio, fim, granularidade):
+    periodos = []
+    atual = inicio_do_periodo(inicio, granularidade)
+    while atual <= fim:
+        periodos.append(atual)
+        atual = proximo_periodo(atual, granularidade)
+    return periodos
+
+
+def inicio_padrao(fim, granularidade):
+    """Início que mostra PONTOS_PADRAO períodos terminando em 'fim'."""
+    inicio = inicio_do_periodo(fim, granularidade)
+    for _ in range(PONTOS_PADRAO[granularidade] - 1):
+        if inicio <= DATA_MINIMA:
+            # Perto do começo do calendário a série fica mais curta
+            return DATA_MINIMA
+        inicio = periodo_anterior(inicio, granularidade)
+    return inicio
+
+
+# ============================================
+# CONSULTAS
+# ============================================
+
+def _filtrar(queryset, tipo, categoria):
+    if tipo:
+        queryset = queryset.filter(tipo=tipo)
+    if categoria == 'nenhuma':
+        queryset = queryset.filter(categoria__isnull=True)
+    elif categoria is not None:
+        queryset = queryset.filter(categoria_id=categoria)
+    return queryset
+
+
+def _somar_por_tipo(campo, tipo):
+    return Sum(Case(When(tipo=tipo, then=F(campo)), default=Value(0, output_field=_DECIMAL), output_field=_DECIMAL))
+
+
+def _saldo(campo):
+    return Sum(Case(When(tipo='receita', then=F(campo)), default=-F(campo), output_field=_DECIMAL))
+
+
+def _meses_inteiros(inicio, fim):
+    return inicio.day == 1 and fim.day == calendar.monthrange(fim.year, fim.month)[1]
+
+
+def usa_resumo(inicio, fim, granularidade):
+    """True quando a série sai só do ResumoMensal (sem ler transações, nem as arquivadas)."""
+    return granularidade in ('mes', 'ano') and _meses_inteiros(inicio, fim)
+
+
+def consulta_agrupada(user, inicio, fim, granularidade, tipo=None, categoria=None):
+    """
+    QuerySet com uma linha por período: periodo, receitas, despesas e
+    quantidade, em ordem de período.
+    """
+    if usa_resumo(inicio, fim, granularidade):
+        queryset = ResumoMensal.objects.filter(user=user, mes__gte=inicio, mes__lte=fim)
+        campo_data, campo_valor, quantidade = 'mes', 'total', Sum('quantidade')
+        # 'mes' já é o primeiro dia do mês
+        sem_trunc = granularidade == 'mes'
+    else:
+        queryset = Transacao.objects.filter(user=user, data__gte=inicio, data__lte=fim)
+        campo_data, campo_valor, quantidade = 'data', 'valor', Count('id')
+        # Agrupar pela própria data segue o índice (user, -data, ...)
+        sem_trunc = granularidade == 'dia'
+
+    periodo = F(campo_data) if sem_trunc else Trunc(campo_data, GRANULARIDADES[granularidade], output_field=DateField())
+    return _filtrar(queryset, tipo, categoria).annotate(periodo=periodo).values('periodo').annotate(
+        receitas=_somar_por_tipo(campo_valor, 'receita'),
+        despesas=_somar_por_tipo(campo_valor, 'despesa'),
+        quantidade=quantidade,
+    ).order_by('periodo')
+
+
+def com_saldo_acumulado(agrupado):
+    """
+    Executa o agrupamento com o saldo acumulado calculado no banco.
+
+    O ORM não aceita uma window function sobre um agregado da mesma
+    consulta, então o agrupamento vira subconsulta:
+    SELECT ..., SUM(receitas - despesas) OVER (ORDER BY periodo) FROM (...).
+    """
+    sql, params = agrupado.query.sql_with_params()
+    q = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {q("periodo")}, {q("receitas")}, {q("despesas")}, {q("quantidade")}, '
+            f'SUM({q("receitas")} - {q("despesas")}) OVER (ORDER BY {q("periodo")}) '
+            f'FROM ({sql}) AS periodos ORDER BY {q("periodo")}',
+            params
+        )
+        return cursor.fetchall()
+
+
+def saldo_anterior(user, inicio, tipo=None, categoria=None):
+    """Saldo de tudo antes de 'inicio': meses fechados do ResumoMensal + dias avulsos."""
+    mes = inicio_do_mes(inicio)
+    anterior = _filtrar(ResumoMensal.objects.filter(user=user, mes__lt=mes), tipo, categoria).aggregate(
+        saldo=_saldo('total')
+    )['saldo'] or 0
+    if inicio > mes:
+        anterior += _filtrar(
+            Transacao.objects.filter(user=user, data__gte=mes, data__lt=inicio), tipo, categoria
+        ).aggregate(saldo=_saldo('valor'))['saldo'] or 0
+    return _centavos(anterior)
+
+
+# ============================================
+# SÉRIE
+# ============================================
+
+def _centavos(valor):
+    # SQLite devolve as somas de decimais como float
+    return Decimal(str(valor or 0)).quantize(CENTAVO)
+
+
+def _como_data(valor):
+    # Sem os conversores do ORM: texto no SQLite, timestamp no DATE_TRUNC do PostgreSQL
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return date.fromisoformat(str(valor)[:10])
+
+
+def montar_serie(user, inicio, fim, granularidade, tipo=None, categoria=None):
+    """
+    Resposta em colunas (um valor por período, prontas para o Chart.js):
+    periodos, receitas, despesas, quantidade e saldo (acumulado, a partir
+    de saldo_inicial).
+    """
+    inicial = saldo_anterior(user, inicio, tipo, categoria)
+    linhas = {
+        _como_data(periodo): (receitas, despesas, quantidade, acumulado)
+        for periodo, receitas, despesas, quantidade, acumulado in com_saldo_acumulado(
+            consulta_agrupada(user, inicio, fim, granularidade, tipo, categoria)
+        )
+    }
+
+    serie = {
+        'granularidade': granularidade,
+        'inicio': inicio,
+        'fim': fim,
+        'saldo_inicial': inicial,
+        'periodos': [],
+        'receitas': [],
+        'despesas': [],
+        'quantidade': [],
+        'saldo': [],
+    }
+    saldo = inicial
+    for periodo in listar_periodos(inicio, fim, granularidade):
+        receitas, despesas, quantidade = Decimal(0), Decimal(0), 0
+        if periodo in linhas:
+            receitas, despesas, quantidade, acumulado = linhas[periodo]
+            saldo = inicial + _centavos(acumulado)
+        serie['periodos'].append(periodo)
+        serie['receitas'].append(_centavos(receitas))
+        serie['despesas'].append(_centavos(despesas))
+        serie['quantidade'].append(int(quantidade))
+        serie['saldo'].append(saldo)
+    return serie
@@ -0,0 +1,180 @@
+"""
+Sincronização incremental (/api/sincronizar/).
+
+O front guarda uma cópia local de categorias, transações, metas e
+recorrências e pede só o que mudou desde o último cursor: registros
+criados ou alterados (atualizada_em) e ids excluídos (marcas em Exclusao).
+
+Cada rodada cobre a janela (desde, ate], com `ate` fixado no início da
+rodada; páginas seguem a ordem (atualizada_em, id) de cada tipo, então
+linhas gravadas em massa com o mesmo horário não se perdem entre páginas.
+Quando a rodada termina, o próximo cursor começa em `ate - MARGEM`: uma
+escrita que confirmou depois da leitura, mas com horário anterior a `ate`,
+volta na próxima rodada. Os registros podem repetir; o cliente aplica como
+upsert (e depois as exclusões), o que é idempotente.
+
+Sem cursor, ou com um cursor mais antigo que SINCRONIZACAO_RETENCAO_DIAS
+(as marcas de exclusão já podem ter sido apagadas), a resposta vem com
+'completo': true e o cliente substitui a cópia local.
+"""
+
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Categoria, Exclusao, Meta, Recorrencia, Transacao
+from .serializers import CategoriaSerializer, MetaSerializer, RecorrenciaSerializer, TransacaoSerializer
+
+LIMITE_PADRAO = 500
+LIMITE_MAXIMO = 2000
+
+MARGEM = timedelta(seconds=5)
+
+# Chave na resposta -> (model, serializer, relações do serializer, nome em Exclusao)
+TIPOS = {
+    'categorias': (Categoria, CategoriaSerializer, ('user',), 'categoria'),
+    'transacoes': (Transacao, TransacaoSerializer, ('user', 'categoria'), 'transacao'),
+    'metas': (Meta, MetaSerializer, ('user',), 'meta'),
+    'recorrencias': (Recorrencia, RecorrenciaSerializer, ('categoria',), 'recorrencia'),
+}
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def retencao():
+    return timedelta(days=getattr(settings, 'SINCRONIZACAO_RETENCAO_DIAS', 90))
+
+
+# ============================================
+# CURSOR
+# ============================================
+
+# Maior id de um BigAutoField (mesmo limite da paginação por cursor)
+MAIOR_ID = 2 ** 63 - 1
+
+
+def _horario(texto):
+    valor = parse_datetime(texto)
+    # Os cursores saem sempre com fuso; sem ele a comparação com timezone.now() quebraria
+    if valor is None or timezone.is_naive(valor):
+        raise ValueError(texto)
+    return valor
+
+
+def _id(valor):
+    valor = int(valor)
+    if not 0 < valor <= MAIOR_ID:
+        raise ValueError(valor)
+    return valor
+
+
+def codificar_cursor(estado):
+    texto = json.dumps(estado, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """
+    {'desde', 'ate', 'completo', 'posicoes': {tipo: [horario, id] ou None}}
+    com os horários já convertidos; 'ate' e 'posicoes' só existem no meio
+    de uma rodada.
+    """
+    try:
+        estado = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        resultado = {
+            'desde': _horario(estado['desde']) if estado.get('desde') else None,
+            'ate': _horario(estado['ate']) if estado.get('ate') else None,
+            'completo': bool(estado.get('completo')),
+            'posicoes': {},
+        }
+        for tipo, posicao in (estado.get('posicoes') or {}).items():
+            if tipo not in TIPOS and tipo != 'excluidos':
+                raise ValueError(tipo)
+            resultado['posicoes'][tipo] = None if posicao is None else (_horario(posicao[0]), _id(posicao[1]))
+        return resultado
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError, UnicodeDecodeError):
+        # AttributeError: JSON válido que não é um objeto
+        raise CursorInvalido('Cursor inválido.')
+
+
+# ============================================
+# CONSULTAS
+# ============================================
+
+def _pagina(queryset, campo, desde, ate, posicao, limite):
+    """Linhas de (desde, ate] depois de `posicao`, em (campo, id), com uma a mais."""
+    queryset = queryset.filter(**{f'{campo}__lte': ate})
+    if desde is not None:
+        queryset = queryset.filter(**{f'{campo}__gt': desde})
+    if posicao is not None:
+        horario, pk = posicao
+        queryset = queryset.filter(**{f'{campo}__gte': horario}).filter(
+            Q(**{f'{campo}__gt': horario}) | Q(**{campo: horario, 'id__gt': pk})
+        )
+    linhas = list(queryset.order_by(campo, 'id')[:limite + 1])
+    return linhas[:limite], len(linhas) > limite
+
+
+def sincronizar(user, cursor=None, limite=LIMITE_PADRAO):
+    """
+    Uma página da sincronização. Devolve o dicionário da resposta, com o
+    cursor da próxima chamada e 'mais' indicando se a rodada continua.
+    """
+    agora = timezone.now()
+    estado = decodificar_cursor(cursor) if cursor else {'desde': None, 'ate': None, 'completo': True, 'posicoes': {}}
+    if estado['ate'] is None:
+        # Início de rodada
+        estado['ate'] = agora
+        if estado['desde'] is None or estado['desde'] < agora - retencao():
+            estado['desde'], estado['completo'] = None, True
+        else:
+            estado['completo'] = False
+
+    desde, ate, posicoes = estado['desde'], estado['ate'], estado['posicoes']
+    resposta = {'completo': estado['completo']}
+    proximas = {}
+
+    for tipo, (modelo, serializer, relacionados, _) in TIPOS.items():
+        resposta[tipo] = []
+        if tipo in posicoes and posicoes[tipo] is None:
+            continue  # Tipo já terminado nesta rodada
+        queryset = modelo.objects.filter(user=user).select_related(*relacionados)
+        linhas, cortou = _pagina(queryset, 'atualizada_em', desde, ate, posicoes.get(tipo), limite)
+        resposta[tipo] = serializer(linhas, many=True).data
+        proximas[tipo] = (linhas[-1].atualizada_em, linhas[-1].pk) if cortou else None
+
+    resposta['excluidos'] = {tipo: [] for tipo in TIPOS}
+    if not estado['completo'] and not ('excluidos' in posicoes and posicoes['excluidos'] is None):
+        nomes = {nome: tipo for tipo, (_, _, _, nome) in TIPOS.items()}
+        linhas, cortou = _pagina(
+            Exclusao.objects.filter(user=user), 'excluida_em', desde, ate, posicoes.get('excluidos'), limite
+        )
+        for exclusao in linhas:
+            resposta['excluidos'][nomes[exclusao.modelo]].append(exclusao.objeto_id)
+        proximas['excluidos'] = (linhas[-1].excluida_em, linhas[-1].pk) if cortou else None
+
+    resposta['mais'] = any(posicao is not None for posicao in proximas.values())
+    if resposta['mais']:
+        posicoes_texto = {
+            tipo: None if posicao is None else [posicao[0].isoformat(), posicao[1]]
+            for tipo, posicao in {**posicoes, **proximas}.items()
+        }
+        for tipo in list(TIPOS) + ['excluidos']:
+            posicoes_texto.setdefault(tipo, None)
+        proximo = {
+            'desde': desde.isoformat() if desde else None,
+            'ate': ate.isoformat(),
+            'completo': estado['completo'],
+            'posicoes': posicoes_texto,
+        }
+    else:
+        proximo = {'desde': (ate - MARGEM).isoformat()}
+    resposta['cursor'] = codificar_cursor(proximo)
+    return resposta
@@ -1,3 +1,2130 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import zstandard
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import cache_respostas, exportacao, metricas, relatorios, views_async
+from .arquivo import arquivar
+from .authentication import CacheUsuarios, cache_usuarios
+from .busca import buscar_transacoes
+from .dados_sinteticos import criar_usuario
+from .estaticos import limpar_paginas, pagina_em_cache, servir_estatico
+from .importacao import ErroImportacao, importar_extrato
+from .models import (
+    CATEGORIAS_PADRAO, METAS_PADRAO, ArquivoTransacoes, Categoria, Exclusao, Meta, Recorrencia, RelatorioSnapshot,
+    ResumoMensal, Transacao, UserProfile
+)
+from .pagination import TransacaoKeysetPagination
+from .recorrencias import gerar_ocorrencias, ocorrencias
+from .renderers import JSONRapidoRenderer
+from .views import montar_estatisticas, totais_por_categoria
+
+
+# ============================================
+# PLANOS DE CONSULTA (ÍNDICES)
+# ============================================
+
+@override_settings(CACHE_RESPOSTAS_ATIVO=False)  # as consultas precisam chegar ao banco
+class PlanoConsultasTests(TestCase):
+    """
+    Garante que as listagens e estatísticas usam os índices compostos de
+    contas/models.py, sem varredura completa nem ordenação temporária.
+    """
+
+    ENDPOINTS = [
+        '/api/transacoes/',
+        '/api/transacoes/?tipo=receita',
+        '/api/transacoes/estatisticas/',
+        '/api/transacoes/dashboard/',
+        '/api/categorias/',
+        '/api/metas/',
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user('plano', password='senha-teste')
+        outro = User.objects.create_user('outro', password='senha-teste')
+        salario = Categoria.objects.get(user=self.user, nome='Salário')
+
+        for dono in (self.user, outro):
+            for dia in range(1, 21):
+                Transacao.objects.create(
+                    user=dono, descricao=f'Transação {dia}', valor='10.00',
+                    tipo='receita' if dia % 2 else 'despesa',
+                    categoria=salario if dono == self.user and dia % 2 else None,
+                    data=date(2025, 1, dia)
+                )
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        if connection.vendor == 'postgresql':
+            # Com poucas linhas o PostgreSQL prefere Seq Scan mesmo havendo índice
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan = off')
+
+    def explicar(self, sql, params):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                return [linha[3] for linha in cursor.fetchall()]
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return [linha[0] for linha in cursor.fetchall()]
+
+    def problemas_no_plano(self, plano):
+        problemas = []
+        for passo in plano:
+            if connection.vendor == 'sqlite':
+                if passo.startswith('SCAN ') or 'TEMP B-TREE' in passo:
+                    problemas.append(passo)
+            elif 'Seq Scan' in passo or passo.strip().lstrip('-> ').startswith('Sort'):
+                problemas.append(passo)
+        return problemas
+
+    def test_listagens_e_estatisticas_usam_indices(self):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest('EXPLAIN verificado apenas em SQLite e PostgreSQL.')
+
+        for url in self.ENDPOINTS:
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+            for consulta in contexto.captured_queries:
+                sql = consulta['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                # O SQL capturado já vem com os parâmetros interpolados
+                plano = self.explicar(sql, None)
+                with self.subTest(url=url, sql=sql):
+                    self.assertEqual(self.problemas_no_plano(plano), [], '\n'.join(plano))
+
+
+# ============================================
+# NÚMERO DE CONSULTAS NAS LISTAGENS (N+1)
+# ============================================
+
+class ConsultasPorListagemTests(TestCase):
+    """
+    As listagens devem fazer um número fixo de consultas, não importa
+    quantas linhas a página tenha (autenticação forçada, sem consulta de JWT).
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('listagem', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def criar_transacoes(self, quantidade):
+        categorias = list(Categoria.objects.filter(user=self.user))
+        for i in range(quantidade):
+            categoria = categorias[i % len(categorias)]
+            Transacao.objects.create(
+                user=self.user, descricao=f'Transação {i}', valor='12.34',
+                tipo=categoria.tipo, categoria=categoria, data=date(2025, 1, 1 + i % 28)
+            )
+
+    def test_consultas_constantes_por_listagem(self):
+        # Toda listagem lê antes a versão dos dados para o ETag (1 consulta)
+        casos = [
+            ('/api/transacoes/', 3),                     # versão + COUNT + página
+            ('/api/transacoes/?tipo=despesa', 3),
+            ('/api/transacoes/?leve=1', 3),
+            ('/api/transacoes/?paginacao=cursor', 2),    # sem COUNT
+            ('/api/transacoes/?paginacao=cursor&leve=1', 2),
+            ('/api/categorias/', 3),
+            ('/api/metas/', 3),
+        ]
+        for quantidade in (3, 30):
+            self.criar_transacoes(quantidade)
+            for url, consultas in casos:
+                with self.subTest(url=url, transacoes=quantidade):
+                    with self.assertNumQueries(consultas):
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_leitura_leve_igual_a_completa(self):
+        self.criar_transacoes(5)
+        completa = self.client.get('/api/transacoes/').json()['results']
+        leve = self.client.get('/api/transacoes/?leve=1').json()['results']
+        self.assertEqual(leve, completa)
+
+
+# ============================================
+# CONCORRÊNCIA (LEITURAS E ESCRITAS EM PARALELO)
+# ============================================
+
+class ConcorrenciaTransacoesTests(TransactionTestCase):
+    """
+    Várias threads (cada uma com a sua conexão, como os workers do servidor)
+    lendo e gravando em /api/transacoes/ ao mesmo tempo: nenhuma requisição
+    pode falhar com "database is locked" e nenhuma escrita pode se perder.
+    """
+    ESCRITORES = 6
+    LEITORES = 6
+    REQUISICOES_POR_THREAD = 15
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('Precisa do banco de testes em arquivo (DATABASES TEST NAME).')
+        self.user = User.objects.create_user('concorrencia', password='senha-teste')
+
+    def cliente(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+    def em_thread(self, funcao):
+        def executar(*args):
+            try:
+                return funcao(*args)
+            finally:
+                connection.close()
+        return executar
+
+    def test_sqlite_em_wal(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Só se aplica ao SQLite.')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+    def test_leituras_e_escritas_em_paralelo(self):
+        largada = threading.Barrier(2 * self.ESCRITORES + self.LEITORES)
+
+        def escrever(numero):
+            client = self.cliente()
+            largada.wait()
+            return [
+                client.post('/api/transacoes/', {
+                    'descricao': f'Thread {numero} #{i}', 'valor': '1.00',
+                    'tipo': 'despesa', 'data': '2025-03-10'
+                }, format='json').status_code
+                for i in range(self.REQUISICOES_POR_THREAD)
+            ]
+
+        def criar_e_excluir_categoria(numero):
+            # A exclusão lê o ResumoMensal antes de gravar (pre_delete da Categoria):
+            # com BEGIN DEFERRED é o caso que falhava na hora com "database is locked"
+            client = self.cliente()
+            largada.wait()
+            status = []
+            for i in range(self.REQUISICOES_POR_THREAD):
+                response = client.post('/api/categorias/', {'nome': f'Temp {numero}-{i}', 'tipo': 'despesa'}, format='json')
+                status.append(response.status_code)
+                status.append(client.delete(f"/api/categorias/{response.json()['id']}/").status_code)
+            return status
+
+        def ler(numero):
+            client = self.cliente()
+            largada.wait()
+            return [
+                client.get('/api/transacoes/?paginacao=cursor').status_code
+                for _ in range(self.REQUISICOES_POR_THREAD)
+            ]
+
+        with ThreadPoolExecutor(max_workers=2 * self.ESCRITORES + self.LEITORES) as executor:
+            escritas = [executor.submit(self.em_thread(escrever), n) for n in range(self.ESCRITORES)]
+            categorias = [executor.submit(self.em_thread(criar_e_excluir_categoria), n) for n in range(self.ESCRITORES)]
+            leituras = [executor.submit(self.em_thread(ler), n) for n in range(self.LEITORES)]
+            # .result() repassa qualquer OperationalError da thread
+            status_escritas = [codigo for futuro in escritas for codigo in futuro.result()]
+            status_categorias = [codigo for futuro in categorias for codigo in futuro.result()]
+            status_leituras = [codigo for futuro in leituras for codigo in futuro.result()]
+
+        total = self.ESCRITORES * self.REQUISICOES_POR_THREAD
+        self.assertEqual(status_escritas, [201] * total)
+        self.assertEqual(status_categorias, [201, 204] * total)
+        self.assertEqual(status_leituras, [200] * (self.LEITORES * self.REQUISICOES_POR_THREAD))
+        self.assertEqual(Transacao.objects.filter(user=self.user).count(), total)
+        # O ResumoMensal também não pode perder nenhum delta
+        self.assertEqual(
+            ResumoMensal.objects.filter(user=self.user).aggregate(q=Sum('quantidade'))['q'], total
+        )
+
+    def test_leitura_nao_espera_escrita_aberta(self):
+        """Enquanto uma transação de escrita está aberta, a listagem responde na hora."""
+        escrita_aberta = threading.Event()
+        liberar = threading.Event()
+
+        def escrever_devagar():
+            with transaction.atomic():
+                Transacao.objects.create(
+                    user=self.user, descricao='Ainda não confirmada', valor='5.00',
+                    tipo='receita', data=date(2025, 3, 1)
+                )
+                escrita_aberta.set()
+                liberar.wait(timeout=10)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            futuro = executor.submit(self.em_thread(escrever_devagar))
+            self.assertTrue(escrita_aberta.wait(timeout=10))
+            try:
+                inicio = time.perf_counter()
+                response = self.cliente().get('/api/transacoes/')
+                duracao = time.perf_counter() - inicio
+            finally:
+                liberar.set()
+            futuro.result()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 0)  # a escrita ainda não tinha sido confirmada
+        self.assertLess(duracao, 1.0)
+
+
+# ============================================
+# DASHBOARD (/api/transacoes/dashboard/)
+# ============================================
+
+@override_settings(CACHE_RESPOSTAS_ATIVO=False)
+class DashboardTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('dashboard', password='senha-teste')
+        categorias = {c.nome: c for c in Categoria.objects.filter(user=self.user)}
+        lancamentos = [
+            ('receita', 'Salário', '5000.00'), ('receita', 'Salário', '5000.00'), ('receita', 'Freelance', '800.00'),
+            ('despesa', 'Moradia', '1500.00'), ('despesa', 'Alimentação', '300.25'),
+            ('despesa', 'Alimentação', '199.75'), ('despesa', None, '50.00'),
+        ]
+        for i, (tipo, categoria, valor) in enumerate(lancamentos):
+            Transacao.objects.create(
+                user=self.user, descricao=f'Lançamento {i}', valor=valor, tipo=tipo,
+                categoria=categorias.get(categoria), data=date(2025, 1 + i % 3, 10)
+            )
+        Meta.objects.filter(user=self.user, nome='Reserva de Emergência').update(valor_atual='1250.00')
+        # Outro usuário não entra nos totais
+        outro = User.objects.create_user('outrodashboard', password='senha-teste')
+        Transacao.objects.create(user=outro, descricao='Alheia', valor='999.00', tipo='receita', data=date(2025, 1, 1))
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_formato_e_totais(self):
+        response = self.client.get('/api/transacoes/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+
+        self.assertEqual(set(data), {
+            'total_receitas', 'total_despesas', 'saldo', 'total_transacoes',
+            'receitas_por_categoria', 'despesas_por_categoria', 'metas',
+        })
+        self.assertEqual(data['total_receitas'], Decimal('10800.00'))
+        self.assertEqual(data['total_despesas'], Decimal('2050.00'))
+        self.assertEqual(data['saldo'], Decimal('8750.00'))
+        self.assertEqual(data['total_transacoes'], 7)
+        # Maior total primeiro; sem categoria aparece como None
+        self.assertEqual(data['receitas_por_categoria'], [
+            {'categoria': 'Salário', 'total': Decimal('10000.00'), 'quantidade': 2},
+            {'categoria': 'Freelance', 'total': Decimal('800.00'), 'quantidade': 1},
+        ])
+        self.assertEqual(data['despesas_por_categoria'], [
+            {'categoria': 'Moradia', 'total': Decimal('1500.00'), 'quantidade': 1},
+            {'categoria': 'Alimentação', 'total': Decimal('500.00'), 'quantidade': 2},
+            {'categoria': None, 'total': Decimal('50.00'), 'quantidade': 1},
+        ])
+
+        metas = {meta['nome']: meta for meta in data['metas']}
+        self.assertEqual(len(metas), Meta.objects.filter(user=self.user).count())
+        self.assertEqual(
+            set(metas['Reserva de Emergência']),
+            {'id', 'nome', 'tipo', 'valor_alvo', 'valor_atual', 'data_limite', 'percentual'}
+        )
+        self.assertEqual(metas['Reserva de Emergência']['percentual'], Decimal('25.00'))
+
+        # Os totais batem com as transações (o dashboard lê o ResumoMensal)
+        somas = dict(Transacao.objects.filter(user=self.user).values_list('tipo').annotate(Sum('valor')))
+        self.assertEqual((somas['receita'], somas['despesa']), (data['total_receitas'], data['total_despesas']))
+
+    def test_consultas_nao_dependem_do_historico(self):
+        # Resumo por (tipo, categoria), nomes das categorias e metas
+        with self.assertNumQueries(3):
+            self.client.get('/api/transacoes/dashboard/')
+
+        categoria = Categoria.objects.get(user=self.user, nome='Transporte')
+        Transacao.objects.bulk_create([
+            Transacao(user=self.user, descricao=f'Ônibus {i}', valor='4.40', tipo='despesa',
+                      categoria=categoria, data=date(2024, 1 + i % 12, 1 + i % 28))
+            for i in range(200)
+        ])
+        call_command('reconstruir_resumos', usuario=self.user.pk, stdout=io.StringIO())
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/transacoes/dashboard/')
+        self.assertEqual(response.data['total_transacoes'], 207)
+
+
+# ============================================
+# RESUMO MENSAL (MANUTENÇÃO INCREMENTAL)
+# ============================================
+
+class ResumoMensalTests(TestCase):
+    """Cada escrita mantém o ResumoMensal igual ao que o reconstruir_resumos calcularia."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('resumo', password='senha-teste')
+        self.alimentacao = Categoria.objects.get(user=self.user, nome='Alimentação')
+        self.transporte = Categoria.objects.get(user=self.user, nome='Transporte')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def criar(self, valor='100.00', tipo='despesa', categoria=None, data=date(2025, 3, 10)):
+        return Transacao.objects.create(
+            user=self.user, descricao='Compra', valor=valor, tipo=tipo,
+            categoria=categoria or self.alimentacao, data=data
+        )
+
+    def resumo(self):
+        return {
+            (r.mes, r.categoria_id, r.tipo): (r.total, r.quantidade)
+            for r in ResumoMensal.objects.filter(user=self.user)
+        }
+
+    def assertResumoConsistente(self):
+        call_command('reconstruir_resumos', verificar=True, usuario=self.user.pk, stdout=io.StringIO())
+
+    def test_atualizacao_move_valor_entre_linhas(self):
+        transacao = self.criar()
+        self.criar(valor='40.00')
+        mar, abr = date(2025, 3, 1), date(2025, 4, 1)
+
+        alteracoes = [
+            ({'valor': '150.00'}, {(mar, self.alimentacao.id, 'despesa'): (Decimal('190.00'), 2)}),
+            ({'tipo': 'receita'}, {
+                (mar, self.alimentacao.id, 'despesa'): (Decimal('40.00'), 1),
+                (mar, self.alimentacao.id, 'receita'): (Decimal('150.00'), 1),
+            }),
+            ({'categoria': self.transporte.id}, {
+                (mar, self.alimentacao.id, 'despesa'): (Decimal('40.00'), 1),
+                (mar, self.transporte.id, 'receita'): (Decimal('150.00'), 1),
+            }),
+            ({'data': '2025-04-02'}, {
+                (mar, self.alimentacao.id, 'despesa'): (Decimal('40.00'), 1),
+                (abr, self.transporte.id, 'receita'): (Decimal('150.00'), 1),
+            }),
+            ({'categoria': None}, {
+                (mar, self.alimentacao.id, 'despesa'): (Decimal('40.00'), 1),
+                (abr, None, 'receita'): (Decimal('150.00'), 1),
+            }),
+        ]
+        for dados, esperado in alteracoes:
+            with self.subTest(dados=dados):
+                response = self.client.patch(f'/api/transacoes/{transacao.id}/', dados, format='json')
+                self.assertEqual(response.status_code, 200)
+                # Linha que ficou zerada sai do resumo
+                self.assertEqual(self.resumo(), esperado)
+                self.assertResumoConsistente()
+
+    def test_save_de_instancia_que_nao_veio_do_banco(self):
+        transacao = self.criar()
+        # Sem os valores originais: o save busca a linha atual antes de gravar
+        Transacao(
+            pk=transacao.pk, user=self.user, descricao='Compra', valor='70.00', tipo='despesa',
+            categoria=self.transporte, data=date(2025, 5, 1), criada_em=transacao.criada_em
+        ).save()
+
+        self.assertEqual(self.resumo(), {(date(2025, 5, 1), self.transporte.id, 'despesa'): (Decimal('70.00'), 1)})
+        self.assertResumoConsistente()
+
+    def test_exclusao(self):
+        primeira = self.criar()
+        self.criar(valor='40.00')
+        self.criar(valor='5.00', data=date(2025, 4, 1))
+
+        self.assertEqual(self.client.delete(f'/api/transacoes/{primeira.id}/').status_code, 204)
+        self.assertEqual(self.resumo()[(date(2025, 3, 1), self.alimentacao.id, 'despesa')], (Decimal('40.00'), 1))
+        self.assertResumoConsistente()
+
+        Transacao.objects.filter(user=self.user, data__gte=date(2025, 4, 1)).delete()
+        self.assertNotIn((date(2025, 4, 1), self.alimentacao.id, 'despesa'), self.resumo())
+        self.assertResumoConsistente()
+
+    def test_exclusao_da_categoria_move_para_sem_categoria(self):
+        self.criar()
+        self.criar(valor='40.00', data=date(2025, 4, 1))
+        self.criar(valor='10.00', categoria=self.transporte)
+        Transacao.objects.create(
+            user=self.user, descricao='Avulsa', valor='1.00', tipo='despesa', data=date(2025, 3, 2)
+        )
+
+        self.assertEqual(self.client.delete(f'/api/categorias/{self.alimentacao.id}/').status_code, 204)
+
+        self.assertEqual(self.resumo(), {
+            (date(2025, 3, 1), None, 'despesa'): (Decimal('101.00'), 2),
+            (date(2025, 4, 1), None, 'despesa'): (Decimal('40.00'), 1),
+            (date(2025, 3, 1), self.transporte.id, 'despesa'): (Decimal('10.00'), 1),
+        })
+        self.assertResumoConsistente()
+
+    def test_exclusao_do_usuario(self):
+        self.criar()
+        self.user.delete()
+        self.assertFalse(ResumoMensal.objects.exists())
+
+
+# ============================================
+# PAGINAÇÃO POR CURSOR (KEYSET)
+# ============================================
+
+@mock.patch.object(TransacaoKeysetPagination, 'page_size', 3)
+class PaginacaoPorCursorTests(TestCase):
+    """Ordem (-data, -criada_em, -id) estável entre páginas, mesmo com empates e inserções."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('cursor', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        dias = [date(2025, 3, 2)] * 2 + [date(2025, 3, 1)] * 5 + [date(2025, 2, 28)]
+        for i, dia in enumerate(dias):
+            self.criar(f'Transação {i}', dia)
+        # Empate também no criada_em: só o id desempata
+        Transacao.objects.filter(user=self.user, data=date(2025, 3, 1)).update(criada_em=timezone.now())
+
+        outro = User.objects.create_user('cursor-outro', password='senha-teste')
+        Transacao.objects.create(user=outro, descricao='Alheia', valor='1.00', tipo='receita', data=date(2025, 3, 1))
+
+    def criar(self, descricao, dia):
+        return Transacao.objects.create(user=self.user, descricao=descricao, valor='1.00', tipo='receita', data=dia)
+
+    def ordem_esperada(self):
+        return list(
+            Transacao.objects.filter(user=self.user).order_by('-data', '-criada_em', '-id').values_list('id', flat=True)
+        )
+
+    def pagina(self, url='/api/transacoes/?paginacao=cursor'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        dados = response.json()
+        self.assertNotIn('count', dados)
+        return [item['id'] for item in dados['results']], dados['next']
+
+    def test_cursor_percorre_os_empates(self):
+        ids, proxima, paginas = [], '/api/transacoes/?paginacao=cursor', 0
+        while proxima:
+            pagina, proxima = self.pagina(proxima)
+            ids += pagina
+            paginas += 1
+
+        self.assertEqual(ids, self.ordem_esperada())
+        self.assertEqual(paginas, 3)
+
+    def test_insercao_entre_paginas_nao_repete_nem_pula(self):
+        antes = self.ordem_esperada()
+        primeira, proxima = self.pagina()
+
+        # Uma mais nova (fica antes do cursor) e uma mais antiga (ainda vai aparecer)
+        self.criar('Nova', date(2025, 3, 3))
+        antiga = self.criar('Antiga', date(2025, 1, 15))
+
+        ids = list(primeira)
+        while proxima:
+            pagina, proxima = self.pagina(proxima)
+            ids += pagina
+
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(ids, antes + [antiga.id])
+
+    def test_cursor_malformado_responde_400(self):
+        def codificar(texto):
+            return base64.urlsafe_b64encode(texto.encode()).decode()
+
+        invalidos = [
+            'x', '!!!', 'é', codificar('a|b'), codificar('2025-13-01|2025-01-01T00:00:00|1'),
+            codificar('2025-01-01|2025-01-01T25:00:00|1'), codificar('2025-01-01|2025-01-01T00:00:00|-1'),
+            codificar(f'2025-01-01|2025-01-01T00:00:00|{2 ** 64}'),
+        ]
+        for cursor in invalidos:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/transacoes/', {'paginacao': 'cursor', 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': 'Cursor inválido.'})
+
+
+# ============================================
+# IMPORTAÇÃO DE EXTRATOS (CSV E OFX)
+# ============================================
+
+class ImportacaoExtratoTests(TestCase):
+    """Linhas válidas entram com o valor exato; valor ambíguo ou não finito vira erro da linha."""
+
+    CSV = (
+        'data;descricao;valor;categoria\n'
+        '05/03/2025;Salário março;1.234,56;Salário\n'
+        '2025-03-10;Mercado;-250,40;Alimentação\n'
+        '2025-04-02;Freela;1,234.56;\n'
+    )
+
+    OFX = (
+        'OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n'
+        '<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20250312120000[-3:BRT]\n<TRNAMT>-89.90\n'
+        '<FITID>abc1\n<MEMO>Farmácia\n</STMTTRN>\n'
+        '<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20250315\n<TRNAMT>500.00\n'
+        '<FITID>abc2\n<NAME>Pix recebido\n</STMTTRN>\n'
+        '</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n'
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user('importacao', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def importar(self, conteudo, formato):
+        return importar_extrato(self.user, io.BytesIO(conteudo.encode()), formato)
+
+    def versao(self):
+        return UserProfile.objects.get(user=self.user).versao_dados
+
+    def assertResumoConsistente(self):
+        call_command('reconstruir_resumos', verificar=True, usuario=self.user.pk, stdout=io.StringIO())
+
+    def test_csv_valores_exatos_categoria_e_tipo(self):
+        versao = self.versao()
+        resultado = self.importar(self.CSV, 'csv')
+
+        self.assertEqual(resultado, {'importadas': 3, 'com_erro': 0, 'erros': []})
+        transacoes = list(
+            Transacao.objects.filter(user=self.user).order_by('data')
+            .values_list('descricao', 'valor', 'tipo', 'categoria__nome')
+        )
+        self.assertEqual(transacoes, [
+            ('Salário março', Decimal('1234.56'), 'receita', 'Salário'),
+            ('Mercado', Decimal('250.40'), 'despesa', 'Alimentação'),
+            ('Freela', Decimal('1234.56'), 'receita', None),
+        ])
+        self.assertResumoConsistente()
+        self.assertEqual(self.versao(), versao + 1)
+
+    def test_ofx(self):
+        resultado = self.importar(self.OFX, 'ofx')
+
+        self.assertEqual(resultado['importadas'], 2)
+        transacoes = list(
+            Transacao.objects.filter(user=self.user).order_by('data')
+            .values_list('descricao', 'valor', 'tipo', 'data', 'observacao')
+        )
+        self.assertEqual(transacoes, [
+            ('Farmácia', Decimal('89.90'), 'despesa', date(2025, 3, 12), 'abc1'),
+            ('Pix recebido', Decimal('500.00'), 'receita', date(2025, 3, 15), 'abc2'),
+        ])
+        self.assertResumoConsistente()
+
+    def test_valores_invalidos_viram_erro_da_linha(self):
+        invalidos = ['NaN', 'Infinity', 'sNaN', '1.234', '1,234.567', '1,2.3', '1e5', '1.234.56']
+        conteudo = 'data;descricao;valor\n' + ''.join(f'2025-03-01;Linha {v};{v}\n' for v in invalidos)
+        conteudo += '2025-03-02;Válida;10,00\n'
+        versao = self.versao()
+
+        resultado = self.importar(conteudo, 'csv')
+
+        self.assertEqual(resultado['importadas'], 1)
+        self.assertEqual(resultado['com_erro'], len(invalidos))
+        self.assertEqual([erro['linha'] for erro in resultado['erros']], list(range(2, 2 + len(invalidos))))
+        self.assertEqual(list(Transacao.objects.filter(user=self.user).values_list('valor', flat=True)), [Decimal('10.00')])
+        self.assertResumoConsistente()
+        self.assertEqual(self.versao(), versao + 1)
+
+    def test_nada_importado_nao_muda_a_versao(self):
+        versao = self.versao()
+        resultado = self.importar('data;descricao;valor\n2025-03-01;Ruim;NaN\n', 'csv')
+
+        self.assertEqual((resultado['importadas'], resultado['com_erro']), (0, 1))
+        self.assertEqual(self.versao(), versao)
+        self.assertFalse(ResumoMensal.objects.filter(user=self.user).exists())
+
+    def test_rota_de_importacao(self):
+        arquivo = io.BytesIO(('data;descricao;valor\n2025-03-01;Ruim;Infinity\n2025-03-02;Boa;-1.500,00\n').encode())
+        arquivo.name = 'extrato.csv'
+
+        response = self.client.post('/api/transacoes/importar/', {'arquivo': arquivo}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['importadas'], 1)
+        self.assertEqual(response.json()['erros'], [{'linha': 2, 'erro': "Valor inválido: 'Infinity'"}])
+        transacao = Transacao.objects.get(user=self.user)
+        self.assertEqual((transacao.valor, transacao.tipo), (Decimal('1500.00'), 'despesa'))
+
+        arquivo = io.BytesIO(b'data;descricao;valor\n2025-03-01;Ruim;NaN\n')
+        arquivo.name = 'extrato.csv'
+        response = self.client.post('/api/transacoes/importar/', {'arquivo': arquivo}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['com_erro'], 1)
+
+    def test_codificacao_errada_recusa_o_arquivo(self):
+        conteudo = 'data;descricao;valor\n2025-03-01;Padaria;5,00\n2025-03-02;Açougue;30,00\n'.encode('latin-1')
+        versao = self.versao()
+
+        with self.assertRaisesMessage(ErroImportacao, 'não está em utf-8-sig'):
+            importar_extrato(self.user, io.BytesIO(conteudo), 'csv')
+        # Nada entra com '\ufffd' no lugar do 'ç', nem a linha válida de antes
+        self.assertFalse(Transacao.objects.filter(user=self.user).exists())
+        self.assertEqual(self.versao(), versao)
+
+        arquivo = io.BytesIO(conteudo)
+        arquivo.name = 'extrato.csv'
+        response = self.client.post('/api/transacoes/importar/', {'arquivo': arquivo}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('latin-1', response.json()['detail'])
+
+        resultado = importar_extrato(self.user, io.BytesIO(conteudo), 'csv', codificacao='latin-1')
+        self.assertEqual(resultado['importadas'], 2)
+        self.assertTrue(Transacao.objects.filter(user=self.user, descricao='Açougue').exists())
+
+    def test_lotes_gravados_com_bulk_create(self):
+        conteudo = 'data;descricao;valor\n' + ''.join(f'2025-03-{1 + i % 28:02d};Linha {i};-{i + 1},00\n' for i in range(25))
+
+        with mock.patch('contas.importacao.LINHAS_POR_INSERT', 4), CaptureQueriesContext(connection) as contexto:
+            resultado = importar_extrato(self.user, io.BytesIO(conteudo.encode()), 'csv', tamanho_lote=10)
+
+        self.assertEqual(resultado['importadas'], 25)
+        # Lotes de 10, 10 e 5 linhas em INSERTs de até 4
+        inserts = [q for q in contexto.captured_queries if q['sql'].startswith('INSERT INTO "contas_transacao"')]
+        self.assertEqual(len(inserts), 3 + 3 + 2)
+        transacoes = Transacao.objects.filter(user=self.user)
+        self.assertEqual(transacoes.count(), 25)
+        self.assertFalse(transacoes.filter(criada_em__isnull=True).exists())
+        self.assertEqual(transacoes.aggregate(total=Sum('valor'))['total'], Decimal(sum(range(1, 26))))
+        self.assertResumoConsistente()
+
+
+# ============================================
+# RELATÓRIOS (SNAPSHOTS)
+# ============================================
+
+@override_settings(RELATORIOS_EM_SEGUNDO_PLANO=False, RELATORIOS_TIMEOUT_MINUTOS=15)
+class RelatorioSnapshotTests(TestCase):
+    """Reaproveitamento pela impressão digital, download e recuperação dos snapshots travados."""
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        configuracao = self.settings(MEDIA_ROOT=media)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+        self.user = User.objects.create_user('relatorio', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Transacao.objects.create(
+            user=self.user, descricao='Aluguel <março>', valor='1500.00', tipo='despesa', data=date(2025, 3, 5)
+        )
+
+    def pedir(self):
+        return self.client.post('/api/relatorios/', {'inicio': '2025-01-01', 'fim': '2025-12-31'}, format='json')
+
+    def processar(self):
+        call_command('processar_relatorios', stdout=io.StringIO())
+
+    def test_pedido_repetido_reaproveita_o_snapshot(self):
+        primeiro = self.pedir()
+        self.assertEqual((primeiro.status_code, primeiro.json()['status']), (202, 'pendente'))
+        self.assertEqual(self.pedir().json()['id'], primeiro.json()['id'])
+
+        self.processar()
+        pronto = self.pedir()
+        self.assertEqual((pronto.status_code, pronto.json()['id']), (200, primeiro.json()['id']))
+        self.assertEqual(pronto.json()['status'], 'pronto')
+        self.assertEqual(RelatorioSnapshot.objects.filter(user=self.user).count(), 1)
+
+    def test_escrita_muda_a_impressao_digital(self):
+        antigo = self.pedir().json()['id']
+        self.processar()
+        arquivo = relatorios.caminho_arquivo(RelatorioSnapshot.objects.get(pk=antigo))
+
+        Transacao.objects.create(
+            user=self.user, descricao='Mercado', valor='80.00', tipo='despesa', data=date(2025, 3, 6)
+        )
+        novo = self.pedir()
+        self.assertEqual(novo.status_code, 202)
+        self.assertNotEqual(novo.json()['id'], antigo)
+
+        self.processar()
+        # O snapshot desatualizado sai junto com o arquivo
+        self.assertFalse(RelatorioSnapshot.objects.filter(pk=antigo).exists())
+        self.assertFalse(arquivo.exists())
+
+    def test_download(self):
+        pk = self.pedir().json()['id']
+        self.assertEqual(self.client.get(f'/api/relatorios/{pk}/download/').status_code, 409)
+        self.processar()
+
+        response = self.client.get(f'/api/relatorios/{pk}/download/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual((response.status_code, response['Content-Encoding']), (200, 'gzip'))
+        # Consumir o fluxo fecha o arquivo (o close() direto fecharia a conexão do teste)
+        html = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertIn('Aluguel &lt;março&gt;', html)
+
+        response = self.client.get(f'/api/relatorios/{pk}/download/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content).decode(), html)
+
+        outro = User.objects.create_user('outro', password='senha-teste')
+        self.client.force_authenticate(outro)
+        self.assertEqual(self.client.get(f'/api/relatorios/{pk}/download/').status_code, 404)
+
+    def test_snapshot_travado_nao_e_reaproveitado(self):
+        travado = self.pedir().json()['id']
+        RelatorioSnapshot.objects.filter(pk=travado).update(criado_em=timezone.now() - timedelta(minutes=16))
+
+        novo = self.pedir()
+        self.assertEqual(novo.status_code, 202)
+        self.assertNotEqual(novo.json()['id'], travado)
+        self.assertEqual(RelatorioSnapshot.objects.get(pk=travado).status, 'erro')
+
+    def test_processar_relatorios_retoma_os_travados(self):
+        pk = self.pedir().json()['id']
+        agora = timezone.now()
+        RelatorioSnapshot.objects.filter(pk=pk).update(status='processando', iniciado_em=agora - timedelta(minutes=16))
+        em_andamento = RelatorioSnapshot.objects.create(
+            user=self.user, impressao_digital='x', status='processando', iniciado_em=agora
+        )
+
+        self.processar()
+
+        self.assertEqual(RelatorioSnapshot.objects.get(pk=pk).status, 'pronto')
+        # Processando dentro do prazo: continua com o worker que o assumiu
+        self.assertEqual(RelatorioSnapshot.objects.get(pk=em_andamento.pk).status, 'processando')
+
+    def test_worker_retomado_nao_grava_o_status_final(self):
+        pk = self.pedir().json()['id']
+        depois = timezone.now() + timedelta(minutes=1)
+
+        def retomado_durante_a_escrita(arquivo, snapshot):
+            # Dado como travado e assumido por outro worker enquanto este escrevia
+            RelatorioSnapshot.objects.filter(pk=pk).update(status='processando', iniciado_em=depois)
+            arquivo.write('<html></html>')
+
+        with mock.patch.object(relatorios, 'escrever_relatorio', side_effect=retomado_durante_a_escrita), \
+                self.assertLogs('contas.relatorios', 'WARNING'):
+            self.assertFalse(relatorios.gerar_relatorio(pk))
+        snapshot = RelatorioSnapshot.objects.get(pk=pk)
+        self.assertEqual((snapshot.status, snapshot.iniciado_em, snapshot.concluido_em), ('processando', depois, None))
+
+        # A falha do worker antigo também não marca erro no snapshot do novo
+        RelatorioSnapshot.objects.filter(pk=pk).update(status='pendente', iniciado_em=None)
+
+        def retomado_e_falhou(arquivo, snapshot):
+            RelatorioSnapshot.objects.filter(pk=pk).update(status='processando', iniciado_em=depois)
+            raise OSError('disco cheio')
+
+        with mock.patch.object(relatorios, 'escrever_relatorio', side_effect=retomado_e_falhou), \
+                self.assertLogs('contas.relatorios', 'ERROR'):
+            self.assertFalse(relatorios.gerar_relatorio(pk))
+        self.assertEqual(RelatorioSnapshot.objects.get(pk=pk).status, 'processando')
+
+
+# ============================================
+# GET CONDICIONAL (ETAG) NAS LISTAGENS
+# ============================================
+
+class ListagemCondicionalTests(TestCase):
+    """ETag pela versão dos dados: 304 enquanto nada muda, nova ETag depois de uma escrita."""
+
+    LISTAGENS = ['/api/transacoes/', '/api/categorias/', '/api/metas/']
+
+    def setUp(self):
+        self.user = User.objects.create_user('condicional', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.fabrica = AsyncRequestFactory()
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    def escrever(self):
+        response = self.client.post('/api/transacoes/', {
+            'descricao': 'Mercado', 'valor': '10.00', 'tipo': 'despesa', 'data': '2025-05-10'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_etag_e_304(self):
+        for url in self.LISTAGENS:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                etag = response['ETag']
+                self.assertTrue(etag.startswith('W/"'))
+                self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+                # Só a leitura da versão: nem COUNT nem a página
+                with self.assertNumQueries(1):
+                    condicional = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(condicional.status_code, 304)
+                self.assertEqual(condicional['ETag'], etag)
+                self.assertEqual(condicional.content, b'')
+                # A comparação é fraca: a mesma ETag sem o W/ também vale
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag[2:]).status_code, 304)
+
+    def test_escrita_muda_a_etag(self):
+        etag = self.client.get('/api/transacoes/')['ETag']
+        self.escrever()
+
+        response = self.client.get('/api/transacoes/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['count'], 1)
+
+    async def listar_async(self, etag=None):
+        cabecalhos = {'Authorization': f'Bearer {self.token}'}
+        if etag:
+            cabecalhos['If-None-Match'] = etag
+        return await views_async.transacoes(self.fabrica.get('/api/transacoes/', headers=cabecalhos))
+
+    async def test_leitura_assincrona(self):
+        response = await self.listar_async()
+        self.assertEqual(response.status_code, 200)
+        # HttpResponse da leitura assíncrona, não o Response da view síncrona
+        self.assertFalse(hasattr(response, 'data'))
+        etag = response['ETag']
+        # Mesma ETag da view síncrona
+        sincrona = await sync_to_async(self.client.get)('/api/transacoes/')
+        self.assertEqual(sincrona['ETag'], etag)
+
+        self.assertEqual((await self.listar_async(etag)).status_code, 304)
+
+        await sync_to_async(self.escrever)()
+        response = await self.listar_async(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(json.loads(response.content)['count'], 1)
+
+
+# ============================================
+# CACHE DAS RESPOSTAS AGREGADAS
+# ============================================
+
+@override_settings(CACHE_RESPOSTAS_ATIVO=True)
+class CacheRespostasTests(TestCase):
+
+    def setUp(self):
+        caches[cache_respostas.ALIAS].clear()
+        self.addCleanup(caches[cache_respostas.ALIAS].clear)
+        self.user = User.objects.create_user('cacherespostas', password='senha-teste')
+        self.fabrica = RequestFactory()
+        self.calculos = 0
+
+    def pedido(self, user=None, **parametros):
+        request = self.fabrica.get('/api/transacoes/estatisticas/', parametros)
+        request.user = user or self.user
+        return request
+
+    def calcular(self):
+        self.calculos += 1
+        return {'calculo': self.calculos}
+
+    async def acalcular(self):
+        return self.calcular()
+
+    def test_acerto_e_nova_versao(self):
+        self.assertEqual(cache_respostas.em_cache(self.pedido(), 'estatisticas', self.calcular), {'calculo': 1})
+        with self.assertNumQueries(1):
+            # Só a leitura da versão
+            self.assertEqual(cache_respostas.em_cache(self.pedido(), 'estatisticas', self.calcular), {'calculo': 1})
+
+        UserProfile.incrementar_versao(self.user.pk)
+        self.assertEqual(cache_respostas.em_cache(self.pedido(), 'estatisticas', self.calcular), {'calculo': 2})
+        self.assertEqual(self.calculos, 2)
+
+    def test_chave_separa_usuarios_endpoints_e_parametros(self):
+        outro = User.objects.create_user('outrocache', password='senha-teste')
+        for request, endpoint in [
+            (self.pedido(), 'estatisticas'),
+            (self.pedido(outro), 'estatisticas'),
+            (self.pedido(), 'dashboard'),
+            (self.pedido(mes='2025-01'), 'estatisticas'),
+            (self.pedido(mes='2025-02'), 'estatisticas'),
+        ]:
+            cache_respostas.em_cache(request, endpoint, self.calcular)
+        self.assertEqual(self.calculos, 5)
+
+        # Mesmos parâmetros em outra ordem: mesma chave
+        primeiro = self.fabrica.get('/api/transacoes/serie/?tipo=despesa&granularidade=dia')
+        segundo = self.fabrica.get('/api/transacoes/serie/?granularidade=dia&tipo=despesa')
+        primeiro.user = segundo.user = self.user
+        self.assertEqual(cache_respostas.em_cache(primeiro, 'serie', self.calcular), {'calculo': 6})
+        self.assertEqual(cache_respostas.em_cache(segundo, 'serie', self.calcular), {'calculo': 6})
+
+    @override_settings(CACHE_RESPOSTAS_ATIVO=False)
+    def test_desligado(self):
+        with self.assertNumQueries(0):
+            for _ in range(2):
+                cache_respostas.em_cache(self.pedido(), 'estatisticas', self.calcular)
+        self.assertEqual(self.calculos, 2)
+
+    async def test_versao_assincrona(self):
+        request = self.pedido()
+        self.assertEqual(await cache_respostas.aem_cache(request, self.user, 'estatisticas', self.acalcular), {'calculo': 1})
+        # Mesma chave da versão síncrona
+        self.assertEqual(await sync_to_async(cache_respostas.em_cache)(request, 'estatisticas', self.calcular), {'calculo': 1})
+        await sync_to_async(UserProfile.incrementar_versao)(self.user.pk)
+        self.assertEqual(await cache_respostas.aem_cache(request, self.user, 'estatisticas', self.acalcular), {'calculo': 2})
+
+    def test_escrita_pela_api_troca_a_resposta(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        antes = client.get('/api/transacoes/estatisticas/').json()
+        self.assertEqual(client.get('/api/transacoes/estatisticas/').json(), antes)
+
+        client.post('/api/transacoes/', {
+            'descricao': 'Salário', 'valor': '3000.00', 'tipo': 'receita', 'data': '2025-05-05'
+        }, format='json')
+        depois = client.get('/api/transacoes/estatisticas/').json()
+        self.assertNotEqual(depois, antes)
+        self.assertEqual(depois, montar_estatisticas(totais_por_categoria(self.user)))
+
+
+# ============================================
+# CACHE DE USUÁRIOS (AUTENTICAÇÃO JWT)
+# ============================================
+
+class CacheUsuariosTests(TestCase):
+
+    def setUp(self):
+        cache_usuarios.limpar()
+        self.addCleanup(cache_usuarios.limpar)
+        self.user = User.objects.create_user('cacheusuario', password='senha-teste')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def consultas_em_auth_user(self, url='/api/categorias/'):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sum('FROM "auth_user"' in consulta['sql'] for consulta in contexto.captured_queries)
+
+    def test_lru_com_ttl(self):
+        cache = CacheUsuarios(tamanho=2, ttl=60)
+        a, b, c = (User(pk=pk, username=f'u{pk}') for pk in (1, 2, 3))
+        with mock.patch('contas.authentication.time.monotonic', return_value=1000.0) as relogio:
+            cache.guardar(1, a)
+            cache.guardar('2', b)
+            # A chave é o id em texto (o simplejwt entrega o claim como str)
+            self.assertEqual(cache.obter('1').username, 'u1')
+            cache.guardar(3, c)
+            # O 2 era o menos usado: sai ele, não o 1
+            self.assertIsNone(cache.obter(2))
+            self.assertIsNotNone(cache.obter(1))
+
+            # Cópias: alterar o User devolvido não altera o guardado
+            cache.obter(3).username = 'alterado'
+            self.assertEqual(cache.obter(3).username, 'u3')
+
+            relogio.return_value = 1060.5
+            self.assertIsNone(cache.obter(1))
+        self.assertEqual(
+            {chave: cache.estatisticas()[chave] for chave in ('acertos', 'falhas', 'expirados', 'despejados', 'itens')},
+            {'acertos': 4, 'falhas': 2, 'expirados': 1, 'despejados': 1, 'itens': 1}
+        )
+
+    def test_acerto_dispensa_o_select_do_usuario(self):
+        self.assertEqual(self.consultas_em_auth_user(), 1)
+        self.assertEqual(self.consultas_em_auth_user(), 0)
+        self.assertEqual(cache_usuarios.estatisticas()['acertos'], 1)
+
+        # Depois do TTL volta ao banco
+        with mock.patch('contas.authentication.time.monotonic', return_value=time.monotonic() + cache_usuarios.ttl + 1):
+            self.assertEqual(self.consultas_em_auth_user(), 1)
+
+    def test_save_e_delete_invalidam(self):
+        self.consultas_em_auth_user()
+        self.user.first_name = 'Bia'
+        self.user.save()
+        self.assertIsNone(cache_usuarios.obter(self.user.pk))
+        self.assertEqual(self.client.get('/api/users/me/').json()['first_name'], 'Bia')
+
+        # Inativado depois de estar no cache: recusado na hora
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/categorias/')
+        self.assertEqual((response.status_code, response.json()['code']), (401, 'user_inactive'))
+
+        self.user.is_active = True
+        self.user.save()
+        self.consultas_em_auth_user()
+        self.user.delete()
+        self.assertIsNone(cache_usuarios.obter(self.user.pk))
+        self.assertEqual(self.client.get('/api/categorias/').status_code, 401)
+
+    def test_update_em_massa_depende_do_ttl(self):
+        self.consultas_em_auth_user()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        # Sem signal: o User em cache vale até o TTL
+        self.assertEqual(self.client.get('/api/categorias/').status_code, 200)
+
+        with mock.patch('contas.authentication.time.monotonic', return_value=time.monotonic() + cache_usuarios.ttl + 1):
+            self.assertEqual(self.client.get('/api/categorias/').status_code, 401)
+
+
+# ============================================
+# LEITURAS ASSÍNCRONAS (contas/views_async.py)
+# ============================================
+
+class RotasAssincronas:
+    """URLConf do projeto como fica com API_ASSINCRONA=True: as leituras assíncronas vêm antes."""
+    urlpatterns = [
+        path('api/users/me/', views_async.user_me),
+        path('api/transacoes/', views_async.transacoes),
+        path('api/transacoes/estatisticas/', views_async.estatisticas),
+        path('api/categorias/', views_async.categorias),
+        path('api/metas/', views_async.metas),
+        path('', include('ga_financas_backend.urls')),
+    ]
+
+
+@override_settings(CACHE_RESPOSTAS_ATIVO=False)
+class LeiturasAssincronasTests(TestCase):
+    """Mesmas respostas das views do DRF, que continuam atendendo tudo o que a leitura assíncrona não cobre."""
+
+    def setUp(self):
+        cache_usuarios.limpar()
+        self.user = User.objects.create_user('assincrona', password='senha-teste', first_name='Ana')
+        categoria = Categoria.objects.filter(user=self.user, tipo='despesa').first()
+        Transacao.objects.bulk_create([
+            Transacao(user=self.user, descricao=f'Compra {i}', valor=f'{i + 1}.50', tipo='despesa' if i % 3 else 'receita',
+                      categoria=categoria if i % 2 else None, data=date(2025, 1, 1) + timedelta(days=i))
+            for i in range(130)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+
+    async def aget(self, url, token=None, **cabecalhos):
+        if token is not False:
+            cabecalhos.setdefault('Authorization', f'Bearer {token or self.token}')
+        with self.settings(ROOT_URLCONF=RotasAssincronas):
+            return await self.async_client.get(url, headers=cabecalhos)
+
+    async def sincrona(self, url, cliente=None):
+        return await sync_to_async((cliente or self.client).get)(url)
+
+    def assertMesmaResposta(self, assincrona, sincrona):
+        self.assertEqual(assincrona.status_code, sincrona.status_code)
+        self.assertEqual(json.loads(assincrona.content), sincrona.json())
+
+    async def test_mesmas_respostas_da_view_sincrona(self):
+        for url in [
+            '/api/transacoes/', '/api/transacoes/?page=2', '/api/transacoes/?page=last',
+            '/api/transacoes/?tipo=receita&leve=1', '/api/categorias/', '/api/metas/',
+            '/api/transacoes/estatisticas/', '/api/users/me/',
+        ]:
+            with self.subTest(url=url):
+                assincrona = await self.aget(url)
+                self.assertEqual(assincrona.status_code, 200)
+                # HttpResponse montada pela leitura assíncrona, não o Response do DRF
+                self.assertFalse(hasattr(assincrona, 'data'))
+                self.assertMesmaResposta(assincrona, await self.sincrona(url))
+
+    async def test_paginas_por_cursor(self):
+        url, paginas = '/api/transacoes/?paginacao=cursor', 0
+        while url:
+            assincrona = await self.aget(url)
+            self.assertFalse(hasattr(assincrona, 'data'))
+            self.assertMesmaResposta(assincrona, await self.sincrona(url))
+            url, paginas = json.loads(assincrona.content)['next'], paginas + 1
+        self.assertEqual(paginas, 2)
+
+        # Cursor inválido: o erro vem da view do DRF
+        response = await self.aget('/api/transacoes/?paginacao=cursor&cursor=invalido')
+        self.assertTrue(hasattr(response, 'data'))
+        self.assertEqual((response.status_code, response.json()), (400, {'cursor': 'Cursor inválido.'}))
+
+    async def test_etag_e_304(self):
+        response = await self.aget('/api/categorias/')
+        etag = response['ETag']
+        self.assertEqual((await self.sincrona('/api/categorias/'))['ETag'], etag)
+
+        condicional = await self.aget('/api/categorias/', **{'If-None-Match': etag})
+        self.assertEqual((condicional.status_code, condicional.content), (304, b''))
+        self.assertEqual(condicional['ETag'], etag)
+
+        await sync_to_async(self.client.post)(
+            '/api/categorias/', {'nome': 'Viagens', 'tipo': 'despesa'}, format='json'
+        )
+        response = await self.aget('/api/categorias/', **{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    async def test_autenticar(self):
+        fabrica = AsyncRequestFactory()
+        request = fabrica.get('/api/transacoes/', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual((await views_async.autenticar(request)).pk, self.user.pk)
+        # O User fica no mesmo cache do CachedJWTAuthentication
+        self.assertIsNotNone(cache_usuarios.obter(self.user.pk))
+        self.assertIsNone(await views_async.autenticar(fabrica.get('/api/transacoes/')))
+        self.assertIsNone(await views_async.autenticar(
+            fabrica.get('/api/transacoes/', headers={'Authorization': 'Bearer invalido'})
+        ))
+
+        # Sem token, token inválido, usuário inativo ou excluído: o 401 é o do DRF
+        anonimo = APIClient()
+        esperado = await self.sincrona('/api/transacoes/', anonimo)
+        self.assertEqual(esperado.status_code, 401)
+        for token in (False, 'invalido'):
+            with self.subTest(token=token):
+                response = await self.aget('/api/transacoes/', token=token)
+                self.assertEqual(response.status_code, 401)
+                self.assertTrue(hasattr(response, 'data'))
+
+        self.user.is_active = False
+        await sync_to_async(self.user.save)()
+        response = await self.aget('/api/users/me/')
+        self.assertEqual((response.status_code, response.json()['code']), (401, 'user_inactive'))
+
+        await sync_to_async(self.user.delete)()
+        response = await self.aget('/api/transacoes/estatisticas/')
+        self.assertEqual((response.status_code, response.json()['code']), (401, 'user_not_found'))
+
+    async def test_demais_pedidos_vao_para_o_drf(self):
+        with self.settings(ROOT_URLCONF=RotasAssincronas):
+            response = await self.async_client.post(
+                '/api/transacoes/',
+                {'descricao': 'Mercado', 'valor': '10.00', 'tipo': 'despesa', 'data': '2025-05-10'},
+                content_type='application/json', headers={'Authorization': f'Bearer {self.token}'}
+            )
+        self.assertEqual(response.status_code, 201)
+
+        for url, cabecalhos, codigo in [
+            ('/api/transacoes/?ordering=valor', {}, 200),
+            ('/api/transacoes/?page=99', {}, 404),
+            ('/api/categorias/', {'Accept': 'text/html'}, 200),
+        ]:
+            with self.subTest(url=url, cabecalhos=cabecalhos):
+                response = await self.aget(url, **cabecalhos)
+                self.assertEqual(response.status_code, codigo)
+                self.assertTrue(hasattr(response, 'data'))
+        self.assertIn('text/html', response['Content-Type'])
+
+
+# ============================================
+# SÉRIE TEMPORAL (/api/transacoes/serie/)
+# ============================================
+
+@override_settings(CACHE_RESPOSTAS_ATIVO=False)
+class SerieTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('serie', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for descricao, valor, tipo, data in [
+            ('Antes', '50.00', 'receita', date(2024, 12, 20)),
+            ('Salário', '1000.00', 'receita', date(2025, 1, 5)),
+            ('Mercado', '200.00', 'despesa', date(2025, 1, 20)),
+            ('Aluguel', '700.00', 'despesa', date(2025, 3, 10)),
+            ('Depois', '10.00', 'receita', date(2025, 4, 1)),
+        ]:
+            Transacao.objects.create(user=self.user, descricao=descricao, valor=valor, tipo=tipo, data=data)
+
+    def serie(self, **parametros):
+        response = self.client.get('/api/transacoes/serie/', parametros)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_preenche_periodos_vazios_e_acumula_o_saldo(self):
+        serie = self.serie(granularidade='mes', inicio='2025-01-01', fim='2025-03-31')
+
+        self.assertEqual(serie['periodos'], ['2025-01-01', '2025-02-01', '2025-03-01'])
+        self.assertEqual(serie['receitas'], [1000.0, 0.0, 0.0])
+        self.assertEqual(serie['despesas'], [200.0, 0.0, 700.0])
+        self.assertEqual(serie['quantidade'], [2, 0, 1])
+        # O saldo parte do que havia antes do início e se repete no mês sem movimento
+        self.assertEqual(serie['saldo_inicial'], 50.0)
+        self.assertEqual(serie['saldo'], [850.0, 850.0, 150.0])
+
+    def test_resumo_mensal_e_transacoes_dao_o_mesmo_resultado(self):
+        parametros = {'granularidade': 'mes', 'inicio': '2025-01-01'}
+        with CaptureQueriesContext(connection) as contexto:
+            pelo_resumo = self.serie(fim='2025-03-31', **parametros)
+        # Meses inteiros: só o ResumoMensal (o saldo anterior também sai dele)
+        self.assertFalse([q for q in contexto.captured_queries if 'FROM "contas_transacao"' in q['sql']])
+
+        pelas_transacoes = self.serie(fim='2025-03-30', **parametros)
+        for coluna in ('periodos', 'receitas', 'despesas', 'quantidade', 'saldo', 'saldo_inicial'):
+            self.assertEqual(pelo_resumo[coluna], pelas_transacoes[coluna], coluna)
+
+        por_dia = self.serie(granularidade='dia', inicio='2025-01-04', fim='2025-01-06')
+        self.assertEqual(por_dia['receitas'], [0.0, 1000.0, 0.0])
+        self.assertEqual(por_dia['saldo'], [50.0, 1050.0, 1050.0])
+
+    def test_datas_nos_limites_do_calendario_respondem_400(self):
+        casos = [
+            {'granularidade': 'ano', 'inicio': '9999-01-01', 'fim': '9999-12-31'},
+            {'granularidade': 'mes', 'fim': '9999-12-31'},
+            {'granularidade': 'dia', 'fim': '0001-01-05'},
+            {'granularidade': 'semana', 'inicio': '0001-01-01', 'fim': '0001-02-01'},
+        ]
+        for parametros in casos:
+            with self.subTest(**parametros):
+                self.assertEqual(self.client.get('/api/transacoes/serie/', parametros).status_code, 400)
+
+        # Perto dos limites, mas dentro: responde normalmente
+        self.assertEqual(len(self.serie(granularidade='ano', fim='9998-12-31')['periodos']), 5)
+        self.assertEqual(len(self.serie(granularidade='ano', fim='0003-06-01')['periodos']), 2)
+
+    def test_intervalo_grande_demais_recusado_sem_montar_os_periodos(self):
+        with mock.patch('contas.series.listar_periodos') as listar:
+            response = self.client.get('/api/transacoes/serie/', {
+                'granularidade': 'dia', 'inicio': '0002-01-01', 'fim': '9998-12-31'
+            })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('granularidade', response.json())
+        listar.assert_not_called()
+
+
+# ============================================
+# CADASTRO (DADOS PADRÃO DO USUÁRIO)
+# ============================================
+
+class DadosPadraoUsuarioTests(TestCase):
+
+    def test_perfil_categorias_e_metas_em_poucos_inserts(self):
+        # User, UserProfile e um INSERT em lote para categorias e outro para metas
+        with self.assertNumQueries(4):
+            user = User.objects.create_user('novo', password='senha-teste')
+
+        self.assertTrue(UserProfile.objects.filter(user=user).exists())
+        self.assertEqual(
+            sorted(Categoria.objects.filter(user=user).values_list('nome', 'tipo', 'icone', 'cor')),
+            sorted((c['nome'], c['tipo'], c['icone'], c['cor']) for c in CATEGORIAS_PADRAO)
+        )
+        hoje = date.today()
+        self.assertEqual(
+            sorted(Meta.objects.filter(user=user).values_list('nome', 'tipo', 'valor_alvo', 'data_limite', 'valor_atual')),
+            sorted(
+                (m['nome'], m['tipo'], Decimal(m['valor_alvo']), hoje + timedelta(days=m['prazo_dias']), Decimal('0'))
+                for m in METAS_PADRAO
+            )
+        )
+
+        # Salvar de novo não duplica nada
+        user.first_name = 'Nova'
+        user.save()
+        self.assertEqual(Categoria.objects.filter(user=user).count(), len(CATEGORIAS_PADRAO))
+        self.assertEqual(Meta.objects.filter(user=user).count(), len(METAS_PADRAO))
+
+    def test_rota_de_cadastro(self):
+        response = APIClient().post('/api/register/', {'username': 'cadastro', 'password': 'senha-teste'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username='cadastro')
+        self.assertEqual(Categoria.objects.filter(user=user).count(), len(CATEGORIAS_PADRAO))
+        self.assertEqual(Meta.objects.filter(user=user).count(), len(METAS_PADRAO))
+
+    def test_falha_no_onboarding_desfaz_o_usuario(self):
+        with mock.patch.object(Meta.objects, 'bulk_create', side_effect=IntegrityError('falha')):
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                User.objects.create_user('incompleto', password='senha-teste')
+        self.assertFalse(User.objects.filter(username='incompleto').exists())
+        self.assertFalse(Categoria.objects.filter(user__username='incompleto').exists())
+
+
+# ============================================
+# DADOS SINTÉTICOS (gerar_dados / benchmark)
+# ============================================
+
+class DadosSinteticosTests(TestCase):
+    """O gerador precisa ser reprodutível e manter o ResumoMensal e a versão em dia."""
+
+    def gerar(self):
+        user = criar_usuario('sintetico', 500, semente=7, ate=date(2025, 6, 30), dias=365)
+        transacoes = list(
+            Transacao.objects.filter(user=user).order_by('data', 'id')
+            .values_list('descricao', 'valor', 'tipo', 'categoria__nome', 'data')
+        )
+        return user, transacoes
+
+    def test_mesma_semente_gera_os_mesmos_dados(self):
+        user, primeira = self.gerar()
+        user.delete()
+        _, segunda = self.gerar()
+
+        self.assertEqual(len(primeira), 500)
+        self.assertEqual(primeira, segunda)
+
+    def test_resumo_e_versao_atualizados(self):
+        user, _ = self.gerar()
+
+        call_command('reconstruir_resumos', verificar=True, usuario=user.pk, stdout=io.StringIO())
+        self.assertEqual(
+            ResumoMensal.objects.filter(user=user).aggregate(total=Sum('quantidade'))['total'], 500
+        )
+        self.assertGreater(UserProfile.objects.get(user=user).versao_dados, 0)
+
+
+# ============================================
+# MÉTRICAS POR ROTA
+# ============================================
+
+class MetricasTests(TestCase):
+
+    def setUp(self):
+        metricas.registro.limpar()
+        self.user = User.objects.create_user('metricas', password='senha-teste')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_somente_admin(self):
+        self.assertEqual(self.client.get('/api/metricas/').status_code, 403)
+
+    def test_registra_rota_consultas_e_tamanho(self):
+        with CaptureQueriesContext(connection) as contexto:
+            corpo = self.client.get('/api/transacoes/').content
+        consultas = len(contexto.captured_queries)  # a próxima requisição limpa connection.queries
+
+        self.user.is_staff = True
+        self.user.save()
+        texto = self.client.get('/api/metricas/').content.decode()
+
+        rotulos = '{rota="transacao-list",metodo="GET"}'
+        self.assertIn('ga_requisicoes_total{rota="transacao-list",metodo="GET",status="200"} 1', texto)
+        self.assertIn(f'ga_requisicao_duracao_segundos_count{rotulos} 1', texto)
+        self.assertIn(f'ga_requisicao_consultas_sum{rotulos} {consultas}', texto)
+        self.assertIn(f'ga_resposta_bytes_sum{rotulos} {len(corpo)}', texto)
+
+
+# ============================================
+# ESCRITA EM LOTE (/api/transacoes/lote/)
+# ============================================
+
+class LoteTransacoesTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('lote', password='senha-teste')
+        self.categoria = Categoria.objects.get(user=self.user, nome='Alimentação')
+        self.existentes = [
+            Transacao.objects.create(
+                user=self.user, descricao=f'Antiga {i}', valor='10.00', tipo='despesa',
+                categoria=self.categoria, data=date(2025, 1 + i % 3, 10)
+            )
+            for i in range(6)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def criar(self, quantidade, **extra):
+        return [
+            {'acao': 'criar', 'dados': {
+                'descricao': f'Nova {i}', 'valor': '2.50', 'tipo': 'despesa',
+                'categoria': self.categoria.id, 'data': f'2025-0{1 + i % 6}-05', **extra,
+            }}
+            for i in range(quantidade)
+        ]
+
+    def enviar(self, operacoes):
+        return self.client.post('/api/transacoes/lote/', {'operacoes': operacoes}, format='json')
+
+    def test_aplica_criar_atualizar_excluir(self):
+        versao = UserProfile.objects.get(user=self.user).versao_dados
+        operacoes = self.criar(3) + [
+            {'acao': 'atualizar', 'id': self.existentes[0].id, 'dados': {'valor': '99.00', 'categoria': None}},
+            {'acao': 'excluir', 'id': self.existentes[1].id},
+        ]
+        response = self.enviar(operacoes)
+
+        self.assertEqual(response.status_code, 200, response.content)
+        resultados = response.json()['resultados']
+        self.assertEqual([r['status'] for r in resultados], [201, 201, 201, 200, 204])
+        self.assertTrue(Transacao.objects.filter(pk=resultados[0]['id'], descricao='Nova 0').exists())
+
+        atualizada = Transacao.objects.get(pk=self.existentes[0].id)
+        self.assertEqual((str(atualizada.valor), atualizada.categoria_id), ('99.00', None))
+        self.assertFalse(Transacao.objects.filter(pk=self.existentes[1].id).exists())
+
+        call_command('reconstruir_resumos', verificar=True, usuario=self.user.pk, stdout=io.StringIO())
+        self.assertEqual(UserProfile.objects.get(user=self.user).versao_dados, versao + 1)
+
+    def test_item_invalido_recusa_o_lote_inteiro(self):
+        outro = User.objects.create_user('outro-lote', password='senha-teste')
+        alheia = Transacao.objects.create(
+            user=outro, descricao='Alheia', valor='1.00', tipo='despesa', data=date(2025, 1, 1)
+        )
+        operacoes = self.criar(2) + self.criar(1, categoria=Categoria.objects.filter(user=outro).first().id) + [
+            {'acao': 'excluir', 'id': alheia.id},
+            {'acao': 'atualizar', 'id': self.existentes[0].id, 'dados': {'valor': 'abc'}},
+        ]
+        total = Transacao.objects.count()
+        response = self.enviar(operacoes)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.json()['resultados']], [424, 424, 400, 404, 400])
+        self.assertIn('categoria', response.json()['resultados'][2]['erros'])
+        self.assertEqual(Transacao.objects.count(), total)
+
+    def test_consultas_nao_crescem_com_o_lote(self):
+        def consultas(quantidade):
+            with CaptureQueriesContext(connection) as contexto:
+                response = self.enviar(self.criar(quantidade))
+            self.assertEqual(response.status_code, 200)
+            return len(contexto.captured_queries)
+
+        # Os meses (1 a 6) se repetem: depois do primeiro lote, que cria as
+        # linhas do ResumoMensal, todo lote atualiza as mesmas 6 linhas
+        # (60 cabe num INSERT só dentro do limite de parâmetros do SQLite)
+        consultas(6)
+        self.assertEqual(consultas(12), consultas(60))
+
+    def test_id_fora_do_intervalo_e_erro_do_item(self):
+        response = self.enviar([
+            {'acao': 'excluir', 'id': 2 ** 63},
+            {'acao': 'atualizar', 'id': 0, 'dados': {'valor': '1.00'}},
+            {'acao': 'excluir', 'id': self.existentes[0].id},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([r['status'] for r in response.json()['resultados']], [400, 400, 424])
+        self.assertTrue(Transacao.objects.filter(pk=self.existentes[0].id).exists())
+
+    def test_transacoes_lidas_dentro_da_transacao_do_banco(self):
+        operacoes = [
+            {'acao': 'atualizar', 'id': self.existentes[0].id, 'dados': {'valor': '5.00'}},
+            {'acao': 'excluir', 'id': self.existentes[1].id},
+        ]
+        with CaptureQueriesContext(connection) as contexto:
+            self.assertEqual(self.enviar(operacoes).status_code, 200)
+
+        sql = [consulta['sql'] for consulta in contexto.captured_queries]
+        leitura = next(i for i, texto in enumerate(sql) if texto.startswith('SELECT') and 'contas_transacao"."id" IN' in texto)
+        # Dentro do atomic (SAVEPOINT no TestCase) e travando as linhas onde o banco suporta
+        self.assertTrue(any(texto.startswith('SAVEPOINT') for texto in sql[:leitura]))
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', sql[leitura])
+        call_command('reconstruir_resumos', verificar=True, usuario=self.user.pk, stdout=io.StringIO())
+
+
+# ============================================
+# SINCRONIZAÇÃO INCREMENTAL (/api/sincronizar/)
+# ============================================
+
+class SincronizacaoTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('sync', password='senha-teste')
+        self.categoria = Categoria.objects.get(user=self.user, nome='Lazer')
+        self.transacoes = [
+            Transacao.objects.create(
+                user=self.user, descricao=f'T{i}', valor='3.00', tipo='despesa',
+                categoria=self.categoria, data=date(2025, 2, 1 + i)
+            )
+            for i in range(7)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sincronizar(self, cursor=None, limite=3):
+        """Percorre a rodada inteira; devolve (registros por tipo, excluídos, completo, cursor)."""
+        registros = {'categorias': set(), 'transacoes': set(), 'metas': set()}
+        excluidos = {tipo: set() for tipo in registros}
+        while True:
+            parametros = {'limite': limite, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/sincronizar/', parametros)
+            self.assertEqual(response.status_code, 200, response.content)
+            dados = response.json()
+            for tipo in registros:
+                registros[tipo] |= {item['id'] for item in dados[tipo]}
+                excluidos[tipo] |= set(dados['excluidos'][tipo])
+            cursor = dados['cursor']
+            if not dados['mais']:
+                return registros, excluidos, dados['completo'], cursor
+
+    def test_copia_completa_paginada(self):
+        registros, excluidos, completo, _ = self.sincronizar()
+
+        self.assertTrue(completo)
+        self.assertEqual(registros['transacoes'], {t.pk for t in self.transacoes})
+        self.assertEqual(len(registros['categorias']), Categoria.objects.filter(user=self.user).count())
+        self.assertEqual(len(registros['metas']), 3)
+        self.assertEqual(excluidos, {'categorias': set(), 'transacoes': set(), 'metas': set()})
+
+    def test_alteracoes_e_exclusoes_desde_o_cursor(self):
+        _, _, _, cursor = self.sincronizar()
+        # Tira os registros da primeira rodada da margem de segurança do cursor
+        for modelo in (Categoria, Transacao, Meta):
+            modelo.objects.filter(user=self.user).update(atualizada_em=timezone.now() - timedelta(minutes=5))
+
+        excluidas = {self.transacoes[1].pk, self.transacoes[2].pk}
+        alterada = self.transacoes[0]
+        alterada.valor = '4.00'
+        alterada.save()
+        self.transacoes[1].delete()
+        self.client.post('/api/transacoes/lote/', {'operacoes': [
+            {'acao': 'excluir', 'id': self.transacoes[2].pk},
+        ]}, format='json')
+        outra = Categoria.objects.get(user=self.user, nome='Saúde')
+        categorias_excluidas = {outra.pk, self.categoria.pk}
+        outra.delete()
+        # O SET_NULL da exclusão da categoria também conta como alteração
+        Transacao.objects.filter(pk=self.transacoes[3].pk).update(atualizada_em=timezone.now() - timedelta(minutes=5))
+        self.categoria.delete()
+
+        registros, excluidos, completo, _ = self.sincronizar(cursor)
+
+        self.assertFalse(completo)
+        self.assertEqual(registros['transacoes'], {self.transacoes[i].pk for i in (0, 3, 4, 5, 6)})
+        self.assertEqual(registros['categorias'], set())
+        self.assertEqual(excluidos['transacoes'], excluidas)
+        self.assertEqual(excluidos['categorias'], categorias_excluidas)
+
+    def test_exclusao_do_usuario_nao_deixa_marcas(self):
+        self.user.delete()
+        self.assertFalse(Exclusao.objects.exists())
+
+    def test_cursor_malformado_responde_400(self):
+        def codificar(estado):
+            texto = estado if isinstance(estado, str) else json.dumps(estado)
+            return base64.urlsafe_b64encode(texto.encode()).decode()
+
+        invalidos = [
+            'x', '!!!', codificar('[1, 2]'), codificar('nada'), codificar({'desde': 'ontem'}),
+            # Sem fuso: não dá para comparar com o horário do servidor
+            codificar({'desde': '2025-01-01T00:00:00'}),
+            codificar({'desde': '2025-01-01T00:00:00+00:00', 'ate': '2025-01-02T00:00:00'}),
+            codificar({'desde': None, 'ate': '2025-01-02T00:00:00+00:00', 'posicoes': {'outro': None}}),
+            codificar({
+                'ate': '2025-01-02T00:00:00+00:00',
+                'posicoes': {'transacoes': ['2025-01-01T00:00:00+00:00', 2 ** 64]},
+            }),
+        ]
+        for cursor in invalidos:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/sincronizar/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {'cursor': 'Cursor inválido.'})
+
+
+# ============================================
+# BUSCA TEXTUAL (/api/transacoes/busca/)
+# ============================================
+
+class BuscaTransacoesTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('busca', password='senha-teste')
+        self.saude = Categoria.objects.get(user=self.user, nome='Saúde')
+        self.farmacia = Transacao.objects.create(
+            user=self.user, descricao='Farmácia São João', valor='30.00', tipo='despesa',
+            categoria=self.saude, data=date(2025, 3, 1)
+        )
+        self.padaria = Transacao.objects.create(
+            user=self.user, descricao='Padaria', valor='12.00', tipo='despesa',
+            observacao='Pão de açúcar', data=date(2025, 3, 2)
+        )
+        self.outro = User.objects.create_user('outro-busca', password='senha-teste')
+        Transacao.objects.create(
+            user=self.outro, descricao='Farmácia do outro', valor='5.00', tipo='despesa', data=date(2025, 3, 1)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def buscar(self, q):
+        response = self.client.get('/api/transacoes/busca/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['resultados']]
+
+    def test_ignora_acentos_e_maiusculas_e_aceita_prefixo(self):
+        self.assertEqual(self.buscar('FARMACIA'), [self.farmacia.id])
+        self.assertEqual(self.buscar('farm sao'), [self.farmacia.id])
+        self.assertEqual(self.buscar('acucar'), [self.padaria.id])
+        self.assertEqual(self.buscar('saude'), [self.farmacia.id])
+        self.assertEqual(self.buscar('"farmácia* (joão'), [self.farmacia.id])
+
+    def test_indice_acompanha_as_escritas(self):
+        self.saude.nome = 'Bem-estar'
+        self.saude.save()
+        self.assertEqual(self.buscar('bem estar'), [self.farmacia.id])
+
+        self.client.post('/api/transacoes/lote/', {'operacoes': [
+            {'acao': 'atualizar', 'id': self.padaria.id, 'dados': {'descricao': 'Confeitaria'}},
+            {'acao': 'excluir', 'id': self.farmacia.id},
+        ]}, format='json')
+        self.assertEqual(self.buscar('confeitaria'), [self.padaria.id])
+        self.assertEqual(self.buscar('padaria'), [])
+        self.assertEqual(self.buscar('farmacia'), [])
+
+    def test_busca_vazia(self):
+        self.assertEqual(self.client.get('/api/transacoes/busca/').status_code, 400)
+
+    def test_indice_filtra_o_usuario_no_match(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Só se aplica ao FTS5 do SQLite.')
+        self.assertEqual(self.buscar('outro'), [])
+        # O token do dono só é comparado com a coluna usuario, não com os termos da busca
+        self.assertEqual(self.buscar(f'u{self.outro.pk}'), [])
+        self.assertEqual(self.buscar(f'u{self.user.pk}'), [])
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid FROM contas_transacao_busca WHERE contas_transacao_busca MATCH %s ORDER BY rowid',
+                [f'usuario:"u{self.user.pk}"'],
+            )
+            self.assertEqual([linha[0] for linha in cursor.fetchall()], [self.farmacia.id, self.padaria.id])
+
+
+# ============================================
+# RECORRÊNCIAS
+# ============================================
+
+class RecorrenciaTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('recorrente', password='senha-teste')
+        self.moradia = Categoria.objects.get(user=self.user, nome='Moradia')
+        self.aluguel = Recorrencia.objects.create(
+            user=self.user, descricao='Aluguel', valor='1500.00', tipo='despesa',
+            categoria=self.moradia, frequencia='mensal', inicio=date(2025, 1, 31)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_ocorrencias_no_fim_do_mes_e_a_cada_duas_semanas(self):
+        self.assertEqual(
+            list(ocorrencias(self.aluguel, date(2025, 2, 1), date(2025, 4, 30))),
+            [date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)]
+        )
+        quinzenal = Recorrencia(frequencia='semanal', intervalo=2, inicio=date(2025, 1, 1), fim=date(2025, 2, 11))
+        self.assertEqual(
+            list(ocorrencias(quinzenal, date(2025, 1, 10), date(2025, 12, 31))),
+            [date(2025, 1, 15), date(2025, 1, 29)]
+        )
+
+    def test_geracao_idempotente_e_respeita_exclusoes(self):
+        self.assertEqual(gerar_ocorrencias(hoje=date(2025, 3, 31)), {'recorrencias': 1, 'transacoes': 3})
+        self.assertEqual(gerar_ocorrencias(hoje=date(2025, 3, 31)), {'recorrencias': 0, 'transacoes': 0})
+
+        Transacao.objects.get(recorrencia=self.aluguel, data=date(2025, 2, 28)).delete()
+        gerar_ocorrencias(hoje=date(2025, 4, 30))
+
+        datas = list(Transacao.objects.filter(recorrencia=self.aluguel).order_by('data').values_list('data', flat=True))
+        self.assertEqual(datas, [date(2025, 1, 31), date(2025, 3, 31), date(2025, 4, 30)])
+        resumo = ResumoMensal.objects.get(user=self.user, mes=date(2025, 4, 1), categoria=self.moradia)
+        self.assertEqual((resumo.total, resumo.quantidade), (Decimal('1500.00'), 1))
+
+    def test_projecao_nao_grava_e_comeca_depois_do_gerado(self):
+        gerar_ocorrencias(hoje=date(2025, 3, 31))
+        total = Transacao.objects.count()
+
+        response = self.client.get('/api/recorrencias/projecao/', {'inicio': '2025-03-01', 'fim': '2025-06-30'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([o['data'] for o in response.json()['ocorrencias']], ['2025-04-30', '2025-05-31', '2025-06-30'])
+        self.assertEqual(Transacao.objects.count(), total)
+
+    def test_criar_pela_api_gera_as_vencidas(self):
+        inicio = date.today().replace(day=1)
+        response = self.client.post('/api/recorrencias/', {
+            'descricao': 'Academia', 'valor': '99.90', 'tipo': 'despesa',
+            'frequencia': 'semanal', 'inicio': inicio.isoformat(),
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['gerada_ate'], date.today().isoformat())
+        self.assertTrue(Transacao.objects.filter(recorrencia_id=response.json()['id'], data=inicio).exists())
+
+
+# ============================================
+# ORÇAMENTO POR CATEGORIA
+# ============================================
+
+class OrcamentoTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('orcamento', password='senha-teste')
+        self.alimentacao = Categoria.objects.get(user=self.user, nome='Alimentação')
+        self.alimentacao.orcamento_mensal = Decimal('100.00')
+        self.alimentacao.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def criar(self, valor, categoria=None, data='2025-05-10'):
+        response = self.client.post('/api/transacoes/', {
+            'descricao': 'Mercado', 'valor': valor, 'tipo': 'despesa',
+            'categoria': (categoria or self.alimentacao).id, 'data': data,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.json()['orcamento']
+
+    def test_resposta_da_criacao_indica_estouro_sem_somar_o_mes(self):
+        self.assertFalse(self.criar('60.00')['estourado'])
+        self.criar('30.00', data='2025-04-30')  # Outro mês
+
+        with CaptureQueriesContext(connection) as contexto:
+            orcamento = self.criar('50.00')
+        self.assertTrue(orcamento['estourado'])
+        self.assertEqual((orcamento['realizado'], orcamento['restante']), (110.0, -10.0))
+        leituras = [q['sql'] for q in contexto.captured_queries if 'contas_transacao' in q['sql'] and 'SELECT' in q['sql']]
+        self.assertEqual(leituras, [])
+
+        sem_orcamento = Categoria.objects.get(user=self.user, nome='Lazer')
+        self.assertIsNone(self.criar('10.00', categoria=sem_orcamento))
+
+    def test_orcamento_do_mes_de_todas_as_categorias(self):
+        self.criar('120.00')
+        self.criar('40.00', data='2025-06-01')
+
+        response = self.client.get('/api/categorias/orcamento/', {'mes': '2025-05'})
+
+        self.assertEqual(response.status_code, 200)
+        dados = response.json()
+        self.assertEqual(len(dados['categorias']), Categoria.objects.filter(user=self.user).count())
+        linha = next(c for c in dados['categorias'] if c['id'] == self.alimentacao.id)
+        self.assertEqual((linha['realizado'], linha['estourado']), (120.0, True))
+        self.assertEqual(dados['estourados'], 1)
+        self.assertEqual(self.client.get('/api/categorias/orcamento/', {'mes': '2025-13'}).status_code, 400)
+
+    def test_categoria_de_outro_usuario_e_recusada(self):
+        outro = User.objects.create_user('orcamento-outro', password='senha-teste')
+        alheia = Categoria.objects.get(user=outro, nome='Alimentação')
+        alheia.orcamento_mensal = Decimal('50.00')
+        alheia.save()
+        dados = {'descricao': 'Mercado', 'valor': '10.00', 'tipo': 'despesa', 'categoria': alheia.id, 'data': '2025-05-10'}
+
+        response = self.client.post('/api/transacoes/', dados, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('categoria', response.json())
+        self.assertNotIn('orcamento', response.json())
+        self.assertFalse(Transacao.objects.filter(user=self.user).exists())
+
+        transacao = Transacao.objects.create(
+            user=self.user, descricao='Mercado', valor='10.00', tipo='despesa', data=date(2025, 5, 10)
+        )
+        response = self.client.patch(f'/api/transacoes/{transacao.id}/', {'categoria': alheia.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(Transacao.objects.get(pk=transacao.pk).categoria_id)
+
+
+# ============================================
+# EXPORTAÇÃO EM FLUXO (/api/transacoes/exportar/)
+# ============================================
+
+class ExportacaoTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('exportacao', password='senha-teste')
+        categoria = Categoria.objects.create(user=self.user, nome='Mercado', tipo='despesa')
+        Transacao.objects.bulk_create([
+            Transacao(user=self.user, descricao=f'Compra, item {i}', valor='19.90', tipo='despesa',
+                      categoria=categoria, data=date(2025, 1, 1) + timedelta(days=i))
+            for i in range(25)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.cabecalhos = {'Authorization': f'Bearer {RefreshToken.for_user(self.user).access_token}'}
+
+    def baixar(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, list(response.streaming_content)
+
+    async def abaixar(self, url, **cabecalhos):
+        response = await self.async_client.get(url, headers={**self.cabecalhos, **cabecalhos})
+        self.assertEqual(response.status_code, 200)
+        return response, [pedaco async for pedaco in response.streaming_content]
+
+    def test_csv_e_ndjson(self):
+        _, pedacos = self.baixar('/api/transacoes/exportar/')
+        linhas = list(csv.reader(io.StringIO(b''.join(pedacos).decode())))
+        self.assertEqual(linhas[0], exportacao.CABECALHO)
+        self.assertEqual(len(linhas), 26)
+        self.assertEqual(linhas[1][1:6], ['2025-01-01', 'Compra, item 0', '19.90', 'despesa', 'Mercado'])
+
+        response, pedacos = self.baixar('/api/transacoes/exportar/?formato=ndjson&inicio=2025-01-11')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        registros = [json.loads(linha) for linha in b''.join(pedacos).decode().splitlines()]
+        self.assertEqual(len(registros), 15)
+        self.assertEqual(registros[0]['data'], '2025-01-11')
+        self.assertEqual(registros[0]['categoria'], 'Mercado')
+
+    def test_compressao_zstd(self):
+        original = b''.join(self.baixar('/api/transacoes/exportar/')[1])
+        response, pedacos = self.baixar('/api/transacoes/exportar/?compressao=zstd')
+        self.assertEqual(response['Content-Type'], 'application/zstd')
+        self.assertIn('transacoes.csv.zst', response['Content-Disposition'])
+        leitor = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(b''.join(pedacos)))
+        self.assertEqual(leitor.read(), original)
+
+    def test_corpo_sai_em_pedacos(self):
+        with mock.patch.object(exportacao, 'LINHAS_POR_PEDACO', 10):
+            response, pedacos = self.baixar('/api/transacoes/exportar/')
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(len(pedacos), 3)
+
+    async def test_asgi_usa_iterador_assincrono(self):
+        original = b''.join((await sync_to_async(self.baixar)('/api/transacoes/exportar/'))[1])
+
+        with mock.patch.object(exportacao, 'LINHAS_POR_PEDACO', 10):
+            response, pedacos = await self.abaixar('/api/transacoes/exportar/')
+        # Fluxo assíncrono: o Django não precisa juntar o corpo com sync_to_async(list)
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(pedacos), 3)
+        self.assertEqual(b''.join(pedacos), original)
+
+        response, pedacos = await self.abaixar('/api/transacoes/exportar/?compressao=zstd')
+        self.assertTrue(response.is_async)
+        leitor = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(b''.join(pedacos)))
+        self.assertEqual(leitor.read(), original)
+
+        # Compressão do middleware sobre o fluxo assíncrono
+        response, pedacos = await self.abaixar('/api/transacoes/exportar/', **{'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(pedacos)), original)
+
+        response, pedacos = await self.abaixar('/api/transacoes/exportar/?formato=ndjson')
+        self.assertEqual(len(b''.join(pedacos).decode().splitlines()), 25)
+
+
+# ============================================
+# JSON (ORJSON) E COMPRESSÃO DAS RESPOSTAS
+# ============================================
+
+class RespostasComprimidasTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('compressao', password='senha-teste')
+        Transacao.objects.bulk_create([
+            Transacao(user=self.user, descricao=f'Compra {i}', valor='19.90', tipo='despesa', data=date(2025, 1, 1))
+            for i in range(60)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_renderer_gera_os_mesmos_bytes_do_drf(self):
+        dados = {
+            'valor': Decimal('10.50'), 'data': date(2025, 1, 2), 'quando': timezone.now(),
+            'texto': 'ação ', 1: [1.5, None, True], 'grande': 2 ** 70,
+        }
+        self.assertEqual(JSONRapidoRenderer().render(dados), JSONRenderer().render(dados))
+
+    def test_negocia_zstd_ou_gzip_pelo_accept_encoding(self):
+        original = self.client.get('/api/transacoes/').content
+
+        response = self.client.get('/api/transacoes/', HTTP_ACCEPT_ENCODING='gzip, deflate, br, zstd')
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(zstandard.ZstdDecompressor().decompress(response.content), original)
+
+        response = self.client.get('/api/transacoes/', HTTP_ACCEPT_ENCODING='zstd;q=0.5, gzip')
+        self.assertEqual(gzip.decompress(response.content), original)
+
+        response = self.client.get('/api/transacoes/', HTTP_ACCEPT_ENCODING='zstd;q=0, identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_respostas_pequenas_e_fluxos(self):
+        response = self.client.get('/api/users/me/', HTTP_ACCEPT_ENCODING='zstd')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+        response = self.client.get('/api/transacoes/exportar/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        csv_texto = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(csv_texto.splitlines()), 61)
+
+
+# ============================================
+# ESTÁTICOS E PÁGINAS HTML (MODO DE PRODUÇÃO)
+# ============================================
+
+class EstaticosEPaginasTests(TestCase):
+
+    def setUp(self):
+        limpar_paginas()
+        self.addCleanup(limpar_paginas)
+
+    def test_pagina_com_etag_e_304(self):
+        # Fora do modo de produção a página não é pré-comprimida: quem comprime é o middleware
+        self.assertEqual(pagina_em_cache('dashboard.html').comprimidas, {})
+
+        response = self.client.get('/dashboard.html', HTTP_ACCEPT_ENCODING='zstd')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'zstd')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        html = zstandard.ZstdDecompressor().decompress(response.content, max_output_size=10 ** 6).decode()
+        self.assertIn('/static/CSS/dashboard.css', html)
+
+        repetida = self.client.get('/dashboard.html', HTTP_ACCEPT_ENCODING='zstd',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(repetida.content, b'')
+
+        sem_compressao = self.client.get('/dashboard.html')
+        self.assertEqual(sem_compressao.content.decode(), html)
+
+    def test_modo_de_producao(self):
+        destino = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, destino)
+        storages = {
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+            'staticfiles': {'BACKEND': 'contas.estaticos.EstaticosComprimidos'},
+        }
+        with override_settings(ESTATICOS_PRODUCAO=True, STATIC_ROOT=destino, STORAGES=storages):
+            # O url(Background.png) do style.css aponta para um arquivo que não existe
+            with self.assertLogs('contas.estaticos', 'WARNING'):
+                call_command('collectstatic', interactive=False, verbosity=0)
+
+            response = self.client.get('/dashboard.html')
+            nome = next(parte.split('"')[0] for parte in response.content.decode().split('/static/')[1:]
+                        if parte.startswith('CSS/dashboard.'))
+            self.assertRegex(nome, r'^CSS/dashboard\.[0-9a-f]{12}\.css$')
+
+            # Renderizada uma vez: o template mudar no disco não muda a página em cache
+            with self.settings(TEMPLATES=[]):
+                self.assertEqual(self.client.get('/dashboard.html').content, response.content)
+
+            # Pré-comprimida: cada representação com a sua ETag forte
+            comprimida = self.client.get('/dashboard.html', HTTP_ACCEPT_ENCODING='zstd')
+            self.assertEqual(comprimida['Content-Encoding'], 'zstd')
+            self.assertEqual(comprimida['ETag'], response['ETag'][:-1] + '-zstd"')
+            self.assertEqual(
+                self.client.get('/dashboard.html', HTTP_ACCEPT_ENCODING='zstd',
+                                HTTP_IF_NONE_MATCH=comprimida['ETag']).status_code, 304
+            )
+            self.assertEqual(self.client.get('/dashboard.html', HTTP_IF_NONE_MATCH=comprimida['ETag']).status_code, 200)
+
+            fabrica = RequestFactory()
+            arquivo = servir_estatico(fabrica.get('/', HTTP_ACCEPT_ENCODING='zstd, gzip'), nome)
+            self.assertEqual(arquivo['Content-Encoding'], 'zstd')
+            self.assertEqual(arquivo['Cache-Control'], 'public, max-age=31536000, immutable')
+            self.assertEqual(arquivo['Content-Type'], 'text/css')
+            with open(f'{destino}/{nome}', 'rb') as original:
+                self.assertEqual(
+                    zstandard.ZstdDecompressor().decompress(b''.join(arquivo.streaming_content)),
+                    original.read()
+                )
+
+            sem_hash = servir_estatico(fabrica.get('/'), 'CSS/dashboard.css')
+            self.assertEqual(sem_hash['Cache-Control'], 'no-cache')
+            self.assertFalse(sem_hash.has_header('Content-Encoding'))
+            sem_hash.close()
+
+
+# ============================================
+# ARQUIVO DAS TRANSAÇÕES ANTIGAS
+# ============================================
+
+class ArquivoTransacoesTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('arquivo', password='senha-teste')
+        self.categoria = Categoria.objects.filter(user=self.user, tipo='despesa').first()
+        for i in range(30):
+            Transacao.objects.create(
+                user=self.user, descricao=f'Mercado {i}', valor='12.30', tipo='despesa',
+                categoria=self.categoria, data=date(2020 + i % 3, 1 + i % 12, 10)
+            )
+        Transacao.objects.create(user=self.user, descricao='Mercado recente', valor='5.00', tipo='despesa',
+                                 data=date(2025, 3, 1))
+        # Sem alteração há mais que ARQUIVO_REPOUSO_DIAS
+        Transacao.objects.update(atualizada_em=timezone.now() - timedelta(days=60))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def arquivar(self):
+        # Horizonte de 24 meses a partir de 06/2025: anos anteriores a 2023
+        return arquivar(hoje=date(2025, 6, 1), meses=24)
+
+    def test_arquiva_sem_mudar_os_totais(self):
+        estatisticas = self.client.get('/api/transacoes/estatisticas/').json()
+        versao = UserProfile.objects.get(user=self.user).versao_dados
+
+        self.assertEqual(self.arquivar(), {'usuarios': 1, 'segmentos': 3, 'transacoes': 30})
+        self.assertEqual(list(ArquivoTransacoes.objects.values_list('ano', 'quantidade')), [(2020, 10), (2021, 10), (2022, 10)])
+        self.assertEqual(Transacao.objects.filter(user=self.user).count(), 1)
+
+        self.assertEqual(self.client.get('/api/transacoes/estatisticas/').json(), estatisticas)
+        self.assertGreater(UserProfile.objects.get(user=self.user).versao_dados, versao)
+        self.assertFalse(Exclusao.objects.filter(modelo='transacao').exists())
+        self.assertEqual(len(buscar_transacoes(self.user, 'mercado', 100)), 1)
+        call_command('reconstruir_resumos', '--verificar', stdout=io.StringIO())
+
+        # Rodar de novo não arquiva nada
+        self.assertEqual(self.arquivar()['transacoes'], 0)
+
+    def versao(self):
+        return UserProfile.objects.get(user=self.user).versao_dados
+
+    def test_leitura_de_periodo_arquivado_responde_409(self):
+        self.arquivar()
+        versao = self.versao()
+
+        for url in (
+            '/api/transacoes/?inicio=2021-01-01&fim=2021-12-31',
+            '/api/transacoes/serie/?granularidade=dia&inicio=2021-01-01&fim=2021-03-31',
+            '/api/transacoes/exportar/',
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 409)
+                self.assertIn('restaurar', response.json()['detail'])
+
+        # GET não escreve: nada volta do arquivo e as ETags continuam valendo
+        self.assertEqual(ArquivoTransacoes.objects.count(), 3)
+        self.assertEqual(self.versao(), versao)
+        # Meses inteiros saem do ResumoMensal, que ainda conta o arquivado
+        response = self.client.get('/api/transacoes/serie/?granularidade=mes&inicio=2021-01-01&fim=2021-12-31')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/transacoes/?inicio=2024-01-01').json()['count'], 1)
+
+    def test_periodo_antigo_restaura_o_ano(self):
+        originais = {t.pk: (t.criada_em, t.descricao) for t in Transacao.objects.filter(data__year=2021)}
+        self.arquivar()
+        self.categoria.delete()
+        versao = self.versao()
+
+        response = self.client.post('/api/transacoes/restaurar/?inicio=2021-01-01&fim=2021-12-31')
+        self.assertEqual(response.json(), {'restauradas': 10})
+        self.assertGreater(self.versao(), versao)
+        self.assertEqual(list(ArquivoTransacoes.objects.values_list('ano', flat=True)), [2020, 2022])
+        response = self.client.get('/api/transacoes/?inicio=2021-01-01&fim=2021-12-31')
+        self.assertEqual(response.json()['count'], 10)
+
+        restauradas = Transacao.objects.filter(data__year=2021)
+        self.assertEqual({t.pk: (t.criada_em, t.descricao) for t in restauradas}, originais)
+        # Categoria excluída enquanto estava arquivada: como no SET_NULL
+        self.assertFalse(restauradas.filter(categoria__isnull=False).exists())
+        self.assertEqual(len(buscar_transacoes(self.user, 'mercado', 100)), 11)
+        call_command('reconstruir_resumos', '--verificar', stdout=io.StringIO())
+
+        # Sem período restaura o resto e a exportação leva o histórico inteiro
+        self.assertEqual(self.client.post('/api/transacoes/restaurar/').json(), {'restauradas': 20})
+        response = self.client.get('/api/transacoes/exportar/')
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 32)
+        self.assertFalse(ArquivoTransacoes.objects.exists())
+        self.assertEqual(self.client.post('/api/transacoes/restaurar/').json(), {'restauradas': 0})
+
+    def test_segmentos_em_disco(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        with self.settings(ARQUIVO_DESTINO='disco', MEDIA_ROOT=media):
+            self.arquivar()
+            segmento = ArquivoTransacoes.objects.get(ano=2020)
+            self.assertIsNone(segmento.dados)
+            caminho = f'{media}/{segmento.arquivo}'
+            with open(caminho, 'rb') as arquivo:
+                self.assertEqual(len(arquivo.read()), segmento.tamanho)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/api/transacoes/restaurar/?inicio=2020-01-01&fim=2020-12-31')
+            self.assertFalse(ArquivoTransacoes.objects.filter(ano=2020).exists())
+            self.assertEqual(Transacao.objects.filter(data__year=2020).count(), 10)
+            with self.assertRaises(FileNotFoundError):
+                open(caminho, 'rb')
 
-# Create your tests here.
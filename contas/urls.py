@@ -1,12 +1,15 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import views, views_async
 
-# Configuração automática das rotas para as tabelas (Categorias, Transações, Metas)
+# Configuração automática das rotas para as tabelas (Categorias, Transações, Metas, Recorrências)
 router = DefaultRouter()
 router.register(r'categorias', views.CategoriaViewSet, basename='categoria')
 router.register(r'transacoes', views.TransacaoViewSet, basename='transacao')
 router.register(r'metas', views.MetaViewSet, basename='meta')
+router.register(r'recorrencias', views.RecorrenciaViewSet, basename='recorrencia')
+router.register(r'relatorios', views.RelatorioViewSet, basename='relatorio')
 
 urlpatterns = [
     # Rotas de Autenticação (Apontando para as funções do seu views.py)
@@ -17,6 +20,23 @@ urlpatterns = [
     # O JavaScript chama /api/users/me/, então aqui definimos users/me/
     path('users/me/', views.user_me, name='user_me'),
 
+    # Sincronização incremental (cópia local no front)
+    path('sincronizar/', views.sincronizar_view, name='sincronizar'),
+
+    # Métricas (somente admin)
+    path('metricas/', views.metricas_view, name='metricas'),
+    path('metricas/cache-usuarios/', views.cache_usuarios_view, name='cache_usuarios'),
+
     # Inclui todas as rotas automáticas do router
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+
+# Leituras com o ORM assíncrono, só quando o projeto roda sob ASGI (ver asgi.py)
+if settings.API_ASSINCRONA:
+    urlpatterns = [
+        path('users/me/', views_async.user_me, name='user_me'),
+        path('transacoes/', views_async.transacoes, name='transacao-list'),
+        path('transacoes/estatisticas/', views_async.estatisticas, name='transacao-estatisticas'),
+        path('categorias/', views_async.categorias, name='categoria-list'),
+        path('metas/', views_async.metas, name='meta-list'),
+    ] + urlpatterns
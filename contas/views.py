@@ -1,18 +1,52 @@
-from rest_framework import viewsets, status
+from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.exceptions import APIException, ValidationError
 from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
 from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
 from django.contrib.auth import authenticate
-from .models import Categoria, Transacao, Meta
+import gzip
+import json
+from datetime import date, timedelta
+from .authentication import cache_usuarios
+from .cache_respostas import em_cache
+from .models import (
+    ArquivoTransacoes, Categoria, Transacao, Meta, Recorrencia, ResumoMensal, RelatorioSnapshot, UserProfile,
+    inicio_do_mes
+)
+from .metricas import formatar_prometheus
+from .orcamentos import orcamento_do_mes, situacao_da_transacao
+from .importacao import importar_extrato, detectar_formato, ErroImportacao
+from .lote import aplicar_lote, ErroLote
+from .busca import buscar_transacoes, LIMITE_PADRAO as LIMITE_BUSCA, LIMITE_MAXIMO as LIMITE_MAXIMO_BUSCA
+from .exportacao import agerar_exportacao, gerar_exportacao, FORMATOS as FORMATOS_EXPORTACAO
+from .pagination import TransacaoKeysetPagination
+from .recorrencias import gerar_ocorrencias, projetar, MAXIMO_PROJECAO
+from .sincronizacao import (
+    CursorInvalido, sincronizar, LIMITE_PADRAO as LIMITE_SINCRONIZACAO, LIMITE_MAXIMO as LIMITE_MAXIMO_SINCRONIZACAO
+)
+from .series import (
+    DATA_MAXIMA, DATA_MINIMA, GRANULARIDADES, MAXIMO_PONTOS, contar_periodos, inicio_padrao, montar_serie, usa_resumo
+)
+from .arquivo import anos_arquivados, restaurar_periodo
+from .relatorios import solicitar_relatorio, caminho_arquivo
 from .serializers import (
     CategoriaSerializer, 
     TransacaoSerializer, 
+    TransacaoLeituraSerializer,
     MetaSerializer,
-    UserSerializer
+    RecorrenciaSerializer,
+    UserSerializer,
+    RelatorioSnapshotSerializer
 )
 
 # ============================================
@@ -82,12 +116,14 @@ def register_view(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # O Signal no models.py vai criar o UserProfile automaticamente aqui
-    user = User.objects.create_user(
-        username=username,
-        password=password,
-        email=email
-    )
+    # O Signal no models.py vai criar o UserProfile automaticamente aqui,
+    # na mesma transação do User (não sobra usuário sem perfil se algo falhar)
+    with transaction.atomic():
+        user = User.objects.create_user(
+            username=username,
+            password=password,
+            email=email
+        )
     
     serializer = UserSerializer(user)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -123,16 +159,115 @@ def user_me(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+# ============================================
+# SINCRONIZAÇÃO INCREMENTAL
+# ============================================
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sincronizar_view(request):
+    """
+    Categorias, transações, metas e recorrências criadas ou alteradas e ids excluídos
+    desde o cursor da última chamada (sem cursor: cópia completa).
+    ENDPOINT: /api/sincronizar/?cursor=&limite=
+
+    Enquanto 'mais' for true, chame de novo com o 'cursor' devolvido.
+    """
+    try:
+        limite = min(max(int(request.query_params.get('limite', LIMITE_SINCRONIZACAO)), 1), LIMITE_MAXIMO_SINCRONIZACAO)
+    except ValueError:
+        raise ValidationError({'limite': 'Use um número inteiro.'})
+    try:
+        return Response(sincronizar(request.user, request.query_params.get('cursor'), limite))
+    except CursorInvalido as erro:
+        raise ValidationError({'cursor': str(erro)})
+
+
+# ============================================
+# MÉTRICAS (ADMIN)
+# ============================================
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_usuarios_view(request):
+    """
+    Acertos, falhas, expirações e despejos do cache de usuários do JWT
+    neste processo, para dimensionar CACHE_USUARIOS_TAMANHO/TTL.
+    ENDPOINT: /api/metricas/cache-usuarios/
+    """
+    return Response(cache_usuarios.estatisticas())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metricas_view(request):
+    """
+    Latência, consultas e tamanho das respostas por rota (MetricasMiddleware)
+    e contadores do cache de usuários, no formato texto do Prometheus.
+    ENDPOINT: /api/metricas/
+    """
+    return HttpResponse(formatar_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ============================================
+# GET CONDICIONAL (ETAG) NAS LISTAGENS
+# ============================================
+
+def consulta_versao(user):
+    return UserProfile.objects.filter(user=user).values_list('versao_dados', flat=True)
+
+
+def etag_da_listagem(user_id, versao, formato):
+    # Fraca: o GZip/compressão pode mudar os bytes, não o conteúdo
+    return f'W/"{user_id}-{versao}-{formato}"'
+
+
+def etag_confere(request, etag):
+    """Comparação fraca com o If-None-Match, como pede o GET condicional."""
+    pedidas = parse_etags(request.headers.get('If-None-Match', ''))
+    if '*' in pedidas:
+        return True
+    alvo = etag.removeprefix('W/')
+    return any(pedida.removeprefix('W/') == alvo for pedida in pedidas)
+
+
+def marcar_cache(response, etag):
+    # private: a resposta é do usuário; no-cache: o navegador sempre revalida
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ListagemCondicionalMixin:
+    """
+    ETag nas listagens a partir de UserProfile.versao_dados. Se o
+    If-None-Match ainda vale, responde 304 sem executar a consulta da lista
+    nem o serializer (só a leitura da versão, pela chave do perfil).
+    """
+
+    def list(self, request, *args, **kwargs):
+        versao = consulta_versao(request.user).first()
+        if versao is None:
+            return super().list(request, *args, **kwargs)
+
+        etag = etag_da_listagem(request.user.pk, versao, request.accepted_renderer.format)
+        if etag_confere(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().list(request, *args, **kwargs)
+        return marcar_cache(response, etag)
+
+
 # ============================================
 # CATEGORIAS
 # ============================================
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(ListagemCondicionalMixin, viewsets.ModelViewSet):
     serializer_class = CategoriaSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Categoria.objects.filter(user=self.request.user)
+        return Categoria.objects.filter(user=self.request.user).select_related('user')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -140,23 +275,225 @@ class CategoriaViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def orcamento(self, request):
+        """
+        Orçamento x realizado de todas as categorias no mês, numa consulta.
+        ENDPOINT: /api/categorias/orcamento/?mes=AAAA-MM (padrão: mês atual)
+        """
+        valor = request.query_params.get('mes')
+        if valor:
+            try:
+                mes = date.fromisoformat(f'{valor}-01')
+            except ValueError:
+                raise ValidationError({'mes': 'Use o formato AAAA-MM.'})
+        else:
+            mes = inicio_do_mes(date.today())
+
+        data = em_cache(request, f'orcamento:{mes}', lambda: orcamento_do_mes(request.user, mes))
+        return Response(data, status=status.HTTP_200_OK)
+
 
 # ============================================
 # TRANSAÇÕES (RECEITAS E DESPESAS)
 # ============================================
 
-class TransacaoViewSet(viewsets.ModelViewSet):
+def data_do_parametro(request, parametro):
+    """Lê ?parametro=AAAA-MM-DD; None se ausente."""
+    valor = request.query_params.get(parametro)
+    if not valor:
+        return None
+    try:
+        data = parse_date(valor)
+    except ValueError:
+        data = None
+    if data is None:
+        raise ValidationError({parametro: 'Use o formato AAAA-MM-DD.'})
+    return data
+
+
+class PeriodoArquivado(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_code = 'periodo_arquivado'
+
+
+def conferir_arquivados(user, inicio=None, fim=None):
+    """
+    Leitura (GET) de um período com anos arquivados responde 409: a
+    restauração escreve na tabela e muda a versao_dados, então é um POST
+    à parte (/api/transacoes/restaurar/).
+    """
+    anos = anos_arquivados(user, inicio, fim)
+    if anos:
+        raise PeriodoArquivado(
+            f'Os anos {", ".join(map(str, anos))} estão arquivados; '
+            'restaure-os com POST /api/transacoes/restaurar/.'
+        )
+
+
+def consulta_totais(user):
+    """
+    Soma o ResumoMensal do usuário por (tipo, categoria_id).
+
+    Agrupa por categoria_id, que é coberto pelo índice resumo_user_tipo_cat_idx,
+    e os nomes das categorias são buscados à parte. Agrupar direto por
+    categoria__nome obrigaria o banco a montar uma B-tree temporária para o GROUP BY.
+    """
+    return ResumoMensal.objects.filter(user=user).values('tipo', 'categoria_id').annotate(
+        total=Sum('total'),
+        quantidade=Sum('quantidade')
+    ).order_by('tipo', 'categoria_id')
+
+
+def nomear_categorias(linhas, nomes):
+    """Troca o categoria_id de cada linha de consulta_totais pelo nome."""
+    for linha in linhas:
+        linha['categoria'] = nomes.get(linha.pop('categoria_id'))
+    return linhas
+
+
+def totais_por_categoria(user):
+    linhas = list(consulta_totais(user))
+
+    ids = {linha['categoria_id'] for linha in linhas if linha['categoria_id']}
+    nomes = dict(Categoria.objects.filter(user=user, id__in=ids).values_list('id', 'nome')) if ids else {}
+    return nomear_categorias(linhas, nomes)
+
+
+def montar_estatisticas(totais):
+    """Resposta de /api/transacoes/estatisticas/ a partir de totais_por_categoria."""
+    stats = sorted(
+        totais,
+        key=lambda item: (item['tipo'], item['categoria'] is not None, item['categoria'] or '')
+    )
+
+    data = {
+        'receitas': [],
+        'despesas': [],
+        'total_receitas': 0,
+        'total_despesas': 0,
+    }
+
+    for item in stats:
+        if item['tipo'] == 'receita':
+            data['receitas'].append({
+                'categoria': item['categoria'],
+                'total': item['total']
+            })
+            data['total_receitas'] += item['total']
+        elif item['tipo'] == 'despesa':
+            data['despesas'].append({
+                'categoria': item['categoria'],
+                'total': item['total']
+            })
+            data['total_despesas'] += item['total']
+
+    return data
+
+
+def montar_dashboard(user):
+    """Resposta de /api/transacoes/dashboard/ (totais por categoria e metas)."""
+    stats = sorted(totais_por_categoria(user), key=lambda item: (item['tipo'], -item['total']))
+
+    data = {
+        'total_receitas': 0,
+        'total_despesas': 0,
+        'saldo': 0,
+        'total_transacoes': 0,
+        'receitas_por_categoria': [],
+        'despesas_por_categoria': [],
+        'metas': [],
+    }
+
+    for item in stats:
+        linha = {
+            'categoria': item['categoria'],
+            'total': item['total'],
+            'quantidade': item['quantidade']
+        }
+        if item['tipo'] == 'receita':
+            data['receitas_por_categoria'].append(linha)
+            data['total_receitas'] += item['total']
+        elif item['tipo'] == 'despesa':
+            data['despesas_por_categoria'].append(linha)
+            data['total_despesas'] += item['total']
+        data['total_transacoes'] += item['quantidade']
+
+    data['saldo'] = data['total_receitas'] - data['total_despesas']
+
+    metas = Meta.objects.filter(user=user).order_by('-criada_em').values(
+        'id', 'nome', 'tipo', 'valor_alvo', 'valor_atual', 'data_limite'
+    )
+    for m in metas:
+        m['percentual'] = round((m['valor_atual'] / m['valor_alvo']) * 100, 2) if m['valor_alvo'] else 0
+        data['metas'].append(m)
+
+    return data
+
+
+class TransacaoViewSet(ListagemCondicionalMixin, viewsets.ModelViewSet):
     serializer_class = TransacaoSerializer
     permission_classes = [IsAuthenticated]
+
+    @property
+    def paginator(self):
+        """
+        Usa a paginação por cursor quando pedida com ?paginacao=cursor
+        (rolagem infinita em receitas.js/despesas.js); senão, a paginação padrão.
+        """
+        if not hasattr(self, '_paginator'):
+            request = getattr(self, 'request', None)
+            if request is not None and request.query_params.get('paginacao') == 'cursor':
+                self._paginator = TransacaoKeysetPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
     
     def get_queryset(self):
-        queryset = Transacao.objects.filter(user=self.request.user)
+        # select_related evita 2 consultas extras por linha (categoria_nome e user)
+        queryset = Transacao.objects.filter(user=self.request.user).select_related('categoria', 'user')
         
         tipo = self.request.query_params.get('tipo')
         if tipo:
             queryset = queryset.filter(tipo=tipo)
+
+        if self.action == 'list':
+            queryset = self.filtrar_periodo(queryset)
+
+        if self.leitura_leve():
+            queryset = queryset.values(*TransacaoLeituraSerializer.CAMPOS)
         
-        return queryset.order_by('-data')
+        return queryset.order_by('-data', '-criada_em', '-id')
+
+    def leitura_leve(self):
+        """Listagem com ?leve=1: lê dicionários com .values() em vez de instâncias."""
+        return self.action == 'list' and self.request.query_params.get('leve') in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.leitura_leve():
+            return TransacaoLeituraSerializer
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        """
+        Aceita ?inicio=AAAA-MM-DD e ?fim=AAAA-MM-DD. Um período com anos
+        arquivados responde 409 (ver restaurar).
+        """
+        inicio, fim = self.data_do_parametro('inicio'), self.data_do_parametro('fim')
+        if inicio or fim:
+            conferir_arquivados(request.user, inicio, fim)
+        return super().list(request, *args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        """
+        Cria a transação e devolve junto a situação do orçamento da
+        categoria no mês ('orcamento': null quando ela não tem orçamento).
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        data = {**serializer.data, 'orcamento': situacao_da_transacao(serializer.instance)}
+        return Response(data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -164,35 +501,207 @@ class TransacaoViewSet(viewsets.ModelViewSet):
     def perform_update(self, serializer):
         serializer.save(user=self.request.user)
 
+    def data_do_parametro(self, parametro):
+        return data_do_parametro(self.request, parametro)
+
+    def filtrar_periodo(self, queryset):
+        """Aplica ?inicio=AAAA-MM-DD e ?fim=AAAA-MM-DD (inclusivos) em 'data'."""
+        for parametro, lookup in (('inicio', 'data__gte'), ('fim', 'data__lte')):
+            data = self.data_do_parametro(parametro)
+            if data is not None:
+                queryset = queryset.filter(**{lookup: data})
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta todo o histórico (ou um período) em fluxo, sem paginação.
+        ENDPOINT: /api/transacoes/exportar/?formato=csv|ndjson&inicio=&fim=&tipo=&compressao=zstd
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS_EXPORTACAO:
+            raise ValidationError({'formato': 'Use csv ou ndjson.'})
+        comprimir = request.query_params.get('compressao') == 'zstd'
+
+        # Exportação sem período é do histórico inteiro: qualquer ano arquivado dá 409
+        conferir_arquivados(request.user, self.data_do_parametro('inicio'), self.data_do_parametro('fim'))
+
+        queryset = Transacao.objects.filter(user=request.user)
+        tipo = request.query_params.get('tipo')
+        if tipo:
+            queryset = queryset.filter(tipo=tipo)
+        queryset = self.filtrar_periodo(queryset).order_by('data', 'criada_em', 'id')
+
+        content_type, extensao = FORMATOS_EXPORTACAO[formato]
+        nome = f'transacoes.{extensao}'
+        if comprimir:
+            content_type, nome = 'application/zstd', f'{nome}.zst'
+
+        # Sob ASGI o fluxo precisa ser assíncrono para não ser juntado na memória
+        gerar = agerar_exportacao if isinstance(request._request, ASGIRequest) else gerar_exportacao
+        response = StreamingHttpResponse(gerar(queryset, formato, comprimir), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{nome}"'
+        return response
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Importa um extrato CSV ou OFX em lote.
+        ENDPOINT: /api/transacoes/importar/ (multipart)
+
+        Campos: arquivo, formato (csv/ofx, opcional se a extensão indicar),
+        codificacao (padrão utf-8) e regras (JSON {"trecho da descrição": "Categoria"}).
+        """
+        arquivo = request.FILES.get('arquivo')
+        if arquivo is None:
+            return Response({'detail': 'Envie o extrato no campo "arquivo".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        formato = (request.data.get('formato') or detectar_formato(arquivo.name) or '').lower()
+        codificacao = request.data.get('codificacao') or 'utf-8-sig'
+
+        try:
+            regras = json.loads(request.data.get('regras') or '{}')
+            if not isinstance(regras, dict):
+                raise ValueError
+        except ValueError:
+            return Response({'detail': 'Regras devem ser um objeto JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            resultado = importar_extrato(request.user, arquivo, formato, regras=regras, codificacao=codificacao)
+        except (ErroImportacao, LookupError) as erro:
+            # LookupError: codificação desconhecida
+            return Response({'detail': str(erro)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(resultado, status=status.HTTP_201_CREATED if resultado['importadas'] else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Cria, atualiza e exclui várias transações numa só requisição (tudo ou nada).
+        ENDPOINT: /api/transacoes/lote/
+
+        Corpo: {"operacoes": [{"acao": "criar", "dados": {...}},
+                              {"acao": "atualizar", "id": 1, "dados": {...campos alterados}},
+                              {"acao": "excluir", "id": 2}]}
+        Resposta: {"resultados": [{"acao", "id", "status"}, ...]} na ordem enviada.
+        """
+        try:
+            resultados = aplicar_lote(request.user, request.data.get('operacoes'))
+        except ErroLote as erro:
+            corpo = {'detail': str(erro)}
+            if erro.resultados is not None:
+                corpo['resultados'] = erro.resultados
+            return Response(corpo, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'resultados': resultados}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def busca(self, request):
+        """
+        Busca em descrição, observação e categoria, sem diferenciar acentos.
+        ENDPOINT: /api/transacoes/busca/?q=farmacia&limite=50
+
+        Todas as palavras precisam aparecer (cada uma vale como início de
+        palavra no SQLite); os resultados vêm do mais relevante ao menos.
+        As transações arquivadas ficam fora da busca.
+        """
+        texto = request.query_params.get('q', '').strip()
+        if not texto:
+            raise ValidationError({'q': 'Informe o texto da busca.'})
+        try:
+            limite = min(max(int(request.query_params.get('limite', LIMITE_BUSCA)), 1), LIMITE_MAXIMO_BUSCA)
+        except ValueError:
+            raise ValidationError({'limite': 'Use um número inteiro.'})
+
+        transacoes = buscar_transacoes(request.user, texto, limite)
+        return Response({'q': texto, 'resultados': TransacaoSerializer(transacoes, many=True).data})
+
+    @action(detail=False, methods=['get'])
+    def arquivo(self, request):
+        """
+        Anos com transações arquivadas (fora da listagem sem período e da busca).
+        ENDPOINT: /api/transacoes/arquivo/
+        Ler um período desses anos (?inicio/?fim na listagem, exportar ou
+        série por dia/semana) responde 409 até o POST em /restaurar/; o
+        pedido de relatório restaura sozinho.
+        """
+        anos = ArquivoTransacoes.objects.filter(user=request.user).values(
+            'ano', 'quantidade', 'tamanho', 'arquivado_em'
+        )
+        return Response({'anos': list(anos)})
+
+    @action(detail=False, methods=['post'])
+    def restaurar(self, request):
+        """
+        Devolve para a tabela os anos arquivados que cruzam o período.
+        ENDPOINT: POST /api/transacoes/restaurar/?inicio=&fim= (sem período, todos os anos)
+        """
+        restauradas = restaurar_periodo(request.user, self.data_do_parametro('inicio'), self.data_do_parametro('fim'))
+        return Response({'restauradas': restauradas}, status=status.HTTP_200_OK)
+
     @action(detail=False, methods=['get'])
     def estatisticas(self, request):
-        user = request.user
-        
-        stats = Transacao.objects.filter(user=user).values('categoria__nome', 'tipo').annotate(
-            total=Sum('valor')
-        ).order_by('tipo', 'categoria__nome')
-        
-        data = {
-            'receitas': [],
-            'despesas': [],
-            'total_receitas': 0,
-            'total_despesas': 0,
-        }
-        
-        for item in stats:
-            if item['tipo'] == 'receita':
-                data['receitas'].append({
-                    'categoria': item['categoria__nome'],
-                    'total': item['total']
-                })
-                data['total_receitas'] += item['total']
-            elif item['tipo'] == 'despesa':
-                data['despesas'].append({
-                    'categoria': item['categoria__nome'],
-                    'total': item['total']
-                })
-                data['total_despesas'] += item['total']
-                
+        # Lê do ResumoMensal: custo proporcional a meses x categorias, não ao histórico.
+        # O resultado fica em cache até a próxima escrita do usuário.
+        data = em_cache(request, 'estatisticas', lambda: montar_estatisticas(totais_por_categoria(request.user)))
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def serie(self, request):
+        """
+        Série temporal do fluxo de caixa para gráficos, agrupada no banco.
+        ENDPOINT: /api/transacoes/serie/?granularidade=dia|semana|mes|ano&inicio=&fim=&tipo=&categoria=
+
+        Sem 'fim' vai até hoje; sem 'inicio' mostra os últimos 30 dias, 12
+        semanas, 12 meses ou 5 anos. 'categoria' aceita o id ou "nenhuma".
+        """
+        granularidade = request.query_params.get('granularidade', 'mes')
+        if granularidade not in GRANULARIDADES:
+            raise ValidationError({'granularidade': 'Use dia, semana, mes ou ano.'})
+
+        tipo = request.query_params.get('tipo') or None
+        if tipo not in (None, 'receita', 'despesa'):
+            raise ValidationError({'tipo': 'Use receita ou despesa.'})
+
+        categoria = request.query_params.get('categoria') or None
+        if categoria not in (None, 'nenhuma'):
+            if not categoria.isdigit():
+                raise ValidationError({'categoria': 'Informe o id da categoria ou "nenhuma".'})
+            categoria = int(categoria)
+
+        fim = self.data_do_parametro('fim') or date.today()
+        inicio = self.data_do_parametro('inicio')
+        for parametro, valor in (('inicio', inicio), ('fim', fim)):
+            if valor and not DATA_MINIMA <= valor <= DATA_MAXIMA:
+                raise ValidationError({parametro: f'Use uma data entre {DATA_MINIMA} e {DATA_MAXIMA}.'})
+        inicio = inicio or inicio_padrao(fim, granularidade)
+        if inicio > fim:
+            raise ValidationError({'inicio': 'A data de início deve ser anterior ao fim.'})
+        if contar_periodos(inicio, fim, granularidade) > MAXIMO_PONTOS:
+            raise ValidationError({'granularidade': f'O intervalo passa de {MAXIMO_PONTOS} pontos; use uma granularidade maior.'})
+
+        if not usa_resumo(inicio, fim, granularidade):
+            # Dia/semana (ou meses quebrados) leem as transações
+            conferir_arquivados(request.user, inicio, fim)
+
+        # O período resolvido entra na chave: sem 'fim', a série muda de um dia para o outro
+        data = em_cache(
+            request, f'serie:{inicio}:{fim}',
+            lambda: montar_serie(request.user, inicio, fim, granularidade, tipo, categoria)
+        )
+        return Response(data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        """
+        Resumo completo do dashboard calculado pelo banco.
+        ENDPOINT: /api/transacoes/dashboard/
+
+        Substitui o download de todas as transações no dashboard.js:
+        uma consulta agregada no ResumoMensal por (tipo, categoria) e uma
+        para as metas, então o custo não depende do número de transações.
+        """
+        # Fica em cache até a próxima escrita do usuário (contas/cache_respostas.py)
+        data = em_cache(request, 'dashboard', lambda: montar_dashboard(request.user))
         return Response(data, status=status.HTTP_200_OK)
 
 
@@ -200,15 +709,126 @@ class TransacaoViewSet(viewsets.ModelViewSet):
 # METAS
 # ============================================
 
-class MetaViewSet(viewsets.ModelViewSet):
+class MetaViewSet(ListagemCondicionalMixin, viewsets.ModelViewSet):
     serializer_class = MetaSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        return Meta.objects.filter(user=self.request.user).order_by('-criada_em')
+        return Meta.objects.filter(user=self.request.user).select_related('user').order_by('-criada_em')
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
     
     def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
\ No newline at end of file
+        serializer.save(user=self.request.user)
+
+
+# ============================================
+# RECORRÊNCIAS
+# ============================================
+
+class RecorrenciaViewSet(ListagemCondicionalMixin, viewsets.ModelViewSet):
+    """
+    Regras de transações recorrentes. As ocorrências vencidas viram
+    transações ao salvar a regra e, depois, pelo comando diário
+    gerar_recorrencias; as futuras aparecem em /projecao/.
+    """
+    serializer_class = RecorrenciaSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Recorrencia.objects.filter(user=self.request.user).select_related('categoria')
+
+    def perform_create(self, serializer):
+        recorrencia = serializer.save(user=self.request.user)
+        gerar_ocorrencias(regras=[recorrencia.pk])
+        recorrencia.refresh_from_db(fields=['gerada_ate'])
+
+    def perform_update(self, serializer):
+        extras = {}
+        ontem = date.today() - timedelta(days=1)
+        reativada = serializer.validated_data.get('ativa') and not serializer.instance.ativa
+        if reativada and serializer.instance.gerada_ate and serializer.instance.gerada_ate < ontem:
+            # O período em que a regra ficou pausada não é gerado
+            extras['gerada_ate'] = ontem
+        recorrencia = serializer.save(user=self.request.user, **extras)
+        gerar_ocorrencias(regras=[recorrencia.pk])
+        recorrencia.refresh_from_db(fields=['gerada_ate'])
+
+    @action(detail=False, methods=['get'])
+    def projecao(self, request):
+        """
+        Próximas ocorrências das regras ativas, calculadas na hora (não gravadas).
+        ENDPOINT: /api/recorrencias/projecao/?inicio=AAAA-MM-DD&fim=AAAA-MM-DD
+
+        Padrão: de hoje até 90 dias depois; no máximo MAXIMO_PROJECAO itens
+        ('truncado': true quando passa disso).
+        """
+        inicio = data_do_parametro(request, 'inicio') or date.today()
+        fim = data_do_parametro(request, 'fim') or inicio + timedelta(days=90)
+        if inicio > fim:
+            raise ValidationError({'inicio': 'A data de início deve ser anterior ao fim.'})
+
+        itens, truncado = projetar(request.user, inicio, fim, MAXIMO_PROJECAO)
+        totais = {'receita': 0, 'despesa': 0}
+        for item in itens:
+            totais[item['tipo']] += item['valor']
+        return Response({
+            'inicio': inicio,
+            'fim': fim,
+            'ocorrencias': itens,
+            'truncado': truncado,
+            'total_receitas': totais['receita'],
+            'total_despesas': totais['despesa'],
+            'saldo': totais['receita'] - totais['despesa'],
+        })
+
+
+# ============================================
+# RELATÓRIOS (GERADOS EM SEGUNDO PLANO)
+# ============================================
+
+class RelatorioViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    POST /api/relatorios/ {inicio, fim} pede o relatório do período (vazio = tudo).
+    Se os dados não mudaram desde o último pedido, devolve o snapshot pronto
+    (200); senão cria um novo e responde 202 enquanto ele é gerado.
+    GET /api/relatorios/{id}/ mostra o status e /download/ entrega o HTML.
+    """
+    serializer_class = RelatorioSnapshotSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return RelatorioSnapshot.objects.filter(user=self.request.user)
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        snapshot, criado = solicitar_relatorio(
+            request.user,
+            serializer.validated_data.get('inicio'),
+            serializer.validated_data.get('fim')
+        )
+        codigo = status.HTTP_200_OK if snapshot.status == 'pronto' else status.HTTP_202_ACCEPTED
+        return Response(self.get_serializer(snapshot).data, status=codigo)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        snapshot = self.get_object()
+        if snapshot.status != 'pronto':
+            return Response(
+                {'detail': 'O relatório ainda não está pronto.', 'status': snapshot.status},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        caminho = caminho_arquivo(snapshot)
+        if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+            # O arquivo já está em gzip: é enviado como está
+            response = FileResponse(open(caminho, 'rb'), content_type='text/html; charset=utf-8')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = FileResponse(gzip.open(caminho, 'rb'), content_type='text/html; charset=utf-8')
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = f'inline; filename="relatorio-{snapshot.pk}.html"'
+        return response
@@ -0,0 +1,244 @@
+"""
+Leituras assíncronas da API (ativas quando o projeto roda sob ASGI).
+
+As listagens de transações, categorias e metas, as estatísticas e o GET de
+/api/users/me/ são atendidos aqui com o ORM assíncrono do Django, sem
+ocupar uma thread do pool enquanto esperam o banco. Todo o resto (POST/PUT,
+parâmetros não listados, navegador pedindo HTML, token ausente ou
+inválido, página inexistente) é repassado à view síncrona do DRF, que
+continua sendo a referência do comportamento e dos erros.
+
+As rotas só são registradas com API_ASSINCRONA=True (ver asgi.py e urls.py):
+sob WSGI cada view assíncrona rodaria dentro de um async_to_sync, o que só
+acrescentaria custo.
+"""
+
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.paginator import InvalidPage, Page
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from . import views
+from .authentication import cache_usuarios, verificar_usuario
+from .cache_respostas import aem_cache
+from .models import Categoria
+from .pagination import TransacaoKeysetPagination
+from .renderers import JSONRapidoRenderer
+from .serializers import UserSerializer
+
+# Parâmetros aceitos por cada leitura; qualquer outro vai para o DRF
+PARAMETROS_LISTAGEM = frozenset({'page'})
+PARAMETROS_TRANSACOES = PARAMETROS_LISTAGEM | {'tipo', 'leve', 'paginacao', 'cursor'}
+
+
+# ============================================
+# AUTENTICAÇÃO E RESPOSTA
+# ============================================
+
+_jwt = JWTAuthentication()
+
+
+async def autenticar(request, relacionados=()):
+    """
+    Valida o Bearer token como o CachedJWTAuthentication, mas busca o
+    usuário com o ORM assíncrono. Devolve None em qualquer caso que o DRF
+    trataria com erro (a view síncrona monta a resposta 401 correta).
+    """
+    try:
+        header = _jwt.get_header(request)
+        token_bruto = _jwt.get_raw_token(header) if header is not None else None
+        if token_bruto is None:
+            return None
+        token = _jwt.get_validated_token(token_bruto)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (AuthenticationFailed, KeyError):
+        return None
+
+    # O cache guarda o User sem relações; com select_related vai ao banco
+    user = None if relacionados else cache_usuarios.obter(user_id)
+    if user is None:
+        try:
+            user = await User.objects.select_related(*relacionados).aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            return None
+        if not relacionados:
+            cache_usuarios.guardar(user_id, user)
+
+    try:
+        verificar_usuario(user, token)
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+def responder(dados):
+    """Mesmo corpo e cabeçalhos que o Response do DRF com o renderer JSON padrão."""
+    resposta = HttpResponse(JSONRapidoRenderer().render(dados), content_type='application/json')
+    resposta['Vary'] = 'Accept'
+    return resposta
+
+
+def leitura_assincrona(view_sincrona, parametros=frozenset(), relacionados=()):
+    """
+    Transforma `leitura(request, user)` (async; devolve os dados, uma
+    HttpResponse pronta ou None) em uma view que cai na view_sincrona
+    sempre que a leitura não se aplica.
+    """
+    view_sincrona = sync_to_async(view_sincrona)
+
+    def decorador(leitura):
+        @csrf_exempt
+        @wraps(leitura)
+        async def view(request, *args, **kwargs):
+            if (
+                request.method == 'GET'
+                and set(request.GET) <= parametros
+                and 'text/html' not in request.headers.get('Accept', '')
+            ):
+                user = await autenticar(request, relacionados)
+                if user is not None:
+                    try:
+                        dados = await leitura(request, user)
+                    except APIException:
+                        # Ex.: cursor inválido; o DRF formata o erro
+                        dados = None
+                    if isinstance(dados, HttpResponse):
+                        return dados
+                    if dados is not None:
+                        return responder(dados)
+            return await view_sincrona(request, *args, **kwargs)
+        return view
+    return decorador
+
+
+# ============================================
+# LISTAGENS (MESMO VIEWSET, LEITURA ASSÍNCRONA)
+# ============================================
+
+def _instanciar(classe, request, user):
+    """
+    Monta o ViewSet como o DRF faria para a ação 'list', sem passar pelo
+    initial() (a autenticação já foi feita em autenticar). Assim o
+    get_queryset, o serializer e a paginação continuam vindo do ViewSet.
+    """
+    drf_request = Request(request)
+    drf_request.user = user
+    view = classe(request=drf_request, args=(), kwargs={}, action='list', format_kwarg=None)
+    view.headers = {}
+    return view
+
+
+async def _pagina_numerada(view, queryset):
+    """PageNumberPagination com COUNT e página lidos com o ORM assíncrono."""
+    paginador = view.paginator
+    request = view.request
+
+    total = await queryset.acount()
+    paginator_django = paginador.django_paginator_class(queryset, paginador.page_size)
+    paginator_django.__dict__['count'] = total  # count é cached_property
+
+    numero = request.query_params.get(paginador.page_query_param) or 1
+    if numero in paginador.last_page_strings:
+        numero = paginator_django.num_pages
+    try:
+        numero = paginator_django.validate_number(numero)
+    except InvalidPage:
+        return None
+
+    inicio = (numero - 1) * paginador.page_size
+    linhas = [linha async for linha in queryset[inicio:inicio + paginador.page_size]]
+
+    paginador.request = request
+    paginador.page = Page(linhas, numero, paginator_django)
+    return paginador.get_paginated_response(view.get_serializer(linhas, many=True).data).data
+
+
+async def _pagina_por_cursor(view, queryset):
+    paginador = view.paginator
+    linhas = [linha async for linha in paginador.montar_consulta(queryset, view.request)]
+    linhas = paginador.fechar_pagina(linhas)
+    return paginador.get_paginated_response(view.get_serializer(linhas, many=True).data).data
+
+
+async def listar(classe, request, user):
+    """Igual ao list() do ViewSet, incluindo o ETag do ListagemCondicionalMixin."""
+    versao = await views.consulta_versao(user).afirst()
+    etag = views.etag_da_listagem(user.pk, versao, 'json') if versao is not None else None
+    if etag and views.etag_confere(request, etag):
+        resposta = HttpResponse(status=304)
+        resposta['Vary'] = 'Accept'
+        return views.marcar_cache(resposta, etag)
+
+    view = _instanciar(classe, request, user)
+    queryset = view.filter_queryset(view.get_queryset())
+    if isinstance(view.paginator, TransacaoKeysetPagination):
+        dados = await _pagina_por_cursor(view, queryset)
+    else:
+        dados = await _pagina_numerada(view, queryset)
+    if dados is None:
+        return None
+
+    resposta = responder(dados)
+    return views.marcar_cache(resposta, etag) if etag else resposta
+
+
+@leitura_assincrona(
+    views.TransacaoViewSet.as_view({'get': 'list', 'post': 'create'}, basename='transacao', detail=False),
+    parametros=PARAMETROS_TRANSACOES
+)
+async def transacoes(request, user):
+    return await listar(views.TransacaoViewSet, request, user)
+
+
+@leitura_assincrona(
+    views.CategoriaViewSet.as_view({'get': 'list', 'post': 'create'}, basename='categoria', detail=False),
+    parametros=PARAMETROS_LISTAGEM
+)
+async def categorias(request, user):
+    return await listar(views.CategoriaViewSet, request, user)
+
+
+@leitura_assincrona(
+    views.MetaViewSet.as_view({'get': 'list', 'post': 'create'}, basename='meta', detail=False),
+    parametros=PARAMETROS_LISTAGEM
+)
+async def metas(request, user):
+    return await listar(views.MetaViewSet, request, user)
+
+
+# ============================================
+# ESTATÍSTICAS E PERFIL
+# ============================================
+
+async def atotais_por_categoria(user):
+    """Versão assíncrona de views.totais_por_categoria."""
+    linhas = [linha async for linha in views.consulta_totais(user)]
+
+    ids = {linha['categoria_id'] for linha in linhas if linha['categoria_id']}
+    nomes = {}
+    if ids:
+        async for pk, nome in Categoria.objects.filter(user=user, id__in=ids).values_list('id', 'nome'):
+            nomes[pk] = nome
+    return views.nomear_categorias(linhas, nomes)
+
+
+@leitura_assincrona(
+    views.TransacaoViewSet.as_view({'get': 'estatisticas'}, basename='transacao', detail=False)
+)
+async def estatisticas(request, user):
+    async def calcular():
+        return views.montar_estatisticas(await atotais_por_categoria(user))
+    return await aem_cache(request, user, 'estatisticas', calcular)
+
+
+@leitura_assincrona(views.user_me, relacionados=('profile',))
+async def user_me(request, user):
+    return UserSerializer(user).data
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ga_financas_backend.settings')
+# Registra as leituras assíncronas da API (ver contas/views_async.py)
+os.environ.setdefault('GA_API_ASSINCRONA', '1')
 
 application = get_asgi_application()
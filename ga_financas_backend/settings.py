@@ -3,9 +3,12 @@ Django settings for ga_financas_backend project.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +44,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro: mede a requisição inteira, inclusive os outros middlewares
+    'contas.metricas.MetricasMiddleware',
+    # zstd/gzip conforme o Accept-Encoding (contas/compressao.py)
+    'contas.compressao.CompressaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -56,13 +63,11 @@ ROOT_URLCONF = 'ga_financas_backend.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        # DIRS está correto, aponta para a pasta templates na raiz
-        'DIRS': [BASE_DIR / 'templates'], 
-        
-        # O PONTO CRÍTICO: MUDAR PARA FALSE. 
-        # Com sua estrutura (templates na raiz), o APP_DIRS=True faz o Django ignorar o DIRS e procurar em 'contas/templates' (onde não está).
-        'APP_DIRS': False, 
-        
+        # Páginas do front (dashboard.html, receitas.html...)
+        'DIRS': [BASE_DIR / 'ga_financas_backend' / 'templates'],
+        # contas/templates (relatório). Sem 'loaders' explícitos o Django usa o
+        # loader em cache: cada template é lido e compilado uma vez por processo
+        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -70,12 +75,6 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
-            
-            # Adicione 'loaders' para garantir que ele use o DIRS configurado.
-            'loaders': [
-                'django.template.loaders.filesystem.Loader',
-                'django.template.loaders.app_directories.Loader',
-            ],
         },
     },
 ]
@@ -83,13 +82,115 @@ TEMPLATES = [
 WSGI_APPLICATION = 'ga_financas_backend.wsgi.application'
 
 
-# Database
+# ============================================
+# BANCO DE DADOS (CONFIGURADO POR VARIÁVEIS DE AMBIENTE)
+# ============================================
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# GA_DB_ENGINE=sqlite (padrão) ou postgres. Sem nenhuma variável, o
+# comportamento é o de sempre: db.sqlite3 na raiz do projeto.
+DB_ENGINE = os.environ.get('GA_DB_ENGINE', 'sqlite')
+
+# Segundos que a conexão fica aberta entre requisições (0 = uma por requisição)
+DB_CONN_MAX_AGE = int(os.environ.get('GA_DB_CONN_MAX_AGE', '60'))
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('GA_DB_NAME', 'ga_financas'),
+            'USER': os.environ.get('GA_DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('GA_DB_PASSWORD', ''),
+            'HOST': os.environ.get('GA_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('GA_DB_PORT', '5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            # Testa a conexão reaproveitada antes de usar (o servidor pode tê-la fechado)
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+
+    # GA_DB_POOL=1: pool de conexões do próprio Django. Exige psycopg 3 e
+    # psycopg-pool (pip install "psycopg[binary,pool]"); sem GA_DB_POOL, com
+    # o psycopg2 do requirements.txt, ficam as conexões persistentes acima.
+    if os.environ.get('GA_DB_POOL') == '1':
+        try:
+            import psycopg  # noqa: F401
+            import psycopg_pool  # noqa: F401
+        except ImportError as erro:
+            # Pool pedido e não disponível: falha na subida em vez de rodar sem ele
+            raise ImproperlyConfigured(
+                'GA_DB_POOL=1 exige psycopg 3 e psycopg-pool: pip install "psycopg[binary,pool]".'
+            ) from erro
+        DATABASES['default']['CONN_MAX_AGE'] = 0  # o pool cuida da reutilização
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('GA_DB_POOL_MIN', '2')),
+            'max_size': int(os.environ.get('GA_DB_POOL_MAX', '10')),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('GA_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # WAL: leitores não esperam o escritor (e vice-versa).
+                # busy_timeout: quem encontra o banco ocupado espera até 5 s
+                # em vez de falhar com "database is locked".
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=5000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+                # BEGIN IMMEDIATE: a transação pega o lock de escrita no início.
+                # Com o BEGIN padrão (DEFERRED), duas transações que leem e
+                # depois escrevem podem falhar na hora, sem passar pelo busy_timeout.
+                'transaction_mode': 'IMMEDIATE',
+            },
+            # Testes em arquivo (e não em memória) para exercitar o WAL e a
+            # concorrência entre threads como em produção. Um arquivo por
+            # processo: duas cópias do projeto, ou um test e um benchmark
+            # (que recria o banco sem perguntar) ao mesmo tempo, não apagam o
+            # banco uma da outra
+            'TEST': {
+                'NAME': os.path.join(tempfile.gettempdir(), f'ga_financas_teste_{os.getpid()}.sqlite3'),
+            },
+        }
     }
+
+
+# ============================================
+# CACHE
+# ============================================
+
+# Respostas agregadas (estatísticas, dashboard) guardadas por versão dos
+# dados (contas/cache_respostas.py). Sem serviço externo:
+# GA_CACHE_RESPOSTAS=locmem (padrão, por processo), arquivo (compartilhado
+# entre os processos da máquina) ou desligado.
+_CACHE_RESPOSTAS = os.environ.get('GA_CACHE_RESPOSTAS', 'locmem')
+CACHE_RESPOSTAS_ATIVO = _CACHE_RESPOSTAS != 'desligado'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'respostas': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache' if _CACHE_RESPOSTAS == 'arquivo'
+            else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': str(BASE_DIR / 'cache' / 'respostas') if _CACHE_RESPOSTAS == 'arquivo' else 'respostas',
+        # As chaves mudam a cada escrita; entradas velhas somem pelo tempo ou pelo limite
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            # Cheio: o locmem descarta 1/3 das menos usadas (LRU); o de arquivo, 1/3 ao acaso
+            'MAX_ENTRIES': 5000,
+            'CULL_FREQUENCY': 3,
+        },
+    },
 }
 
 
@@ -138,6 +239,22 @@ STATICFILES_DIRS = [
 # Mudei o nome para 'staticfiles' para não dar conflito com a pasta acima
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# GA_ESTATICOS=producao (contas/estaticos.py): o collectstatic grava os
+# arquivos com hash no nome e as versões .zst/.gz; o Django serve /static/
+# com cache imutável e guarda as páginas HTML na memória. Exige rodar o
+# collectstatic antes de subir (sem o manifesto o {% static %} falha).
+ESTATICOS_PRODUCAO = os.environ.get('GA_ESTATICOS') == 'producao'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': (
+            'contas.estaticos.EstaticosComprimidos' if ESTATICOS_PRODUCAO
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 # MUDANÇA 3: Configuração para Upload de Imagens (Avatar)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -151,11 +268,17 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication + cache dos usuários em memória (contas/authentication.py)
+        'contas.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # orjson, com a mesma saída do JSONRenderer do DRF (contas/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': (
+        'contas.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100,
     'DEFAULT_FILTER_BACKENDS': (
@@ -165,6 +288,33 @@ REST_FRAMEWORK = {
 }
 
 
+# Leituras da API com o ORM assíncrono (contas/views_async.py). O asgi.py
+# liga por padrão; sob WSGI (runserver, PythonAnywhere) fica desligado.
+API_ASSINCRONA = os.environ.get('GA_API_ASSINCRONA') == '1'
+
+
+# ============================================
+# RELATÓRIOS (SNAPSHOTS EM SEGUNDO PLANO)
+# ============================================
+
+# True: gera em uma thread do próprio servidor. False: os pedidos ficam
+# pendentes até rodar `python manage.py processar_relatorios`.
+RELATORIOS_EM_SEGUNDO_PLANO = True
+RELATORIOS_WORKERS = 1
+# Pendente/processando há mais tempo que isso é tratado como travado (o
+# worker morreu): não é mais reaproveitado e o processar_relatorios o retoma
+RELATORIOS_TIMEOUT_MINUTOS = 15
+
+
+# ============================================
+# SINCRONIZAÇÃO INCREMENTAL (/api/sincronizar/)
+# ============================================
+
+# Marcas de exclusão mais antigas são apagadas por `limpar_exclusoes`;
+# um cursor mais antigo que isso recebe a cópia completa.
+SINCRONIZACAO_RETENCAO_DIAS = 90
+
+
 # ============================================
 # CONFIGURAÇÕES JWT
 # ============================================
@@ -194,6 +344,45 @@ SIMPLE_JWT = {
     'TOKEN_VALIDATE_LIFETIME': True,
 }
 
+# Cache de usuários do CachedJWTAuthentication (por processo). Uma alteração
+# feita em outro processo só é vista depois do TTL (em segundos).
+CACHE_USUARIOS_TAMANHO = 1000
+CACHE_USUARIOS_TTL = 60
+
+
+# ============================================
+# MÉTRICAS POR ROTA (contas/metricas.py)
+# ============================================
+
+# Histogramas de latência, consultas e tamanho das respostas, expostos em
+# /api/metricas/ para o Prometheus. GA_METRICAS=0 desliga.
+METRICAS_ATIVAS = os.environ.get('GA_METRICAS', '1') != '0'
+
+
+# ============================================
+# COMPRESSÃO DAS RESPOSTAS (contas/compressao.py)
+# ============================================
+
+# zstd ou gzip, o que o cliente aceitar. GA_COMPRESSAO=0 desliga (ex.: quando
+# o proxy na frente já comprime).
+COMPRESSAO_ATIVA = os.environ.get('GA_COMPRESSAO', '1') != '0'
+# Respostas menores que isso vão sem compressão
+COMPRESSAO_MINIMO_BYTES = 1024
+
+
+# ============================================
+# ARQUIVO DE TRANSAÇÕES ANTIGAS (contas/arquivo.py)
+# ============================================
+
+# `python manage.py arquivar_transacoes` guarda em segmentos comprimidos
+# (um por usuário e ano) as transações de anos inteiros mais antigos que
+# isso; o ResumoMensal continua contando com elas.
+ARQUIVO_HORIZONTE_MESES = int(os.environ.get('GA_ARQUIVO_MESES', '24'))
+# Transações alteradas (ou restauradas) há menos que isso ficam na tabela
+ARQUIVO_REPOUSO_DIAS = 30
+# 'banco' (tabela contas_arquivotransacoes) ou 'disco' (MEDIA_ROOT/arquivo/)
+ARQUIVO_DESTINO = os.environ.get('GA_ARQUIVO_DESTINO', 'banco')
+
 
 # ============================================
 # CONFIGURAÇÕES CORS
@@ -1,17 +1,24 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-# ADICIONEI ESTA IMPORTAÇÃO PARA SERVIR ARQUIVOS HTML
-from django.views.generic import TemplateView
+# Páginas HTML do front (renderizadas uma vez e servidas com ETag)
+from contas.estaticos import PaginaView, servir_estatico
 from contas.views import (
     login_view,
     register_view,
     user_me,
+    sincronizar_view,
+    cache_usuarios_view,
+    metricas_view,
     CategoriaViewSet,
     TransacaoViewSet,
-    MetaViewSet
+    MetaViewSet,
+    RecorrenciaViewSet,
+    RelatorioViewSet
 )
+from contas import views_async
 
 # ============================================
 # REGISTRAR VIEWSETS
@@ -21,6 +28,8 @@ router = DefaultRouter()
 router.register(r'categorias', CategoriaViewSet, basename='categoria')
 router.register(r'transacoes', TransacaoViewSet, basename='transacao')
 router.register(r'metas', MetaViewSet, basename='meta')
+router.register(r'recorrencias', RecorrenciaViewSet, basename='recorrencia')
+router.register(r'relatorios', RelatorioViewSet, basename='relatorio')
 
 # ============================================
 # URLS
@@ -36,6 +45,13 @@ urlpatterns = [
 
     # API - PERFIL
     path('api/users/me/', user_me, name='user_me'),
+
+    # API - Sincronização incremental
+    path('api/sincronizar/', sincronizar_view, name='sincronizar'),
+
+    # API - Métricas (somente admin)
+    path('api/metricas/', metricas_view, name='metricas'),
+    path('api/metricas/cache-usuarios/', cache_usuarios_view, name='cache_usuarios'),
     
     # API - ViewSets (categorias, transações, metas)
     path('api/', include(router.urls)),
@@ -49,15 +65,41 @@ urlpatterns = [
     # ============================================
     
     # Rota Raiz (Página Inicial -> Login/Cadastro)
-    path('', TemplateView.as_view(template_name='index.html'), name='home'),
+    path('', PaginaView.as_view(template_name='index.html'), name='home'),
     
     # Mapeamento de todas as outras páginas
-    path('dashboard.html', TemplateView.as_view(template_name='dashboard.html'), name='dashboard'),
-    path('index.html', TemplateView.as_view(template_name='index.html'), name='login'),
-    path('receitas.html', TemplateView.as_view(template_name='receitas.html'), name='receitas'),
-    path('despesas.html', TemplateView.as_view(template_name='despesas.html'), name='despesas'),
-    path('metas.html', TemplateView.as_view(template_name='metas.html'), name='metas'),
-    path('categorias.html', TemplateView.as_view(template_name='categorias.html'), name='categorias'),
-    path('meus-dados.html', TemplateView.as_view(template_name='meus-dados.html'), name='meus-dados'),
-    path('profile.html', TemplateView.as_view(template_name='profile.html'), name='profile'),
-]
\ No newline at end of file
+    path('dashboard.html', PaginaView.as_view(template_name='dashboard.html'), name='dashboard'),
+    path('index.html', PaginaView.as_view(template_name='index.html'), name='login'),
+    path('receitas.html', PaginaView.as_view(template_name='receitas.html'), name='receitas'),
+    path('despesas.html', PaginaView.as_view(template_name='despesas.html'), name='despesas'),
+    path('metas.html', PaginaView.as_view(template_name='metas.html'), name='metas'),
+    path('categorias.html', PaginaView.as_view(template_name='categorias.html'), name='categorias'),
+    path('meus-dados.html', PaginaView.as_view(template_name='meus-dados.html'), name='meus-dados'),
+    path('profile.html', PaginaView.as_view(template_name='profile.html'), name='profile'),
+]
+
+# ============================================
+# ARQUIVOS ESTÁTICOS (MODO DE PRODUÇÃO)
+# ============================================
+
+# Nomes com hash e versões .zst/.gz do collectstatic (contas/estaticos.py).
+# Em desenvolvimento o runserver serve /static/ direto das pastas.
+if settings.ESTATICOS_PRODUCAO:
+    urlpatterns += [
+        re_path(r'^%s(?P<caminho>.+)$' % settings.STATIC_URL.lstrip('/'), servir_estatico, name='estaticos'),
+    ]
+
+# ============================================
+# LEITURAS ASSÍNCRONAS (SOMENTE SOB ASGI)
+# ============================================
+
+# Vêm antes do router: o GET é lido com o ORM assíncrono e o resto
+# (POST, PUT, erros) segue para as mesmas views do DRF.
+if settings.API_ASSINCRONA:
+    urlpatterns = [
+        path('api/users/me/', views_async.user_me, name='user_me'),
+        path('api/transacoes/', views_async.transacoes, name='transacao-list'),
+        path('api/transacoes/estatisticas/', views_async.estatisticas, name='transacao-estatisticas'),
+        path('api/categorias/', views_async.categorias, name='categoria-list'),
+        path('api/metas/', views_async.metas, name='meta-list'),
+    ] + urlpatterns
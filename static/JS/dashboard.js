@@ -6,8 +6,6 @@ const API_BASE_URL = 'http://127.0.0.1:8000/api';
 const LOGIN_PAGE_URL = 'index.html'; 
 let chartInstance = null; 
 
-// VARIÁVEIS GLOBAIS PARA O RELATÓRIO PDF
-let globalTransacoes = [];
 let globalMetas = [];
 
 // ============================================
@@ -338,8 +336,8 @@ function renderizarTrofeusDashboard(stats) {
 // 5. GRÁFICO (Canvas)
 // ============================================
 
-function processarGraficoReceitas(transacoes) {
-    const receitas = transacoes.filter(t => t.tipo === 'receita');
+function processarGraficoReceitas(receitasPorCategoria) {
+    const receitas = receitasPorCategoria || [];
     const containerChart = document.getElementById('chartContainer');
     const containerEmpty = document.getElementById('chartPlaceholder');
 
@@ -352,11 +350,11 @@ function processarGraficoReceitas(transacoes) {
     if(containerChart) containerChart.style.display = 'block';
     if(containerEmpty) containerEmpty.style.display = 'none';
 
+    // O agrupamento por categoria já vem pronto do servidor
     const dadosAgrupados = {};
-    receitas.forEach(t => {
-        const catNome = t.categoria_nome || t.categoria?.nome || 'Sem Categoria';
-        const valor = parseFloat(t.valor);
-        dadosAgrupados[catNome] = (dadosAgrupados[catNome] || 0) + valor;
+    receitas.forEach(item => {
+        const catNome = item.categoria || 'Sem Categoria';
+        dadosAgrupados[catNome] = (dadosAgrupados[catNome] || 0) + parseFloat(item.total);
     });
 
     const ctx = document.getElementById('receitasChart').getContext('2d');
@@ -381,129 +379,64 @@ function processarGraficoReceitas(transacoes) {
 }
 
 // ============================================
-// 6. GERAÇÃO DE PDF (DETALHADO)
+// 6. RELATÓRIO DETALHADO (GERADO NO SERVIDOR)
 // ============================================
 
+// O servidor monta o relatório completo em segundo plano (/api/relatorios/)
+// e reaproveita o arquivo enquanto os dados não mudam.
+const esperar = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+async function obterRelatorioPronto(token) {
+    const headers = { 'Authorization': `Bearer ${token}`, 'Content-Type': 'application/json' };
+
+    const resPedido = await fetch(`${API_BASE_URL}/relatorios/`, { method: 'POST', headers, body: '{}' });
+    if (!resPedido.ok) throw new Error('Erro ao pedir relatório');
+    let relatorio = await resPedido.json();
+
+    // Aguarda a geração (até ~2 minutos)
+    for (let tentativa = 0; relatorio.status !== 'pronto' && tentativa < 120; tentativa++) {
+        if (relatorio.status === 'erro') throw new Error(relatorio.erro || 'Erro ao gerar relatório');
+        await esperar(1000);
+        const resStatus = await fetch(`${API_BASE_URL}/relatorios/${relatorio.id}/`, { headers });
+        if (!resStatus.ok) throw new Error('Erro ao consultar relatório');
+        relatorio = await resStatus.json();
+    }
+    if (relatorio.status !== 'pronto') throw new Error('Tempo esgotado ao gerar relatório');
+    return relatorio;
+}
+
 document.querySelector('.btn-download').addEventListener('click', async (e) => {
     e.preventDefault();
     const btn = document.querySelector('.btn-download');
+    const token = localStorage.getItem('accessToken');
+
+    // Abre a aba já no clique para o navegador não bloquear o pop-up
+    const janela = window.open('', '_blank');
     
     // Feedback visual
     const textoOriginal = btn.innerHTML;
     btn.innerHTML = `<i class='bx bx-loader-alt bx-spin'></i> Gerando...`;
-    
-    // Preencher o Template Oculto
-    preencherRelatorioPDF();
-
-    const element = document.getElementById('report-template');
-    
-    // Torna visível para a captura, mas sem quebrar o layout da página
-    element.style.display = 'block'; 
-
-    const opt = {
-        margin:       10,
-        filename:     `Relatorio_Detalhado_${new Date().toLocaleDateString('pt-BR').replace(/\//g, '-')}.pdf`,
-        image:        { type: 'jpeg', quality: 0.98 },
-        html2canvas:  { scale: 2, useCORS: true },
-        jsPDF:        { unit: 'mm', format: 'a4', orientation: 'portrait' } 
-    };
 
     try {
-        await html2pdf().set(opt).from(element).save();
+        const relatorio = await obterRelatorioPronto(token);
+        const resArquivo = await fetch(`${API_BASE_URL}/relatorios/${relatorio.id}/download/`, {
+            headers: { 'Authorization': `Bearer ${token}` }
+        });
+        if (!resArquivo.ok) throw new Error('Erro ao baixar relatório');
+
+        const blob = await resArquivo.blob();
+        const url = URL.createObjectURL(new Blob([blob], { type: 'text/html' }));
+        if (janela) janela.location.href = url;
+        else window.open(url, '_blank');
     } catch (err) {
-        console.error("Erro ao gerar PDF", err);
-        alert("Erro ao gerar PDF.");
+        console.error("Erro ao gerar relatório", err);
+        if (janela) janela.close();
+        alert("Erro ao gerar relatório.");
     } finally {
-        element.style.display = 'none';
         btn.innerHTML = textoOriginal;
     }
 });
 
-function preencherRelatorioPDF() {
-    // A. Data
-    document.getElementById('reportDate').textContent = new Date().toLocaleString('pt-BR');
-
-    // B. Separar Dados
-    let totalRec = 0;
-    let totalDesp = 0;
-    let htmlReceitas = '';
-    let htmlDespesas = '';
-
-    globalTransacoes.forEach(t => {
-        const valor = parseFloat(t.valor);
-        const linha = `
-            <tr>
-                <td>${formatarData(t.data)}</td>
-                <td>${t.descricao}</td>
-                <td>${t.categoria_nome || t.categoria?.nome || 'Geral'}</td>
-                <td>${formatarMoeda(valor)}</td>
-            </tr>
-        `;
-
-        if (t.tipo === 'receita') {
-            totalRec += valor;
-            htmlReceitas += linha;
-        } else {
-            totalDesp += valor;
-            htmlDespesas += linha;
-        }
-    });
-
-    // C. Totais
-    document.getElementById('repTotalReceitas').textContent = formatarMoeda(totalRec);
-    document.getElementById('repTotalDespesas').textContent = formatarMoeda(totalDesp);
-    
-    const saldo = totalRec - totalDesp;
-    const elSaldo = document.getElementById('repSaldo');
-    elSaldo.textContent = formatarMoeda(saldo);
-    elSaldo.style.color = saldo >= 0 ? '#1565c0' : '#c62828'; 
-
-    // D. Tabelas
-    document.getElementById('repTableReceitas').innerHTML = htmlReceitas || '<tr><td colspan="4" style="text-align:center">Nenhuma receita registrada.</td></tr>';
-    document.getElementById('repTableDespesas').innerHTML = htmlDespesas || '<tr><td colspan="4" style="text-align:center">Nenhuma despesa registrada.</td></tr>';
-
-    // E. Metas
-    const containerMetas = document.getElementById('repGoalsList');
-    containerMetas.innerHTML = '';
-    
-    if (globalMetas.length === 0) {
-        containerMetas.innerHTML = '<p style="grid-column: 1/-1; text-align:center; color:#777;">Nenhuma meta cadastrada.</p>';
-    } else {
-        globalMetas.forEach(m => {
-            const atual = parseFloat(m.valor_atual);
-            const alvo = parseFloat(m.valor_alvo);
-            const pct = alvo > 0 ? (atual / alvo) * 100 : 0;
-            const pctLimitado = Math.min(pct, 100);
-
-            containerMetas.innerHTML += `
-                <div class="goal-item-pdf">
-                    <div class="goal-header">
-                        <span>${m.nome}</span>
-                        <span>${Math.round(pct)}%</span>
-                    </div>
-                    <div style="font-size:11px; color:#555; margin-bottom:5px;">
-                        ${formatarMoeda(atual)} de ${formatarMoeda(alvo)}
-                    </div>
-                    <div class="goal-bar-bg">
-                        <div class="goal-bar-fill" style="width: ${pctLimitado}%"></div>
-                    </div>
-                </div>
-            `;
-        });
-    }
-
-    // F. Gráfico (Converter Canvas para Imagem)
-    const canvas = document.getElementById('receitasChart');
-    const imgContainer = document.getElementById('reportChartContainer');
-    
-    if (canvas) {
-        const imgData = canvas.toDataURL('image/png');
-        imgContainer.innerHTML = `<img src="${imgData}" style="max-height: 250px;">`;
-    } else {
-        imgContainer.innerHTML = '<p>Gráfico indisponível.</p>';
-    }
-}
-
 // ============================================
 // CARREGAR DADOS DA API
 // ============================================
@@ -512,49 +445,28 @@ async function carregarDadosDashboard() {
     const token = localStorage.getItem('accessToken');
     
     try {
-        const [resTransacoes, resUser, resMetas] = await Promise.all([
-            fetch(`${API_BASE_URL}/transacoes/`, { headers: { 'Authorization': `Bearer ${token}` } }),
-            fetch(`${API_BASE_URL}/users/me/`, { headers: { 'Authorization': `Bearer ${token}` } }),
-            fetch(`${API_BASE_URL}/metas/`, { headers: { 'Authorization': `Bearer ${token}` } })
+        // Totais, gráfico e metas vêm agregados do servidor (/transacoes/dashboard/)
+        const [resResumo, resUser] = await Promise.all([
+            fetch(`${API_BASE_URL}/transacoes/dashboard/`, { headers: { 'Authorization': `Bearer ${token}` } }),
+            fetch(`${API_BASE_URL}/users/me/`, { headers: { 'Authorization': `Bearer ${token}` } })
         ]);
 
-        if (!resTransacoes.ok || !resUser.ok) {
-            if (resTransacoes.status === 401) fazerLogout();
+        if (!resResumo.ok || !resUser.ok) {
+            if (resResumo.status === 401) fazerLogout();
             return;
         }
 
-        const transacoes = await resTransacoes.json();
+        const resumo = await resResumo.json();
         const user = await resUser.json();
-        const metasResponse = resMetas.ok ? await resMetas.json() : [];
 
-        // SALVAR EM VARIÁVEIS GLOBAIS PARA O PDF
-        globalTransacoes = Array.isArray(transacoes) ? transacoes : (transacoes.results || []);
-        
-        if (Array.isArray(metasResponse)) globalMetas = metasResponse;
-        else if (metasResponse.results) globalMetas = metasResponse.results;
-        else globalMetas = [];
-
-        // Tratamento para Dashboard (Visualização na Tela)
-        const listaTransacoes = globalTransacoes;
-
-        // CÁLCULO DE TOTAIS
-        let receita = 0;
-        let despesa = 0;
-        let temReceita = false;
-        let temDespesa = false;
-
-        listaTransacoes.forEach(t => {
-            const valor = parseFloat(t.valor);
-            if (t.tipo === 'receita') {
-                receita += valor;
-                temReceita = true;
-            } else {
-                despesa += valor;
-                temDespesa = true;
-            }
-        });
+        globalMetas = resumo.metas || [];
 
-        const saldo = receita - despesa;
+        const receita = parseFloat(resumo.total_receitas) || 0;
+        const despesa = parseFloat(resumo.total_despesas) || 0;
+        const saldo = parseFloat(resumo.saldo) || 0;
+        const totalTransacoes = resumo.total_transacoes || 0;
+        const temReceita = (resumo.receitas_por_categoria || []).length > 0;
+        const temDespesa = (resumo.despesas_por_categoria || []).length > 0;
 
         // Atualiza Cards de KPI
         document.getElementById('totalReceitas').textContent = formatarMoeda(receita);
@@ -577,13 +489,13 @@ async function carregarDadosDashboard() {
 
         // Funções de Gamificação e Gráfico
         calcularVidaFinanceira(despesa);
-        calcularNivelUsuario(listaTransacoes.length);
+        calcularNivelUsuario(totalTransacoes);
         renderizarTrofeusDashboard({
             saldo: saldo,
-            totalTransacoes: listaTransacoes.length
+            totalTransacoes: totalTransacoes
         });
 
-        processarGraficoReceitas(listaTransacoes);
+        processarGraficoReceitas(resumo.receitas_por_categoria);
         
         if (localStorage.getItem('ga_primeiros_passos_concluidos') !== 'true') {
             atualizarPassos(temReceita, temDespesa, globalMetas.length > 0, user.bio);
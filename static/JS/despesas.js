@@ -89,21 +89,34 @@ async function carregarCategorias() {
     } catch (error) { console.error(error); }
 }
 
-async function carregarDespesas() {
+// Paginação por cursor (?paginacao=cursor) para rolagem infinita
+let proximaPaginaUrl = null;
+let carregandoPagina = false;
+
+async function carregarDespesas(continuar = false) {
     const tbody = document.getElementById('despesasTableBody');
     const token = localStorage.getItem('accessToken');
+
+    const url = continuar
+        ? proximaPaginaUrl
+        : `${API_BASE_URL}/transacoes/?tipo=${TIPO_TRANSACAO}&paginacao=cursor`;
+    if (!url || (continuar && carregandoPagina)) return;
+
+    carregandoPagina = true;
+    if (!continuar) proximaPaginaUrl = null;
     
     try {
-        const response = await fetch(`${API_BASE_URL}/transacoes/?tipo=${TIPO_TRANSACAO}`, {
+        const response = await fetch(url, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
         
         if (!response.ok) throw new Error('Erro ao buscar dados');
         const dados = await response.json();
         let lista = Array.isArray(dados) ? dados : (dados.results || []);
+        proximaPaginaUrl = dados.next || null;
         
-        tbody.innerHTML = '';
-        if (lista.length === 0) {
+        if (!continuar) tbody.innerHTML = '';
+        if (!continuar && lista.length === 0) {
             tbody.innerHTML = '<tr><td colspan="5" class="text-center">Nenhuma despesa registrada.</td></tr>';
             return;
         }
@@ -134,10 +147,27 @@ async function carregarDespesas() {
         });
     } catch (error) {
         console.error(error);
-        tbody.innerHTML = '<tr><td colspan="5" class="text-center text-danger">Erro ao carregar despesas.</td></tr>';
+        if (!continuar) {
+            tbody.innerHTML = '<tr><td colspan="5" class="text-center text-danger">Erro ao carregar despesas.</td></tr>';
+        }
+    } finally {
+        carregandoPagina = false;
     }
 }
 
+function configurarRolagemInfinita() {
+    const tabela = document.getElementById('despesasTableBody')?.closest('table');
+    if (!tabela || !('IntersectionObserver' in window)) return;
+
+    const sentinela = document.createElement('div');
+    sentinela.style.height = '1px';
+    tabela.after(sentinela);
+
+    new IntersectionObserver((entradas) => {
+        if (entradas[0].isIntersecting && proximaPaginaUrl) carregarDespesas(true);
+    }, { rootMargin: '200px' }).observe(sentinela);
+}
+
 // ============================================
 // SALVAR, EDITAR, DELETAR
 // ============================================
@@ -235,6 +265,7 @@ document.addEventListener('DOMContentLoaded', () => {
     carregarCategorias();
     carregarDespesas();
     carregarEstatisticas();
+    configurarRolagemInfinita();
 
     document.getElementById('despesaForm').addEventListener('submit', salvarDespesa);
     document.getElementById('cancelEditBtn').addEventListener('click', resetFormulario);
@@ -109,16 +109,31 @@ async function carregarCategorias() {
 }
 
 // ============================================
-// CARREGAR LISTA DE RECEITAS
+// CARREGAR LISTA DE RECEITAS (ROLAGEM INFINITA)
 // ============================================
-async function carregarReceitas() {
+
+// A API devolve páginas por cursor (?paginacao=cursor): cada página custa o
+// mesmo, não importa quão fundo o usuário role no histórico.
+let proximaPaginaUrl = null;
+let carregandoPagina = false;
+
+async function carregarReceitas(continuar = false) {
     const tbody = document.getElementById('receitasTableBody');
     const token = localStorage.getItem('accessToken');
 
-    tbody.innerHTML = '<tr><td colspan="5" class="text-center">Carregando...</td></tr>';
+    const url = continuar
+        ? proximaPaginaUrl
+        : `${API_BASE_URL}/transacoes/?tipo=${TIPO_TRANSACAO}&paginacao=cursor`;
+    if (!url || (continuar && carregandoPagina)) return;
+
+    carregandoPagina = true;
+    if (!continuar) {
+        proximaPaginaUrl = null;
+        tbody.innerHTML = '<tr><td colspan="5" class="text-center">Carregando...</td></tr>';
+    }
 
     try {
-        const response = await fetch(`${API_BASE_URL}/transacoes/?tipo=${TIPO_TRANSACAO}`, {
+        const response = await fetch(url, {
             headers: { 'Authorization': `Bearer ${token}` }
         });
 
@@ -126,10 +141,11 @@ async function carregarReceitas() {
 
         const dados = await response.json();
         let lista = Array.isArray(dados) ? dados : (dados.results || []);
+        proximaPaginaUrl = dados.next || null;
 
-        tbody.innerHTML = '';
+        if (!continuar) tbody.innerHTML = '';
 
-        if (lista.length === 0) {
+        if (!continuar && lista.length === 0) {
             tbody.innerHTML = '<tr><td colspan="5" class="text-center">Nenhuma receita registrada.</td></tr>';
             return;
         }
@@ -162,10 +178,28 @@ async function carregarReceitas() {
 
     } catch (error) {
         console.error(error);
-        tbody.innerHTML = '<tr><td colspan="5" class="text-center text-danger">Erro ao carregar receitas.</td></tr>';
+        if (!continuar) {
+            tbody.innerHTML = '<tr><td colspan="5" class="text-center text-danger">Erro ao carregar receitas.</td></tr>';
+        }
+    } finally {
+        carregandoPagina = false;
     }
 }
 
+function configurarRolagemInfinita() {
+    const tabela = document.getElementById('receitasTableBody')?.closest('table');
+    if (!tabela || !('IntersectionObserver' in window)) return;
+
+    // Marcador logo abaixo da tabela: quando aparece na tela, busca a próxima página
+    const sentinela = document.createElement('div');
+    sentinela.style.height = '1px';
+    tabela.after(sentinela);
+
+    new IntersectionObserver((entradas) => {
+        if (entradas[0].isIntersecting && proximaPaginaUrl) carregarReceitas(true);
+    }, { rootMargin: '200px' }).observe(sentinela);
+}
+
 // ============================================
 // SALVAR RECEITA (CRIAR OU EDITAR)
 // ============================================
@@ -287,6 +321,7 @@ document.addEventListener('DOMContentLoaded', () => {
     carregarCategorias();
     carregarReceitas();
     carregarEstatisticas(); 
+    configurarRolagemInfinita();
 
     document.getElementById('receitaForm').addEventListener('submit', salvarReceita);
     document.getElementById('cancelEditBtn').addEventListener('click', resetFormulario);